@@ -20,8 +20,24 @@ from convex import ConvexClient
 from dedalus_labs import AsyncDedalus, DedalusRunner
 from dotenv import load_dotenv
 
+from clause import Clause
+from clause_keywords import clause_importance_weight, keyword_hits
 from k2_client import analyze_clause_risk
+from key_dates import extract_key_dates
+from legal_context import lookup_legal_context
+from model_router import MODEL_STATS
+from parsed_document import ParsedDocument
+from profiles import AnalysisProfile, get_profile
 from prompts import AGENT_SYSTEM_PROMPT
+from revisions import (
+    ClauseMatch,
+    align_clauses,
+    describe_changes,
+    load_snapshot,
+    removed_clauses,
+    reusable_analyses,
+    save_snapshot,
+)
 from tools import (
     categorize_risk,
     classify_contract,
@@ -48,32 +64,68 @@ client = AsyncDedalus(
 # Convex client for writing results
 convex = ConvexClient(os.environ.get("CONVEX_URL", ""))
 
+STORED_CLAUSE_CHARS = 2000  # Clause text saved with each analyzed clause
+
 
-CLAUSE_CONCURRENCY = 6  # Max concurrent K2+RAG calls (raised for sub-clauses)
+async def _hedged(make_call, hedge_after: float | None):
+    """Await make_call(); if it is still pending after hedge_after seconds,
+    fire a duplicate and return whichever finishes first.
+
+    Trims tail latency from slow inference replicas at the cost of an
+    occasional extra call. With hedge_after=None this is a plain await.
+    """
+    if hedge_after is None:
+        return await make_call()
+
+    primary = asyncio.ensure_future(make_call())
+    pending = {primary}
+    try:  # Every exit (including our own cancellation) cancels what is still running
+        done, _ = await asyncio.wait(pending, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        pending.add(asyncio.ensure_future(make_call()))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.exception():
+                    return task.result()
+        # Both failed — surface the primary's error
+        return primary.result()
+    finally:
+        for task in pending:
+            task.cancel()
 
 
 async def _analyze_one_clause(
-    clause: dict, contract_type: str, index: int
+    clause: Clause, contract_type: str, index: int, profile: AnalysisProfile
 ) -> dict:
     """Analyze a single clause: RAG lookup then K2 Think. Runs concurrently."""
-    clause_text = clause["text"]
-    heading = clause["heading"]
+    clause_text = clause.text
+    heading = clause.heading
+    heading_hits = keyword_hits(heading)  # Shared by importance and risk category
     t0 = time.time()
 
-    # Step 1: RAG lookup for legal context
-    try:
-        rag_context = await query_legal_knowledge(clause_text, heading, contract_type)
-    except Exception as e:
-        rag_context = ""
-        print(f"  Clause {index+1} RAG failed: {e}")
+    # Step 1: Legal context — precomputed CUAD bundle when the clause maps to a
+    # known type (local, instant), otherwise remote RAG (skipped by "fast")
+    rag_context = lookup_legal_context(clause_text, heading) or ""
+    if not rag_context and profile.use_rag:
+        try:
+            rag_context = await query_legal_knowledge(clause_text, heading, contract_type)
+        except Exception as e:
+            print(f"  Clause {index+1} RAG failed: {e}")
 
     # Step 2: K2 Think deep analysis (with RAG context)
     try:
-        k2_result = await analyze_clause_risk(
-            clause_text=clause_text,
-            clause_type=heading,
-            contract_type=contract_type,
-            additional_context=rag_context,
+        k2_result = await _hedged(
+            lambda: analyze_clause_risk(
+                clause_text=clause_text,
+                clause_type=heading,
+                contract_type=contract_type,
+                additional_context=rag_context,
+                importance=clause_importance_weight(heading, heading_hits),
+            ),
+            profile.hedge_after,
         )
     except Exception as e:
         print(f"  Clause {index+1} K2 failed: {e}")
@@ -84,16 +136,17 @@ async def _analyze_one_clause(
             "concern": "Could not complete deep analysis",
             "suggestion": "Manual review recommended",
             "reasoning": str(e),
+            "failed": True,
         }
 
     # Step 3: Categorize risk (local, instant)
-    risk_cat = categorize_risk(clause_text, heading)
+    risk_cat = categorize_risk(clause_text, heading, type_hits=heading_hits)
 
     elapsed = time.time() - t0
     print(f"  Clause {index+1} ({heading[:40]}) done in {elapsed:.1f}s")
 
-    return {
-        "clauseText": clause_text[:2000],
+    result = {
+        "clauseText": clause.excerpt(STORED_CLAUSE_CHARS),
         "clauseType": heading,
         "riskLevel": k2_result.get("riskLevel", "medium"),
         "riskCategory": k2_result.get("riskCategory", risk_cat["category"]),
@@ -101,42 +154,61 @@ async def _analyze_one_clause(
         "concern": k2_result.get("concern", ""),
         "suggestion": k2_result.get("suggestion", ""),
         "k2Reasoning": k2_result.get("reasoning", ""),
-        "parentHeading": clause.get("parentHeading"),
-        "subClauseIndex": clause.get("subClauseIndex"),
+        "parentHeading": clause.parent_heading,
+        "subClauseIndex": clause.sub_index,
     }
+    if k2_result.get("failed"):
+        result["failed"] = True  # A fallback, never reused by a later revision
+    return result
 
 
 async def _analyze_one_clause_throttled(
     sem: asyncio.Semaphore,
-    clause: dict,
+    clause: Clause,
     contract_type: str,
     index: int,
     position: dict | None,
     review_id: str,
     counter: dict,
     total: int,
+    profile: AnalysisProfile,
+    reused: dict | None = None,
 ) -> dict:
-    """Analyze a clause with semaphore throttling and incremental save."""
-    async with sem:
-        try:
-            result = await asyncio.wait_for(
-                _analyze_one_clause(clause, contract_type, index),
-                timeout=120.0,
-            )
-        except asyncio.TimeoutError:
-            print(f"  Clause {index+1} timed out (120s)")
-            result = {
-                "clauseText": clause["text"][:2000],
-                "clauseType": clause["heading"],
-                "riskLevel": "medium",
-                "riskCategory": "operational",
-                "explanation": f"Analysis timed out for: {clause['heading']}",
-                "concern": "Could not complete analysis within time limit",
-                "suggestion": "Manual review recommended",
-                "k2Reasoning": "",
-                "parentHeading": clause.get("parentHeading"),
-                "subClauseIndex": clause.get("subClauseIndex"),
-            }
+    """Analyze a clause with semaphore throttling and incremental save.
+
+    With `reused` (the parent version's analysis of the same clause text),
+    RAG and K2 are skipped; the clause is still positioned and saved.
+    """
+    if reused is not None:
+        result = {
+            "clauseText": clause.excerpt(STORED_CLAUSE_CHARS),
+            "clauseType": clause.heading,
+            **reused,
+            "parentHeading": clause.parent_heading,
+            "subClauseIndex": clause.sub_index,
+        }
+    else:
+        async with sem:
+            try:
+                result = await asyncio.wait_for(
+                    _analyze_one_clause(clause, contract_type, index, profile),
+                    timeout=profile.clause_timeout,
+                )
+            except asyncio.TimeoutError:
+                print(f"  Clause {index+1} timed out ({profile.clause_timeout:.0f}s)")
+                result = {
+                    "clauseText": clause.excerpt(STORED_CLAUSE_CHARS),
+                    "clauseType": clause.heading,
+                    "riskLevel": "medium",
+                    "riskCategory": "operational",
+                    "explanation": f"Analysis timed out for: {clause.heading}",
+                    "concern": "Could not complete analysis within time limit",
+                    "suggestion": "Manual review recommended",
+                    "k2Reasoning": "",
+                    "parentHeading": clause.parent_heading,
+                    "subClauseIndex": clause.sub_index,
+                    "failed": True,
+                }
 
     # Merge position data
     if position:
@@ -169,11 +241,15 @@ def _build_summary_prompt(
     contract_type: str,
     clause_results: list[dict],
     contract_text_preview: str,
+    key_dates: list[dict],
+    revision_notes: str = "",
 ) -> str:
     """Build the summary prompt for the Dedalus agent (and K2 fallback).
 
     The prompt includes clause analysis data in JSON so the agent can pass it
-    to compute_risk_breakdown(), and contract text for find_key_dates().
+    to compute_risk_breakdown(), the key dates already extracted from the full
+    contract, and contract text for find_key_dates(). For a revised version,
+    revision_notes (revisions.describe_changes) says what changed.
     """
     clause_summary = ""
     for i, c in enumerate(clause_results):
@@ -189,20 +265,26 @@ def _build_summary_prompt(
         for c in clause_results
     ])
 
+    revision_section = (
+        f"Changes since the previous version:\n{revision_notes}\n\n" if revision_notes else ""
+    )
+
     return (
         f"Contract type: {contract_type}\n\n"
+        f"{revision_section}"
         f"Analyzed clauses:{clause_summary}\n\n"
         f"Clause data (JSON for tools):\n{clause_json}\n\n"
+        f"Key dates (extracted from the full contract):\n{json.dumps(key_dates)}\n\n"
         f"Contract preview (first 3000 chars):\n{contract_text_preview[:3000]}\n\n"
         f"Instructions:\n"
         f"1. Use compute_risk_breakdown with the clause data JSON above to get precise risk scores.\n"
-        f"2. Use find_key_dates with the contract preview to extract important dates.\n"
+        f"2. Start from the key dates above; use find_key_dates only for text they miss.\n"
         f"3. Optionally search for legal standards relevant to this {contract_type} via Exa.\n"
         f"4. Synthesize everything into:\n"
         f"   - A 2-3 sentence executive summary in plain English (no jargon)\n"
         f"   - Overall risk score (0-100) and category scores from the tool\n"
         f"   - 3-5 prioritized action items (what the signer should do)\n"
-        f"   - Key dates from the tool output\n\n"
+        f"   - Key dates from the list above and any tool output\n\n"
         f"Respond ONLY with valid JSON, no markdown:\n"
         f'{{"summary": "...", "riskScore": N, "financialRisk": N, '
         f'"complianceRisk": N, "operationalRisk": N, "reputationalRisk": N, '
@@ -219,7 +301,9 @@ def _parse_llm_json(output: str) -> dict:
     return json.loads(output.strip())
 
 
-def _local_fallback_summary(contract_type: str, clause_results: list[dict]) -> dict:
+def _local_fallback_summary(
+    contract_type: str, clause_results: list[dict], key_dates: list[dict] | None = None,
+) -> dict:
     """Compute summary locally from clause results (no LLM, instant)."""
     risk_levels = {"high": 80, "medium": 50, "low": 20}
     scores = [risk_levels.get(c.get("riskLevel", "medium"), 50) for c in clause_results]
@@ -236,7 +320,7 @@ def _local_fallback_summary(contract_type: str, clause_results: list[dict]) -> d
             for c in clause_results
             if c.get("riskLevel") in ("high", "medium")
         ][:5] or ["Review the full contract with a lawyer"],
-        "keyDates": [],
+        "keyDates": key_dates or [],
     }
 
 
@@ -244,6 +328,9 @@ async def _generate_summary(
     contract_type: str,
     clause_results: list[dict],
     contract_text_preview: str,
+    key_dates: list[dict],
+    profile: AnalysisProfile,
+    revision_notes: str = "",
 ) -> dict:
     """Generate summary + action items + key dates via Dedalus agent.
 
@@ -252,11 +339,18 @@ async def _generate_summary(
     decides which tools to invoke based on the analysis context — genuine non-linear
     multi-step reasoning.
 
-    Falls back to K2 Think, then local computation.
+    Falls back to K2 Think, then local computation. Profiles without an agent
+    summary go straight to the local computation.
     """
-    prompt = _build_summary_prompt(contract_type, clause_results, contract_text_preview)
+    if not profile.use_agent_summary:
+        print(f"  Profile '{profile.name}': local summary only")
+        return _local_fallback_summary(contract_type, clause_results, key_dates)
 
-    # ── Attempt 1: Dedalus agent with native tools + Exa MCP (60s) ──
+    prompt = _build_summary_prompt(
+        contract_type, clause_results, contract_text_preview, key_dates, revision_notes,
+    )
+
+    # ── Attempt 1: Dedalus agent with native tools + Exa MCP ────────
     # The agent can:
     #   - Call compute_risk_breakdown() to calculate precise category scores
     #   - Call find_key_dates() to extract dates from the contract text
@@ -270,18 +364,18 @@ async def _generate_summary(
                 input=prompt,
                 instructions=AGENT_SYSTEM_PROMPT,
                 tools=[compute_risk_breakdown, find_key_dates],
-                mcp_servers=["exa-labs/exa-mcp-server"],
-                max_steps=5,
+                mcp_servers=["exa-labs/exa-mcp-server"] if profile.use_exa_research else [],
+                max_steps=profile.agent_max_steps,
                 stream=False,
             ),
-            timeout=60.0,
+            timeout=profile.summary_timeout,
         )
         output = getattr(response, "final_output", "") or ""
         result = _parse_llm_json(output)
         print("  Summary via Dedalus OK (multi-tool agent)")
         return result
     except asyncio.TimeoutError:
-        print("  Dedalus timed out (60s), falling back to K2")
+        print(f"  Dedalus timed out ({profile.summary_timeout:.0f}s), falling back to K2")
     except Exception as e:
         print(f"  Dedalus summary failed: {e}, falling back to K2")
 
@@ -305,16 +399,15 @@ async def _generate_summary(
         print(f"  K2 summary also failed: {e}, using local fallback")
 
     # ── Attempt 3: Local computation (instant, no LLM) ──────────────
-    return _local_fallback_summary(contract_type, clause_results)
+    return _local_fallback_summary(contract_type, clause_results, key_dates)
 
 
 async def run_contract_analysis(
     review_id: str,
-    pdf_text: str,
+    document: ParsedDocument,
     user_id: str,
-    ocr_used: bool = False,
-    pdf_bytes: bytes = b"",
-    ocr_words: list = None,
+    profile: AnalysisProfile | None = None,
+    parent_review_id: str | None = None,
 ) -> dict:
     """Run the hybrid contract analysis pipeline.
 
@@ -326,8 +419,20 @@ async def run_contract_analysis(
     through an agent loop). Dedalus owns the intelligence layer — dynamically
     choosing between compute_risk_breakdown, find_key_dates, and Exa research
     to generate the final summary.
+
+    The analysis profile (see profiles.py) selects which stages run and their
+    concurrency/timeout budgets; defaults to "balanced".
+
+    Every stage works from the same ParsedDocument (text, page geometry, text
+    index and OCR words) — the upload is never re-opened or re-parsed here.
+
+    With parent_review_id (an earlier version of the same contract), clauses
+    whose text is unchanged reuse the parent's analysis (see revisions.py),
+    and the parent summary is reused when nothing changed at all.
     """
     t_start = time.time()
+    profile = profile or get_profile(None)
+    pdf_text = document.text
 
     # Update status to processing
     try:
@@ -337,11 +442,32 @@ async def run_contract_analysis(
 
     try:
         # ── Phase 1: Classification + K2-powered extraction ─────────
-        print(f"[{review_id}] Phase 1: classify + extract (K2)")
-        contract_type = classify_contract(pdf_text[:5000])
-        all_clauses = await extract_clauses_k2(pdf_text)
+        print(f"[{review_id}] Phase 1: classify + extract (K2), profile={profile.name}")
+        contract_type = classify_contract(pdf_text)
+        all_clauses = await extract_clauses_k2(pdf_text, split_subclauses=profile.split_subclauses)
         print(f"  Type: {contract_type}, Clauses found: {len(all_clauses)}")
 
+        # Align with the parent version: unchanged clauses keep its analysis
+        parent = load_snapshot(parent_review_id, user_id) if parent_review_id else None
+        matches: list[ClauseMatch] = []
+        if parent is not None:
+            matches = align_clauses(all_clauses, parent["clauses"])
+            print(
+                f"  Parent {parent_review_id}: "
+                f"{sum(m.status == 'unchanged' for m in matches)} unchanged, "
+                f"{sum(m.status == 'changed' for m in matches)} changed, "
+                f"{sum(m.status == 'new' for m in matches)} new clauses"
+            )
+        elif parent_review_id:
+            print(f"  No stored analysis for parent {parent_review_id}, analyzing everything")
+        reused: list[dict | None] = []
+        if parent is not None:
+            reused = reusable_analyses(matches, parent, contract_type, profile.name)
+            print(
+                f"  Reusing {sum(r is not None for r in reused)} parent analyses "
+                f"(parent: {parent.get('contractType')}, profile {parent.get('profile')})"
+            )
+
         # Report total clause count to frontend
         try:
             convex.mutation("reviews:updateProgress", {
@@ -354,24 +480,24 @@ async def run_contract_analysis(
 
         # Extract clause positions from PDF
         clause_positions = []
-        if pdf_bytes:
+        if document.is_pdf:
             try:
-                if ocr_used and ocr_words:
-                    clause_positions = match_clauses_to_ocr_boxes(all_clauses, ocr_words, pdf_bytes)
+                if document.ocr_used and document.ocr_words:
+                    clause_positions = match_clauses_to_ocr_boxes(all_clauses, document)
                     print(f"  Matched OCR positions for {len(clause_positions)} clauses")
                 else:
-                    clause_positions = extract_clause_positions(pdf_bytes, all_clauses)
+                    clause_positions = extract_clause_positions(document, all_clauses)
                     print(f"  Extracted positions for {len(clause_positions)} clauses")
             except Exception as e:
                 print(f"  Position extraction failed: {e}")
 
         # ── Phase 2: Analyze ALL clauses (semaphore-throttled) ──────
-        # Direct K2+RAG for speed — 6-concurrent parallelism requires
+        # Direct K2+RAG for speed — concurrent parallelism requires
         # direct execution, not an agent loop.
-        print(f"[{review_id}] Phase 2: analyzing {len(all_clauses)} clauses (max {CLAUSE_CONCURRENCY} concurrent)")
+        print(f"[{review_id}] Phase 2: analyzing {len(all_clauses)} clauses (max {profile.clause_concurrency} concurrent)")
         t_phase2 = time.time()
 
-        sem = asyncio.Semaphore(CLAUSE_CONCURRENCY)
+        sem = asyncio.Semaphore(profile.clause_concurrency)
         counter = {"completed": 0}
 
         clause_results = list(await asyncio.gather(
@@ -379,7 +505,8 @@ async def run_contract_analysis(
                 _analyze_one_clause_throttled(
                     sem, clause, contract_type, i,
                     clause_positions[i] if i < len(clause_positions) else None,
-                    review_id, counter, len(all_clauses),
+                    review_id, counter, len(all_clauses), profile,
+                    reused[i] if i < len(reused) else None,
                 )
                 for i, clause in enumerate(all_clauses)
             ]
@@ -395,9 +522,22 @@ async def run_contract_analysis(
         print(f"[{review_id}] Phase 3: Dedalus agent summary (tools + Exa MCP)")
         t_phase3 = time.time()
 
-        summary_data = await _generate_summary(
-            contract_type, clause_results, pdf_text,
-        )
+        # Key dates over the whole contract (one linear pass, no LLM), off the
+        # event loop: a long contract takes a noticeable fraction of a second
+        found_dates = await asyncio.to_thread(extract_key_dates, pdf_text)
+        key_dates = [key_date.to_dict() for key_date in found_dates]
+        print(f"  Found {len(key_dates)} key dates")
+
+        if parent is not None and all(r is not None for r in reused) and not (
+            removed_clauses(matches, parent["clauses"])
+        ):
+            print("  No clause changed since the parent version, reusing its summary")
+            summary_data = parent["summary"]
+        else:
+            summary_data = await _generate_summary(
+                contract_type, clause_results, pdf_text, key_dates, profile,
+                describe_changes(all_clauses, matches, parent) if parent is not None else "",
+            )
 
         print(f"  Phase 3 done in {time.time() - t_phase3:.1f}s")
 
@@ -412,13 +552,21 @@ async def run_contract_analysis(
             "reputationalRisk": summary_data.get("reputationalRisk", 50),
             "clauses": clause_results,
             "actionItems": summary_data.get("actionItems", []),
-            "keyDates": summary_data.get("keyDates", []),
+            "keyDates": summary_data.get("keyDates") or key_dates,
         }
 
-        _save_results(review_id, result, ocr_used)
+        _save_results(review_id, result, document.ocr_used)
+        try:
+            save_snapshot(
+                review_id, user_id, contract_type, profile.name, all_clauses, clause_results,
+                result,
+            )
+        except OSError as e:
+            print(f"  Warning: Failed to store analysis snapshot: {e}")
 
         elapsed = time.time() - t_start
         print(f"[{review_id}] DONE in {elapsed:.1f}s — {contract_type}, score {result['riskScore']}, {len(clause_results)} clauses")
+        print(f"  Model usage (process totals):\n{MODEL_STATS.report()}")
 
         return result
 
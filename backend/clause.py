@@ -0,0 +1,40 @@
+"""Clause data model: a span of a shared text buffer.
+
+Clauses cut by clause_lexer point into the parsed document's text — one
+buffer for the whole contract — instead of each holding a copy. Text is
+sliced out only when a stage asks for it (clause.text, clause.excerpt()).
+For clauses anchored in the document text, the offsets are also document
+positions: ParsedDocument.page_at(clause.start) is the page the clause
+starts on.
+"""
+
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True, eq=False)
+class Clause:
+    """A clause (or sub-clause) as the span source[start:end]."""
+
+    heading: str
+    source: str = field(repr=False)
+    start: int
+    end: int
+    parent_heading: str | None = None  # Set on sub-clauses
+    sub_index: int | None = None  # Sub-clause position within its parent
+
+    @classmethod
+    def detached(cls, heading: str, text: str) -> "Clause":
+        """A clause whose text is not part of the document buffer (e.g. from K2)."""
+        return cls(heading, text, 0, len(text))
+
+    @property
+    def text(self) -> str:
+        return self.source[self.start:self.end]
+
+    def excerpt(self, limit: int) -> str:
+        """The first `limit` characters of the clause text."""
+        return self.source[self.start:min(self.end, self.start + limit)]
+
+    def in_document(self, document_text: str) -> bool:
+        """Whether the offsets index into document_text (same buffer)."""
+        return self.source is document_text
@@ -0,0 +1,121 @@
+"""Keyword tables for contract classification, risk categorization and
+clause importance, and the shared lookups over them.
+
+tools.classify_contract() and tools.categorize_risk() apply the first two
+tables; clause_importance_weight() the third. This module imports nothing
+heavier than keyword_set, so portfolio_scoring (and its CLI) can weight
+clauses without loading the K2 client, PyMuPDF or OCR.
+"""
+
+from keyword_set import KeywordHits, KeywordSet
+
+# (contract_type, [(keyword, weight), ...])
+CONTRACT_TYPE_KEYWORDS = [
+    ("NDA", [
+        ("non-disclosure", 3), ("nda", 3), ("confidential information", 2),
+        ("disclosing party", 2), ("receiving party", 2),
+    ]),
+    ("Employment Agreement", [
+        ("employment agreement", 3), ("at-will", 3), ("employee", 1),
+        ("employer", 1), ("probationary", 2), ("severance", 2),
+        ("job title", 2), ("base salary", 2),
+    ]),
+    ("Lease Agreement", [
+        ("lease agreement", 3), ("landlord", 2), ("tenant", 2),
+        ("premises", 1), ("rent", 1), ("security deposit", 2),
+        ("leasehold", 3), ("sublease", 2),
+    ]),
+    ("Freelance/Contractor Agreement", [
+        ("independent contractor", 3), ("freelance", 3),
+        ("scope of work", 2), ("deliverables", 1), ("1099", 3),
+    ]),
+    ("Consulting Agreement", [
+        ("consulting agreement", 3), ("consultant", 2),
+        ("consulting services", 3), ("engagement", 1), ("retainer", 2),
+    ]),
+    ("SaaS/Software License", [
+        ("software license", 3), ("saas", 3), ("subscription", 2),
+        ("end user", 2), ("uptime", 2), ("service level agreement", 3),
+        ("api", 1), ("cloud", 1),
+    ]),
+    ("Service Agreement", [
+        ("service agreement", 3), ("services", 1), ("service level", 2),
+        ("service provider", 2), ("statement of work", 2),
+    ]),
+    ("Purchase Agreement", [
+        ("purchase agreement", 3), ("buyer", 2), ("seller", 2),
+        ("sale", 1), ("purchase price", 2), ("bill of sale", 3),
+    ]),
+    ("Partnership Agreement", [
+        ("partnership agreement", 3), ("partner", 1),
+        ("joint venture", 3), ("profit sharing", 2),
+        ("capital contribution", 2),
+    ]),
+    ("License Agreement", [
+        ("license agreement", 3), ("licensor", 2), ("licensee", 2),
+        ("royalt", 2), ("sublicense", 2), ("licensed rights", 2),
+    ]),
+]
+
+
+# (where, terms, category, rationale) — checked in order, the first rule with a
+# term in the clause type ("type") or clause text ("text") wins
+RISK_CATEGORY_RULES = [
+    ("type", ("liability", "payment", "penalty", "damages", "fee", "cost"),
+     "financial", "Direct monetary impact"),
+    ("text", ("liquidated damages", "cap on liability", "indemnif"),
+     "financial", "Financial exposure clause"),
+    ("type", ("non-compete", "compliance", "privacy", "data", "regulatory"),
+     "compliance", "Regulatory or legal compliance risk"),
+    ("type", ("exclusivity", "assignment", "ip", "termination", "non-solicit"),
+     "operational", "Restricts operational freedom"),
+    ("type", ("confidential", "non-disparage", "publicity"),
+     "reputational", "Reputation or brand risk"),
+    ("text", ("penalt", "fine", "fee", "cost", "payment"),
+     "financial", "Contains financial terms"),
+    ("text", ("shall not", "restricted", "prohibited", "exclusive"),
+     "operational", "Contains operational restrictions"),
+]
+
+
+# Clause importance weights — high-impact clause types contribute more.
+# Order matters: the first key found in the clause type wins.
+CLAUSE_IMPORTANCE = {
+    "indemnification": 1.5, "indemnity": 1.5,
+    "limitation of liability": 1.5, "liability": 1.4,
+    "termination": 1.3, "non-compete": 1.3, "non compete": 1.3,
+    "penalty": 1.4, "liquidated damages": 1.4, "damages": 1.3,
+    "payment": 1.2, "compensation": 1.2,
+    "intellectual property": 1.2, "ip assignment": 1.2,
+    "confidentiality": 1.1, "non-disclosure": 1.1,
+    "warranty": 1.1, "representations": 1.0,
+    "force majeure": 0.9, "assignment": 0.9,
+    "governing law": 0.8, "jurisdiction": 0.8,
+    "notices": 0.7, "miscellaneous": 0.6, "definitions": 0.5,
+}
+
+# Every keyword above: hits on one text are shared by contract classification,
+# risk categorization and importance weighting, scanning each keyword once
+KEYWORDS = KeywordSet([
+    *(keyword for _, keywords in CONTRACT_TYPE_KEYWORDS for keyword, _ in keywords),
+    *(term for _, terms, _, _ in RISK_CATEGORY_RULES for term in terms),
+    *CLAUSE_IMPORTANCE,
+])
+
+
+def keyword_hits(text: str) -> KeywordHits:
+    """Lookups of KEYWORDS keywords in text (case-insensitive)."""
+    return KEYWORDS.hits(text.lower())
+
+
+def clause_importance_weight(clause_type: str, hits: KeywordHits | None = None) -> float:
+    """Return the importance weight for a clause type (1.0 if unlisted).
+
+    Args:
+        clause_type: The clause type (heading).
+        hits: keyword_hits(clause_type), if already computed.
+    """
+    if hits is None:
+        hits = keyword_hits(clause_type)
+    key = hits.first(CLAUSE_IMPORTANCE)
+    return CLAUSE_IMPORTANCE[key] if key is not None else 1.0
@@ -0,0 +1,243 @@
+"""Single-pass lexer for contract section headings and sub-clause markers.
+
+lex_sections() visits each line start of the contract text once. There it
+tokenizes a top-level heading marker (1.1, 2), A., (A), Section 1, ARTICLE I,
+SCHEDULE A, Exhibit A, RECITALS, WITNESSETH, ALL CAPS HEADING:) and the
+line's leading sub-clause marker (3.1, 3.1.1, (a), (iv), (B), a.), recording
+offsets only. Sections and their sub-clauses are then cut from those offsets
+without re-scanning or copying the text.
+
+The rules reproduce the original splitter exactly — re.split on the heading
+pattern, a sub-clause finditer over each section's first MAX_CLAUSE_CHARS,
+and the fallbacks for documents without recognized headings — so callers
+(tools.extract_clauses, tools.split_into_subclauses) produce the same output.
+"""
+
+import bisect
+import re
+from typing import NamedTuple
+
+MAX_CLAUSE_CHARS = 3000
+MIN_SECTION_CHARS = 50
+MIN_PREAMBLE_CHARS = 30  # A preamble is kept when longer than this
+MIN_SUBCLAUSE_CHARS = 20
+MAX_HEADING_CHARS = 100
+
+# Tested at each line start (the line start itself, no leading whitespace)
+_HEADING_MARKER = re.compile(
+    r"\d+\.\d+(?:\.\d+)*[\.\)]*\s"   # 1.1, 2.14, 1.2.3 (decimal)
+    r"|\d+[\.\)]\s"                    # 1., 2) (single-level)
+    r"|[A-Z][\.\)]\s"                  # A., B) (lettered sections)
+    r"|\([A-Z]\)\s"                    # (A), (B)
+    r"|Section\s+\d"                    # Section 1
+    r"|SECTION\s+\d"                    # SECTION 1
+    r"|ARTICLE\s+[IVX\d]"              # ARTICLE I, ARTICLE 1
+    r"|Article\s+[IVX\d]"              # Article I, Article 1
+    r"|SCHEDULE\s+[A-Z\d]"             # SCHEDULE A, SCHEDULE 1
+    r"|Exhibit\s+[A-Z\d]"              # Exhibit A, Exhibit 1
+    r"|RECITALS?"                       # RECITAL or RECITALS
+    r"|WITNESSETH"                      # WITNESSETH
+    r"|[A-Z][A-Z\s]{3,}:"              # ALL CAPS HEADING:
+    r"|[A-Z][A-Z\s]{3,}\.(?=\s)"       # ALL CAPS HEADING. (followed by space)
+)
+
+# The line's first word, when it is a sub-clause marker followed by whitespace
+_SUBCLAUSE_MARKER = re.compile(
+    r"[^\S\n]*("
+    r"\d+\.\d+[\.\)]*"           # 3.1, 3.1., 3.1)
+    r"|\([a-z]\)"                 # (a), (b)
+    r"|\([ivxlc]+\)"             # (i), (ii), (iv)
+    r"|\([A-Z]\)"                 # (A), (B)
+    r"|[a-z][\.\)]"              # a., b)
+    r"|\d+\.\d+\.\d+[\.\)]*"    # 3.1.1, 3.1.1.
+    r")(?=\s)"
+)
+
+_NUMBER_ONLY = re.compile(r"^\d+[\.\d]*[\.\)]*$")
+_FALLBACK_HEADING = re.compile(r"(?:^|\n)([A-Z][A-Za-z\s]{2,60}(?:[:.])\s*\n)")
+_NON_SPACE = re.compile(r"\S")
+
+
+class SubClause(NamedTuple):
+    """A sub-clause span (stripped, capped) within the lexed text."""
+
+    heading: str
+    start: int
+    end: int
+    index: int  # Position among the section's markers (short, skipped ones count)
+
+
+class Section(NamedTuple):
+    """A top-level clause span (stripped, capped) and its sub-clause split."""
+
+    heading: str
+    start: int
+    end: int
+    preamble: tuple[int, int] | None  # Text before the first sub-clause, if kept
+    subclauses: tuple[SubClause, ...] | None  # None: fewer than 2 markers, not split
+
+
+class _Markers(NamedTuple):
+    headings: list[int]  # Line starts with a heading marker
+    starts: list[int]  # Sub-clause marker starts
+    ends: list[int]  # ... and the offset just past each marker
+
+
+def _scan(text: str, start: int = 0, end: int | None = None) -> _Markers:
+    """Tokenize heading and sub-clause markers at every line start, in one pass.
+
+    Scans text[start:end] as if it were the whole string (start counts as a
+    line start).
+    """
+    end = len(text) if end is None else end
+    markers = _Markers([], [], [])
+    pos = start
+    while True:
+        if _HEADING_MARKER.match(text, pos, end):
+            markers.headings.append(pos)
+        sub = _SUBCLAUSE_MARKER.match(text, pos, end)
+        if sub:
+            markers.starts.append(sub.start(1))
+            markers.ends.append(sub.end(1))
+        newline = text.find("\n", pos, end)
+        if newline < 0:
+            return markers
+        pos = newline + 1
+
+
+def _strip(text: str, start: int, end: int) -> tuple[int, int]:
+    """Offsets of text[start:end].strip() within text."""
+    first = _NON_SPACE.search(text, start, end)
+    if first is None:
+        return start, start
+    start = first.start()
+    while text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _capped(start: int, end: int) -> tuple[int, int]:
+    return start, min(end, start + MAX_CLAUSE_CHARS)
+
+
+def _first_line(text: str, start: int, end: int) -> tuple[str, int]:
+    """First line of text[start:end], stripped, and the offset after its newline."""
+    newline = text.find("\n", start, end)
+    if newline < 0:
+        return text[start:end].strip(), -1
+    return text[start:newline].strip(), newline + 1
+
+
+def _section_heading(text: str, start: int, end: int) -> str:
+    """Heading from the first line; a bare number ("1.2") takes the next line too."""
+    heading, rest = _first_line(text, start, end)
+    heading = heading[:MAX_HEADING_CHARS]
+    if rest >= 0 and _NUMBER_ONLY.match(heading):
+        next_line = _first_line(text, rest, end)[0][:80]
+        heading = f"{heading} {next_line}"[:MAX_HEADING_CHARS]
+    return heading
+
+
+def _split_subclauses(
+    text: str, markers: _Markers, start: int, end: int
+) -> tuple[tuple[int, int] | None, tuple[SubClause, ...] | None]:
+    """Preamble and sub-clauses of text[start:end], from the scanned markers."""
+    lo = bisect.bisect_left(markers.starts, start)
+    hi = bisect.bisect_left(markers.starts, end)
+    # A marker needs its trailing whitespace inside the span
+    cuts = [markers.starts[i] for i in range(lo, hi) if markers.ends[i] < end]
+    if len(cuts) < 2:
+        return None, None
+
+    preamble = _strip(text, start, cuts[0])
+    if preamble[1] - preamble[0] <= MIN_PREAMBLE_CHARS:
+        preamble = None
+    else:
+        preamble = _capped(*preamble)
+
+    subclauses = []
+    for i, cut in enumerate(cuts):
+        sub_start, sub_end = _strip(text, cut, cuts[i + 1] if i + 1 < len(cuts) else end)
+        if sub_end - sub_start < MIN_SUBCLAUSE_CHARS:
+            continue
+        heading = _first_line(text, sub_start, sub_end)[0][:MAX_HEADING_CHARS]
+        subclauses.append(SubClause(heading, *_capped(sub_start, sub_end), i))
+    return preamble, tuple(subclauses)
+
+
+def _heading_fallback(text: str) -> list[tuple[str, int, int]]:
+    """Sections under title-case lines ending in ":" or "." (no numbered headings)."""
+    spans = []
+    matches = list(_FALLBACK_HEADING.finditer(text))
+    for i, match in enumerate(matches):
+        body_end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        start, end = _strip(text, match.end(), body_end)
+        if end - start < MIN_SECTION_CHARS:
+            continue
+        heading = match.group(1).strip().rstrip(":.")[:MAX_HEADING_CHARS]
+        spans.append((heading, *_capped(start, end)))
+    return spans
+
+
+def _paragraph_fallback(text: str) -> list[tuple[str, int, int]]:
+    """Blank-line separated paragraphs, numbered "Section N"."""
+    spans = []
+    pos = 0
+    i = 0
+    while True:
+        brk = text.find("\n\n", pos)
+        start, end = _strip(text, pos, len(text) if brk < 0 else brk)
+        if end - start >= MIN_SECTION_CHARS:
+            spans.append((f"Section {i + 1}", *_capped(start, end)))
+        if brk < 0:
+            return spans
+        pos = brk + 2
+        i += 1
+
+
+def lex_sections(text: str) -> list[Section]:
+    """Split a contract into top-level sections with their sub-clause split.
+
+    Args:
+        text: The full contract text.
+
+    Returns:
+        Sections in document order. All offsets index into text.
+    """
+    markers = _scan(text)
+    spans = []
+    bounds = [0, *(pos for pos in markers.headings if pos)]
+    for i, bound in enumerate(bounds):
+        start, end = _strip(text, bound, bounds[i + 1] if i + 1 < len(bounds) else len(text))
+        if end - start < MIN_SECTION_CHARS:
+            continue
+        spans.append((_section_heading(text, start, end), *_capped(start, end)))
+
+    if not spans:
+        spans = _heading_fallback(text)
+    if not spans:
+        spans = _paragraph_fallback(text)
+
+    return [
+        Section(heading, start, end, *_split_subclauses(text, markers, start, end))
+        for heading, start, end in spans
+    ]
+
+
+def lex_subclauses(
+    text: str, heading: str, start: int = 0, end: int | None = None
+) -> Section:
+    """Sub-clause split of a single clause (e.g. one returned by K2).
+
+    Args:
+        text: The buffer holding the clause.
+        heading: The clause heading.
+        start: Offset of the clause in text.
+        end: End offset of the clause (default: end of text).
+
+    Returns:
+        A Section spanning text[start:end].
+    """
+    end = len(text) if end is None else end
+    markers = _scan(text, start, end)
+    return Section(heading, start, end, *_split_subclauses(text, markers, start, end))
@@ -1,34 +1,146 @@
-"""Extract text from Word (.docx) documents."""
+"""Extract text from Word (.docx) documents.
+
+The main document part (word/document.xml) is read straight from the zip with
+an incremental XML parser: paragraphs and table rows are emitted in document
+order (terms that live in tables stay next to the clauses around them), and
+each element is discarded once handled, so memory is bounded by the element
+being read rather than the whole document.
+"""
 
 import io
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+from collections.abc import Iterator
+from pathlib import Path
+from typing import NamedTuple
 
-from docx import Document
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+_OFFICE_DOCUMENT_REL = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+_RELS_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+DEFAULT_DOCUMENT_PART = "word/document.xml"
+BLOCK_SEPARATOR = "\n\n"
 
+# Run content that stands for a character (w:t carries the text itself)
+_RUN_CHARS = {W + "tab": "\t", W + "br": "\n", W + "cr": "\n", W + "noBreakHyphen": "-"}
+# Subtrees whose text is not part of the body flow: text boxes (anchored
+# shapes) and the legacy copy of an mc:AlternateContent choice
+_SKIPPED = {W + "txbxContent", MC + "Fallback"}
+
+
+class DocxBlock(NamedTuple):
+    """One paragraph or table row, with its span in extract_docx_text()."""
+
+    kind: str  # "paragraph" or "table_row"
+    text: str
+    start: int
+    end: int
 
-def extract_docx_text(file_bytes: bytes) -> str:
-    """Extract all text from a .docx file.
 
-    Extracts text from paragraphs and tables (contracts often have terms in tables).
+def _document_part(archive: zipfile.ZipFile) -> str:
+    """Name of the main document part, per the package relationships."""
+    try:
+        rels = ET.fromstring(archive.read("_rels/.rels"))
+    except (KeyError, ET.ParseError):
+        return DEFAULT_DOCUMENT_PART
+    for rel in rels.iter(_RELS_NS + "Relationship"):
+        if rel.get("Type") == _OFFICE_DOCUMENT_REL:
+            return posixpath.normpath(rel.get("Target", DEFAULT_DOCUMENT_PART).lstrip("/"))
+    return DEFAULT_DOCUMENT_PART
+
+
+def iter_docx_blocks(source: bytes | str | Path) -> Iterator[DocxBlock]:
+    """Stream the non-empty paragraphs and table rows of a .docx file.
+
+    A table row's text is its non-empty cells joined by " | " (each cell's
+    paragraphs joined by newlines). Rows of a nested table are emitted
+    before the row that contains them.
 
     Args:
-        file_bytes: Raw .docx file bytes.
+        source: Path to a .docx file, or its raw bytes.
 
-    Returns:
-        Full extracted text with section breaks.
+    Yields:
+        DocxBlock in document order. start/end are character offsets into
+        the text returned by extract_docx_text().
     """
-    doc = Document(io.BytesIO(file_bytes))
+    archive = zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source)
+    with archive, archive.open(_document_part(archive)) as xml:
+        stack: list[ET.Element] = []
+        paragraphs: list[list[str]] = []  # text buffers of open w:p elements
+        rows: list[list[str]] = []  # cell texts of open w:tr elements
+        cells: list[list[str]] = []  # paragraph texts of open w:tc elements
+        skip_depth = 0
+        offset = 0
 
-    parts: list[str] = []
+        for event, elem in ET.iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                stack.append(elem)
+                if tag in _SKIPPED:
+                    skip_depth += 1
+                elif skip_depth:
+                    pass
+                elif tag == W + "p":
+                    paragraphs.append([])
+                elif tag == W + "tr":
+                    rows.append([])
+                elif tag == W + "tc":
+                    cells.append([])
+                continue
 
-    for para in doc.paragraphs:
-        text = para.text.strip()
-        if text:
-            parts.append(text)
+            stack.pop()
+            block: DocxBlock | None = None
+            if tag in _SKIPPED:
+                skip_depth -= 1
+            elif skip_depth:
+                pass
+            elif tag == W + "t":
+                if paragraphs and elem.text:
+                    paragraphs[-1].append(elem.text)
+            elif tag in _RUN_CHARS:
+                # w:tab also defines tab stops inside w:pPr — only runs count
+                if paragraphs and stack and stack[-1].tag == W + "r":
+                    paragraphs[-1].append(_RUN_CHARS[tag])
+            elif tag == W + "p":
+                text = "".join(paragraphs.pop())
+                if cells:
+                    cells[-1].append(text)
+                elif text.strip():
+                    block = DocxBlock("paragraph", text.strip(), offset, 0)
+            elif tag == W + "tc":
+                text = "\n".join(cells.pop()).strip()
+                if text and rows:
+                    rows[-1].append(text)
+            elif tag == W + "tr":
+                row_cells = rows.pop()
+                if row_cells:
+                    block = DocxBlock("table_row", " | ".join(row_cells), offset, 0)
 
-    for table in doc.tables:
-        for row in table.rows:
-            row_text = " | ".join(cell.text.strip() for cell in row.cells if cell.text.strip())
-            if row_text:
-                parts.append(row_text)
+            # Drop the handled element; the open parent then holds at most
+            # one finished child at a time
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
 
-    return "\n\n".join(parts)
+            if block is not None:
+                end = offset + len(block.text)
+                yield block._replace(end=end)
+                offset = end + len(BLOCK_SEPARATOR)
+
+
+def extract_docx_text(source: bytes | str | Path) -> str:
+    """Extract all text from a .docx file.
+
+    Extracts text from paragraphs and tables (contracts often have terms in
+    tables), in document order.
+
+    Args:
+        source: Path to a .docx file, or its raw bytes.
+
+    Returns:
+        Full extracted text with section breaks.
+    """
+    return BLOCK_SEPARATOR.join(block.text for block in iter_docx_blocks(source))
@@ -6,12 +6,16 @@ Called TWICE in the pipeline:
   - Step 9: Enrichment with all gathered context (Brave, Exa, context7, RAG)
 """
 
-import os
 import json
+import os
+import time
+from collections.abc import Callable
 from pathlib import Path
 
-from openai import AsyncOpenAI
 from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+from model_router import MODEL_STATS, STRONG_TIER, route_model, strong_model
 
 load_dotenv(Path(__file__).parent / ".env")
 
@@ -83,19 +87,103 @@ CONTRACT_TYPE_FOCUS = {
 }
 
 
+VALID_RISK_LEVELS = {"high", "medium", "low"}
+VALID_RISK_CATEGORIES = {"financial", "compliance", "operational", "reputational"}
+
+
+def strip_code_fences(content: str) -> str:
+    """Strip markdown code fences (```json ... ```) from an LLM response."""
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0]
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0]
+    return content.strip()
+
+
+async def routed_completion(
+    task: str,
+    messages: list[dict],
+    max_tokens: int,
+    validate: Callable[[str], bool],
+    importance: float = 1.0,
+    text_len: int = 0,
+    contract_type: str = "",
+) -> str:
+    """Run a chat completion on the model picked by the routing table.
+
+    If a non-strong model's answer fails validate(), the call is repeated on
+    the strong model (K2). The strong model's answer is returned as-is for the
+    caller's own fallback handling.
+
+    Returns:
+        Raw response content.
+    """
+    tier, model = route_model(task, importance, text_len, contract_type)
+
+    async def _call(model_id: str) -> str:
+        t0 = time.time()
+        try:
+            response = await k2.chat.completions.create(
+                model=model_id,
+                messages=messages,
+                max_tokens=max_tokens,
+            )
+        except Exception:
+            MODEL_STATS.record_failure(model_id, time.time() - t0)
+            raise
+        MODEL_STATS.record_call(model_id, time.time() - t0, getattr(response, "usage", None))
+        return response.choices[0].message.content or ""
+
+    if tier == STRONG_TIER:
+        return await _call(model)
+
+    try:
+        content = await _call(model)
+        if validate(content):
+            return content
+        print(f"  {task}: {model} answer failed validation, escalating")
+    except Exception as e:
+        print(f"  {task}: {model} failed ({e}), escalating")
+    MODEL_STATS.record_escalation(model)
+    return await _call(strong_model())
+
+
+def _parse_clause_analysis(content: str) -> dict | None:
+    """Parse a clause-analysis JSON response; None if it is not valid."""
+    try:
+        result = json.loads(strip_code_fences(content))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(result, dict):
+        return None
+    if str(result.get("riskLevel", "")).lower() not in VALID_RISK_LEVELS:
+        return None
+    if str(result.get("riskCategory", "")).lower() not in VALID_RISK_CATEGORIES:
+        return None
+    if not result.get("explanation"):
+        return None
+    return result
+
+
 async def analyze_clause_risk(
     clause_text: str,
     clause_type: str,
     contract_type: str,
     additional_context: str = "",
+    importance: float = 1.0,
 ) -> dict:
     """Analyze a single clause using K2 Think for deep reasoning.
 
+    The model is picked by model_router from the clause importance, length and
+    contract type; answers from the fast model that fail validation are
+    escalated to K2.
+
     Args:
         clause_text: The raw clause text.
         clause_type: Type of clause (e.g., "non-compete").
         contract_type: Type of contract (e.g., "NDA", "lease").
         additional_context: Extra context from research (Brave, Exa, RAG, context7).
+        importance: Clause importance weight (clause_keywords.clause_importance_weight).
 
     Returns:
         Dict with riskLevel, riskCategory, explanation, concern, suggestion, reasoning.
@@ -130,25 +218,24 @@ Respond in this exact JSON format:
     if type_focus:
         system += f"\n\n{type_focus}"
 
-    response = await k2.chat.completions.create(
-        model="kimi-k2-instruct",
+    content = await routed_completion(
+        "clause_analysis",
         messages=[
             {"role": "system", "content": system},
             {"role": "user", "content": user_prompt},
         ],
         max_tokens=1024,
+        validate=lambda c: _parse_clause_analysis(c) is not None,
+        importance=importance,
+        text_len=len(clause_text),
+        contract_type=contract_type,
     )
-
-    content = response.choices[0].message.content or "{}"
-
-    # Parse JSON from response (handle markdown code blocks)
-    if "```json" in content:
-        content = content.split("```json")[1].split("```")[0]
-    elif "```" in content:
-        content = content.split("```")[1].split("```")[0]
+    content = strip_code_fences(content or "{}")
 
     try:
-        result = json.loads(content.strip())
+        result = json.loads(content)
+        if not isinstance(result, dict):
+            raise json.JSONDecodeError("Expected a JSON object", content, 0)
     except json.JSONDecodeError:
         return {
             "riskLevel": "medium",
@@ -157,20 +244,18 @@ Respond in this exact JSON format:
             "concern": "Could not parse structured analysis",
             "suggestion": "Manual review recommended",
             "reasoning": content,
+            "failed": True,
         }
 
     # Validate and normalize required fields
-    valid_risk_levels = {"high", "medium", "low"}
-    valid_categories = {"financial", "compliance", "operational", "reputational"}
-
     risk_level = str(result.get("riskLevel", "")).lower()
-    if risk_level not in valid_risk_levels:
+    if risk_level not in VALID_RISK_LEVELS:
         result["riskLevel"] = "medium"
     else:
         result["riskLevel"] = risk_level
 
     risk_category = str(result.get("riskCategory", "")).lower()
-    if risk_category not in valid_categories:
+    if risk_category not in VALID_RISK_CATEGORIES:
         result["riskCategory"] = "operational"
     else:
         result["riskCategory"] = risk_category
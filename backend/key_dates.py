@@ -0,0 +1,189 @@
+"""Key-date and deadline extraction over the whole contract in one pass.
+
+Precompiled patterns find, left to right in a single linear scan:
+  - absolute dates: "January 1, 2025", "01/01/2025", "2025-01-01"
+  - relative terms: a duration ("30 days", "thirty (30) days", "12 months")
+    with a deadline qualifier ("within", "no later than", "at least"), a
+    notice requirement ("30 days' written notice") and/or an anchor event
+    ("after the Effective Date", "prior to the expiration of the Term")
+Each hit keeps its character offsets in the text, so it maps back to the
+clause spans cut from the same document buffer (clause.Clause).
+"""
+
+import re
+from collections.abc import Iterator
+from typing import NamedTuple
+
+MAX_KEY_DATES = 15
+CONTEXT_CHARS = 100  # Each side of a hit, for classifying it
+LABEL_LOOKBACK_CHARS = 60
+MAX_LABEL_CHARS = 120
+# A relative term starts at most this far before its unit word ("no later
+# than twenty-seven (27) business days")
+MAX_LEAD_CHARS = 60
+MAX_TAIL_CHARS = 180  # ... and ends at most this far after it
+
+_MONTH = (
+    r"(?:January|February|March|April|May|June|July|August|September|"
+    r"October|November|December)"
+)
+_UNIT = r"(?:days?|weeks?|months?|years?)"
+_NUMBER_WORD = (
+    r"(?:(?:twenty|thirty|forty|fifty|sixty|seventy|eighty|ninety)"
+    r"(?:[- ](?:one|two|three|four|five|six|seven|eight|nine))?"
+    r"|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen"
+    r"|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|hundred)"
+)
+_ANCHOR = (
+    r"(?:effective|commencement|start|closing|invoice)\s+date|closing|execution|signing"
+    r"|termination|expiration|expiry|receipt|delivery|acceptance|completion|invoice|notice"
+    r"|end\s+of\s+(?:the\s+)?(?:(?:initial|renewal|then[- ]current)\s+)?term"
+    r"|(?:(?:initial|renewal|then[- ]current)\s+)?term"
+)
+
+# The lookaheads on the first character spare the regex engine from trying
+# every alternative at every position it searches
+_QUALIFIER = (
+    r"(?=[wna])\b(?:within|no\s+later\s+than|not\s+later\s+than|at\s+least"
+    r"|not\s+less\s+than|no\s+less\s+than)\s+"
+)
+_NUMBER = (
+    r"(?:(?=[\d(])(?:\(\d{1,4}\)|\b\d{1,4})"
+    rf"|(?=[a-z])\b{_NUMBER_WORD}(?:\s*\(\d{{1,4}}\))?)"
+)
+_UNIT_PREFIX = r"\s+(?:(?:business|calendar)\s+)?"  # Between the number and the unit
+
+# The linear pass: absolute dates ("January 1, 2025", "01/01/2025",
+# "2025-01-01"; month names case-sensitive) and the duration unit words
+# every relative term contains
+_SCAN = re.compile(
+    r"(?P<absolute>"
+    rf"{_MONTH}\s+\d{{1,2}},?\s+\d{{4}}"
+    r"|\d{1,2}/\d{1,2}/\d{2,4}"
+    r"|\d{4}-\d{2}-\d{2}"
+    r")"
+    rf"|(?i:\b{_UNIT}\b)"
+)
+
+# A relative term around a unit word: "within 90 days after the Effective
+# Date", "thirty (30) days' prior written notice", "at least 10 business days"
+RELATIVE_TERM_PATTERN = re.compile(
+    r"(?i:"
+    rf"(?P<qualifier>{_QUALIFIER})?"
+    rf"{_NUMBER}{_UNIT_PREFIX}{_UNIT}\b"
+    r"(?P<notice>['’]?s?\s*(?:(?:prior|advance)\s+)?(?:written\s+)?notice)?"
+    r"(?P<anchor>\s+(?:after|following|from|before|prior\s+to|preceding|of)"
+    rf"\s+(?:the\s+)?(?:date\s+of\s+(?:the\s+)?)?(?:{_ANCHOR})\b)?"
+    r")"
+)
+# The part of a relative term before its unit word, searched for up to it
+_TERM_LEAD = re.compile(rf"(?i:(?:{_QUALIFIER})?{_NUMBER}{_UNIT_PREFIX})\Z")
+_SENTENCE_BREAK = re.compile(r"[.;]")
+
+# Output order when more than MAX_KEY_DATES are found: these types first
+_TYPE_PRIORITY = {"termination": 0, "renewal": 1, "deadline": 2, "milestone": 3}
+
+
+class KeyDate(NamedTuple):
+    """A date or deadline found at text[start:end]."""
+
+    date: str
+    label: str
+    type: str  # termination | renewal | deadline | milestone
+    start: int
+    end: int
+
+    def to_dict(self) -> dict:
+        return {"date": self.date, "label": self.label, "type": self.type}
+
+
+def _classify(context: str) -> str:
+    ctx_lower = context.lower()
+    if any(w in ctx_lower for w in ["terminat", "expir", "end date"]):
+        return "termination"
+    if any(w in ctx_lower for w in ["renew", "extend", "auto-renew"]):
+        return "renewal"
+    if any(w in ctx_lower for w in ["deadline", "due", "by", "no later than"]):
+        return "deadline"
+    return "milestone"
+
+
+def _iter_matches(text: str) -> Iterator[re.Match]:
+    """Absolute-date and relative-term matches, non-overlapping, in text order.
+
+    A relative term's qualifier and number lie between the previous unit
+    word and its own (only whitespace and "business"/"calendar" separate
+    the number from the unit), so each unit word searches just the text
+    since the previous one: no stretch of text is searched twice, however
+    dense the unit words.
+    """
+    pos = 0  # End of the previous match
+    searched = 0  # End of the previous unit word
+    for hit in _SCAN.finditer(text):
+        at = hit.start()
+        if at < pos:
+            continue  # Inside the previous match
+        if hit.group("absolute") is not None:
+            yield hit
+            pos = hit.end()
+            continue
+
+        start = max(pos, searched, at - MAX_LEAD_CHARS)
+        while start > max(pos, searched) and text[start - 1].isalnum():
+            start -= 1  # Never start mid-word: \b sees the window start as text start
+        searched = hit.end()
+        lead = _TERM_LEAD.search(text, start, at)
+        if lead is None:
+            continue
+        match = RELATIVE_TERM_PATTERN.match(text, lead.start(), hit.end() + MAX_TAIL_CHARS)
+        if match is not None:
+            yield match
+            pos = match.end()
+
+
+def iter_key_dates(text: str) -> Iterator[KeyDate]:
+    """Yield every absolute date and qualified relative term, in text order.
+
+    Relative durations count only with a qualifier, notice or anchor event
+    ("10 days" alone is not a deadline).
+    """
+    for match in _iter_matches(text):
+        absolute = match.re is _SCAN
+        if not absolute and not (
+            match.group("qualifier") or match.group("notice") or match.group("anchor")
+        ):
+            continue
+        start, end = match.span()
+        context = text[max(0, start - CONTEXT_CHARS):end + CONTEXT_CHARS]
+        context = context.replace("\n", " ").strip()
+
+        # Label: the sentence fragment leading up to (and containing) the hit
+        label_text = text[max(0, start - LABEL_LOOKBACK_CHARS):end].replace("\n", " ").strip()
+        label = _SENTENCE_BREAK.split(label_text)[-1].strip()[:MAX_LABEL_CHARS]
+
+        date = match.group() if absolute else " ".join(match.group().split())
+        yield KeyDate(date, label, _classify(context), start, end)
+
+
+def extract_key_dates(text: str, limit: int = MAX_KEY_DATES) -> list[KeyDate]:
+    """Key dates of a whole contract, deduplicated by date string.
+
+    Args:
+        text: The full contract text.
+        limit: Maximum number of dates returned. When more are found,
+            termination, renewal and deadline dates are kept before
+            milestones.
+
+    Returns:
+        KeyDate list in text order.
+    """
+    seen = set()
+    unique = []
+    for key_date in iter_key_dates(text):
+        if key_date.date not in seen:
+            seen.add(key_date.date)
+            unique.append(key_date)
+    if len(unique) <= limit:
+        return unique
+    kept = sorted(unique, key=lambda d: (_TYPE_PRIORITY[d.type], d.start))[:limit]
+    return sorted(kept, key=lambda d: d.start)
@@ -0,0 +1,62 @@
+"""Keyword occurrence lookups shared across the checks that ask about a text.
+
+KeywordSet holds a fixed keyword set; hits(text) returns a KeywordHits that
+answers the str.count() and `in` questions the callers ask, keyword by
+keyword. Each keyword is scanned only when first asked about, with str.count()
+or `in`, and remembered, so checks sharing one KeywordHits (classification,
+risk categorization, importance weighting) never scan the same keyword in the
+same text twice. Rule lists that stop at the first hit, as they do on short
+clause texts, stop scanning there too.
+
+str.count() and `in` are C substring searches. Over a whole contract they
+are faster than a single Python-level multi-keyword pass (an Aho-Corasick
+automaton, or one regex alternation) that visits every match.
+"""
+
+from collections.abc import Iterable
+
+
+class KeywordHits:
+    """Occurrences of the keywords of a KeywordSet in one text, found on demand."""
+
+    __slots__ = ("_counts", "_index", "_text")
+
+    def __init__(self, index: dict[str, int], text: str):
+        self._index = index
+        self._text = text
+        self._counts: list[int | None] = [None] * len(index)
+
+    def count(self, keyword: str) -> int:
+        """Non-overlapping occurrences, as text.count(keyword) would return."""
+        i = self._index[keyword]
+        count = self._counts[i]
+        if count is None:
+            count = self._counts[i] = self._text.count(keyword)
+        return count
+
+    def __contains__(self, keyword: str) -> bool:
+        count = self._counts[self._index[keyword]]
+        return count > 0 if count is not None else keyword in self._text
+
+    def any(self, keywords: Iterable[str]) -> bool:
+        """Whether any of the keywords occurs."""
+        return any(keyword in self for keyword in keywords)
+
+    def first(self, keywords: Iterable[str]) -> str | None:
+        """The first of the keywords (in the given order) that occurs."""
+        for keyword in keywords:
+            if keyword in self:
+                return keyword
+        return None
+
+
+class KeywordSet:
+    """A fixed keyword set; only its keywords can be looked up in hits."""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: tuple[str, ...] = tuple(dict.fromkeys(keywords))
+        self._index = {keyword: i for i, keyword in enumerate(self.keywords)}
+
+    def hits(self, text: str) -> KeywordHits:
+        """Keyword lookups in text (case-sensitive)."""
+        return KeywordHits(self._index, text)
@@ -0,0 +1,188 @@
+"""Precomputed legal context per CUAD clause type.
+
+Maps a clause (heading + text) to one of the clause types curated in
+seed_vultr_rag.LEGAL_REFERENCES using a word-level keyword trie, and returns
+that type's reference bundle directly — no network call. Clauses that do not
+map confidently return None so the caller can fall back to remote Vultr RAG.
+"""
+
+import re
+
+from seed_vultr_rag import LEGAL_REFERENCES
+
+# Keyword phrases per clause type (must match the "Clause Type:" line of a
+# LEGAL_REFERENCES entry). Phrases are matched on whole lowercase words.
+CLAUSE_TYPE_KEYWORDS: dict[str, list[str]] = {
+    "Non-Compete": ["non-compete", "noncompete", "non competition", "covenant not to compete",
+                    "restrictive covenant", "shall not compete"],
+    "Non-Solicitation": ["non-solicitation", "nonsolicitation", "non-solicit", "no solicitation",
+                         "shall not solicit", "no-hire", "no hire"],
+    "Termination": ["termination", "terminate", "terminated", "term and termination",
+                    "termination for cause", "termination for convenience"],
+    "Indemnification": ["indemnification", "indemnity", "indemnify", "hold harmless",
+                        "defend and indemnify"],
+    "Limitation of Liability": ["limitation of liability", "limitations of liability",
+                                "consequential damages", "indirect damages",
+                                "exclusion of damages"],
+    "Confidentiality": ["confidentiality", "confidential information", "non-disclosure",
+                        "nondisclosure", "proprietary information"],
+    "Intellectual Property": ["intellectual property", "work made for hire", "work for hire",
+                              "ip assignment", "ownership of work product", "inventions"],
+    "Exclusivity": ["exclusivity", "exclusive dealing", "exclusive supplier", "exclusive provider"],
+    "Assignment": ["assignment", "assign", "anti-assignment", "may not assign"],
+    "Governing Law": ["governing law", "choice of law", "laws of the state", "jurisdiction",
+                      "venue"],
+    "Arbitration": ["arbitration", "arbitrator", "dispute resolution", "class action waiver",
+                    "mediation"],
+    "Warranty": ["warranty", "warranties", "warrants", "disclaimer of warranties", "as is"],
+    "Insurance": ["insurance", "insured", "coverage", "certificate of insurance"],
+    "Liquidated Damages": ["liquidated damages", "penalty", "penalties"],
+    "Force Majeure": ["force majeure", "act of god", "acts of god",
+                      "beyond its reasonable control"],
+    "Data Privacy / Data Protection": ["data privacy", "data protection", "personal data",
+                                       "personal information", "gdpr", "ccpa", "hipaa",
+                                       "data security", "privacy"],
+    "Renewal / Auto-Renewal": ["renewal", "auto-renewal", "automatic renewal",
+                               "automatically renew", "evergreen", "renewal term"],
+    "Non-Disparagement": ["non-disparagement", "nondisparagement", "disparage", "disparaging"],
+    "Cap on Liability": ["cap on liability", "liability cap", "aggregate liability",
+                         "total liability", "shall not exceed the fees"],
+    "Audit Rights": ["audit", "audit rights", "right to audit", "inspect the books",
+                     "books and records"],
+    "Revenue/Profit Sharing": ["revenue sharing", "revenue share", "profit sharing",
+                               "profit share", "royalty", "royalties"],
+    "Most Favored Nation (MFN)": ["most favored nation", "most favoured nation", "mfn",
+                                  "most favored customer"],
+    "Change of Control": ["change of control", "change in control", "merger or acquisition"],
+    "License Grant": ["license grant", "grant of license", "hereby grants", "licensed rights",
+                      "license"],
+    "Payment Terms": ["payment terms", "payment", "fees", "invoice", "invoices", "compensation",
+                      "late payment"],
+    "Right of First Refusal (ROFR)": ["right of first refusal", "rofr", "right of first offer",
+                                      "rofo", "first refusal"],
+    "Severability": ["severability", "severable", "invalid or unenforceable"],
+    "Entire Agreement / Integration Clause": ["entire agreement", "integration",
+                                              "supersedes all prior", "merger clause"],
+    "Waiver": ["waiver", "no waiver", "failure to enforce"],
+    "Notice": ["notice", "notices", "deemed delivered", "deemed given"],
+}
+
+HEADING_WEIGHT = 3  # A keyword in the heading is strong evidence on its own
+TEXT_WEIGHT = 1
+MAX_TEXT_HITS = 3  # Cap per type so one repeated word can't dominate
+MIN_SCORE = 2  # Heading hit, or two body hits
+TEXT_SCAN_CHARS = 1500
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text: str) -> list[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+class KeywordTrie:
+    """Word-level trie of keyword phrases → clause type."""
+
+    _END = "\0"
+
+    def __init__(self):
+        self.root: dict = {}
+        self.max_depth = 0
+
+    def add(self, phrase: str, clause_type: str) -> None:
+        words = _tokens(phrase)
+        if not words:
+            return
+        node = self.root
+        for word in words:
+            node = node.setdefault(word, {})
+        node.setdefault(self._END, []).append(clause_type)
+        self.max_depth = max(self.max_depth, len(words))
+
+    def matches(self, words: list[str]) -> list[tuple[str, int]]:
+        """Return (clause_type, start_index) for every phrase occurrence."""
+        found = []
+        for start in range(len(words)):
+            node = self.root
+            for word in words[start:start + self.max_depth]:
+                node = node.get(word)
+                if node is None:
+                    break
+                for clause_type in node.get(self._END, ()):
+                    found.append((clause_type, start))
+        return found
+
+
+def _build_context_bundles() -> dict[str, str]:
+    bundles = {}
+    for item in LEGAL_REFERENCES:
+        content = item["content"]
+        first_line = content.split("\n", 1)[0]
+        if not first_line.startswith("Clause Type:"):
+            continue
+        clause_type = first_line.split(":", 1)[1].strip()
+        bundles[clause_type] = (
+            f"Reference standards ({item['description']}):\n{content}"
+        )
+    return bundles
+
+
+CONTEXT_BUNDLES = _build_context_bundles()
+
+_TRIE = KeywordTrie()
+for _clause_type, _phrases in CLAUSE_TYPE_KEYWORDS.items():
+    if _clause_type not in CONTEXT_BUNDLES:
+        continue
+    for _phrase in _phrases:
+        _TRIE.add(_phrase, _clause_type)
+
+
+def map_clause_type(clause_text: str, clause_heading: str) -> str | None:
+    """Map a clause to a CUAD clause type from LEGAL_REFERENCES.
+
+    Heading keywords weigh more than body keywords; the body is scanned only
+    up to TEXT_SCAN_CHARS. Ties go to the type whose keyword appeared first.
+
+    Args:
+        clause_text: The clause text.
+        clause_heading: The clause heading (e.g., "7. Indemnification").
+
+    Returns:
+        The clause type name, or None if no type scores at least MIN_SCORE.
+    """
+    scores: dict[str, int] = {}
+    first_seen: dict[str, int] = {}
+
+    for clause_type, start in _TRIE.matches(_tokens(clause_heading)):
+        scores[clause_type] = scores.get(clause_type, 0) + HEADING_WEIGHT
+        first_seen.setdefault(clause_type, start)
+
+    text_hits: dict[str, int] = {}
+    offset = 1000  # Body matches rank after heading matches on ties
+    for clause_type, start in _TRIE.matches(_tokens(clause_text[:TEXT_SCAN_CHARS])):
+        if text_hits.get(clause_type, 0) >= MAX_TEXT_HITS:
+            continue
+        text_hits[clause_type] = text_hits.get(clause_type, 0) + 1
+        scores[clause_type] = scores.get(clause_type, 0) + TEXT_WEIGHT
+        first_seen.setdefault(clause_type, offset + start)
+
+    if not scores:
+        return None
+    best = min(scores, key=lambda t: (-scores[t], first_seen[t]))
+    return best if scores[best] >= MIN_SCORE else None
+
+
+def lookup_legal_context(clause_text: str, clause_heading: str) -> str | None:
+    """Return the precomputed reference bundle for a clause, if it maps.
+
+    Args:
+        clause_text: The clause text.
+        clause_heading: The clause heading.
+
+    Returns:
+        Legal context string, or None for unmapped clauses (use remote RAG).
+    """
+    clause_type = map_clause_type(clause_text, clause_heading)
+    if clause_type is None:
+        return None
+    return CONTEXT_BUNDLES[clause_type]
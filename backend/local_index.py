@@ -0,0 +1,266 @@
+"""Offline legal retrieval index (BM25 + embeddings).
+
+A local alternative to the Vultr vector store: combines a BM25 inverted index
+with a memory-mapped float32 embedding matrix for top-k similarity, built from
+seed_vultr_rag.LEGAL_REFERENCES plus any documents added later. Embeddings use
+feature hashing of word unigrams and bigrams, so no model download or network
+access is needed (works air-gapped).
+
+On-disk layout (LEGAL_INDEX_DIR, default backend/legal_index/):
+  docs.jsonl      one {"id", "content", "description"} object per line
+  embeddings.f32  row-major float32 matrix, one EMBED_DIM row per document
+
+Adding documents is incremental: new embedding rows are appended, then
+docs.jsonl is replaced (temp file + os.replace) as the commit point. Rows
+past the committed documents (an add interrupted before its commit) are
+ignored on load and truncated by the next add.
+
+Usage:
+    python local_index.py                 # build from the seed corpus
+    python local_index.py extra.jsonl     # add documents ({"content", "description"} lines)
+    python local_index.py notes.txt       # add a plain-text document
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import re
+import sys
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+INDEX_DIR = Path(os.environ.get("LEGAL_INDEX_DIR", Path(__file__).parent / "legal_index"))
+EMBED_DIM = 1024
+BM25_K1 = 1.5
+BM25_B = 0.75
+HYBRID_ALPHA = 0.5  # Weight of BM25 vs. embedding similarity
+DEFAULT_TOP_K = 3
+QUERY_CHARS = 1500
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is",
+    "it", "its", "of", "on", "or", "shall", "that", "the", "this", "to", "was", "will", "with",
+    "any", "all", "such", "may", "not", "no", "other", "than", "which", "who",
+])
+
+
+def _tokenize(text: str) -> list[str]:
+    return [t for t in _WORD_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def embed_text(text: str) -> np.ndarray:
+    """Hash unigrams and bigrams into a signed, L2-normalized EMBED_DIM vector."""
+    vec = np.zeros(EMBED_DIM, dtype=np.float32)
+    tokens = _tokenize(text)
+    features = tokens + [f"{a} {b}" for a, b in itertools.pairwise(tokens)]
+    counts: dict[str, int] = {}
+    for feature in features:
+        counts[feature] = counts.get(feature, 0) + 1
+    for feature, count in counts.items():
+        h = zlib.crc32(feature.encode())
+        sign = 1.0 if h & 0x80000000 else -1.0
+        vec[h % EMBED_DIM] += sign * (1.0 + math.log(count))
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0 else vec
+
+
+class LocalLegalIndex:
+    """BM25 + embedding hybrid index over a small legal corpus."""
+
+    def __init__(self, index_dir: Path = INDEX_DIR):
+        self.index_dir = Path(index_dir)
+        self.docs_path = self.index_dir / "docs.jsonl"
+        self.emb_path = self.index_dir / "embeddings.f32"
+        self.docs: list[dict] = []
+        self._ids: set[str] = set()
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._doc_lens: list[int] = []
+        self._embeddings: np.ndarray | None = None
+        self._load()
+
+    # ── Loading / updating ──────────────────────────────────────────
+
+    def _load(self) -> None:
+        if not self.docs_path.exists():
+            return
+        with self.docs_path.open() as f:
+            for line in f:
+                if line.strip():
+                    self._index_doc(json.loads(line))
+        self._map_embeddings()
+
+    def _map_embeddings(self) -> None:
+        rows = len(self.docs)
+        if rows == 0 or not self.emb_path.exists():
+            self._embeddings = None
+            return
+        if self.emb_path.stat().st_size < rows * EMBED_DIM * 4:
+            raise RuntimeError(
+                f"{self.emb_path} does not match {self.docs_path} — rebuild the index"
+            )
+        self._embeddings = np.memmap(
+            self.emb_path, dtype=np.float32, mode="r", shape=(rows, EMBED_DIM)
+        )
+
+    def _index_doc(self, doc: dict) -> None:
+        idx = len(self.docs)
+        self.docs.append(doc)
+        self._ids.add(doc["id"])
+        tokens = _tokenize(doc["content"])
+        self._doc_lens.append(len(tokens))
+        tf: dict[str, int] = {}
+        for token in tokens:
+            tf[token] = tf.get(token, 0) + 1
+        for token, count in tf.items():
+            self._postings.setdefault(token, []).append((idx, count))
+
+    def add_documents(self, items: list[dict]) -> int:
+        """Append new documents to the index (deduplicated by content hash).
+
+        Args:
+            items: Dicts with 'content' and optional 'description'.
+
+        Returns:
+            Number of documents actually added.
+        """
+        new_docs = []
+        for item in items:
+            content = item.get("content", "").strip()
+            if not content:
+                continue
+            doc_id = hashlib.sha256(content.encode()).hexdigest()[:16]
+            if doc_id in self._ids:
+                continue
+            doc = {"id": doc_id, "content": content, "description": item.get("description", "")}
+            new_docs.append(doc)
+            self._ids.add(doc_id)
+
+        if not new_docs:
+            return 0
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        matrix = np.stack([embed_text(d["content"]) for d in new_docs]).astype(np.float32)
+        self._embeddings = None  # release the old mapping before appending
+        with self.emb_path.open("ab") as f:
+            f.truncate(len(self.docs) * EMBED_DIM * 4)  # Uncommitted rows of an interrupted add
+            f.write(matrix.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path = self.docs_path.with_suffix(".tmp")
+        with tmp_path.open("w") as f:
+            for doc in [*self.docs, *new_docs]:
+                f.write(json.dumps(doc) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.docs_path)
+        for doc in new_docs:
+            self._index_doc(doc)
+        self._map_embeddings()
+        return len(new_docs)
+
+    # ── Search ──────────────────────────────────────────────────────
+
+    def _bm25_scores(self, query_tokens: list[str]) -> np.ndarray:
+        n = len(self.docs)
+        scores = np.zeros(n, dtype=np.float32)
+        avg_len = (sum(self._doc_lens) / n) or 1.0
+        for token in set(query_tokens):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for idx, tf in postings:
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lens[idx] / avg_len)
+                scores[idx] += idf * tf * (BM25_K1 + 1) / norm
+        return scores
+
+    def search(self, query: str, k: int = DEFAULT_TOP_K) -> list[tuple[dict, float]]:
+        """Return the top-k (document, score) pairs for a query.
+
+        Scores blend max-normalized BM25 with cosine similarity of the hashed
+        embeddings (HYBRID_ALPHA).
+        """
+        if not self.docs:
+            return []
+        bm25 = self._bm25_scores(_tokenize(query))
+        if bm25.max() > 0:
+            bm25 /= bm25.max()
+        if self._embeddings is not None:
+            cosine = np.asarray(self._embeddings @ embed_text(query))
+            cosine = np.clip(cosine, 0.0, None)
+        else:
+            cosine = np.zeros_like(bm25)
+        scores = HYBRID_ALPHA * bm25 + (1 - HYBRID_ALPHA) * cosine
+
+        k = min(k, len(self.docs))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.docs[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+_index: LocalLegalIndex | None = None
+_index_lock = threading.Lock()  # Queries run in worker threads (vultr_rag)
+
+
+def get_local_index() -> LocalLegalIndex:
+    """Return the process-wide index, seeding it from LEGAL_REFERENCES if empty."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = LocalLegalIndex()
+            if not index.docs:
+                from seed_vultr_rag import LEGAL_REFERENCES
+
+                added = index.add_documents(LEGAL_REFERENCES)
+                print(f"Local legal index built with {added} seed documents at {index.index_dir}")
+            _index = index
+    return _index
+
+
+def query_local_knowledge(
+    clause_text: str, clause_type: str, contract_type: str = "General Contract"
+) -> str:
+    """Query the local index; same arguments and return type as
+    vultr_rag.query_legal_knowledge (minus the network call).
+
+    Args:
+        clause_text: The clause text to research.
+        clause_type: Type of clause (e.g., "non-compete").
+        contract_type: Type of contract (e.g., "NDA", "Lease Agreement").
+
+    Returns:
+        Legal context string built from the top-matching reference documents.
+    """
+    query = f"{clause_type} {contract_type}\n{clause_text[:QUERY_CHARS]}"
+    hits = get_local_index().search(query)
+    if not hits:
+        return "No matching legal references found in the local knowledge base."
+    return "\n\n".join(
+        f"Reference ({doc['description'] or doc['id']}):\n{doc['content']}"
+        for doc, _ in hits
+    )
+
+
+def _load_items(path: Path) -> list[dict]:
+    if path.suffix == ".jsonl":
+        with path.open() as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return [{"content": path.read_text(), "description": path.stem}]
+
+
+def main():
+    index = get_local_index()
+    for arg in sys.argv[1:]:
+        added = index.add_documents(_load_items(Path(arg)))
+        print(f"  {arg}: {added} new documents")
+    print(f"Local legal index: {len(index.docs)} documents at {index.index_dir}")
+
+
+if __name__ == "__main__":
+    main()
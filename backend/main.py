@@ -1,19 +1,34 @@
 import asyncio
 import os
+import uuid
 from pathlib import Path
 
-import fitz  # pymupdf
 from convex import ConvexClient
 from dotenv import load_dotenv
-from fastapi import BackgroundTasks, FastAPI, File, Form, UploadFile
+from fastapi import BackgroundTasks, FastAPI, File, Form, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import FileResponse, JSONResponse, Response
 
 from pydantic import BaseModel
 
 from agent import run_contract_analysis
 from chat import chat_about_clause
+from model_router import MODEL_STATS
+from ocr_engine import OCR_STATS
+from parsed_document import ParsedDocument, parse_document
+from profiles import AnalysisProfile, get_profile
 from report_generator import generate_pdf_report
+from revisions import is_review_id
+from uploads import (
+    DEFAULT_CHUNK_BYTES,
+    UploadError,
+    append_chunk,
+    create_upload,
+    finalize_upload,
+    get_upload,
+    parse_checksum,
+)
 
 # Load .env from the backend directory regardless of cwd
 load_dotenv(Path(__file__).parent / ".env")
@@ -22,6 +37,11 @@ load_dotenv(Path(__file__).parent / ".env")
 PDF_STORAGE_DIR = Path(__file__).parent / "pdf_storage"
 PDF_STORAGE_DIR.mkdir(exist_ok=True)
 
+# Uploads are streamed to disk in chunks and rejected once they pass the limit
+MAX_UPLOAD_BYTES = int(float(os.environ.get("MAX_UPLOAD_MB", "300")) * 1024 * 1024)
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+UPLOAD_TOO_LARGE_MESSAGE = f"File exceeds the {MAX_UPLOAD_BYTES / 1024 / 1024:g} MB upload limit."
+
 app = FastAPI(title="ContractPilot Backend")
 
 app.add_middleware(
@@ -36,43 +56,70 @@ app.add_middleware(
 convex = ConvexClient(os.environ.get("CONVEX_URL", ""))
 
 
-def extract_text(file_bytes: bytes, filename: str, use_ocr: bool) -> tuple[str, bool, list]:
-    """Extract text from a PDF or DOCX file. Returns (text, ocr_used, ocr_words).
-
-    For PDFs: uses PyMuPDF direct extraction, or Tesseract OCR if use_ocr is True.
-    For DOCX: uses python-docx (OCR is never needed).
-    ocr_words is a list of word dicts with positions (empty if OCR not used).
-    """
-    if filename.lower().endswith(".docx"):
-        from docx_extractor import extract_docx_text
-
-        return extract_docx_text(file_bytes), False, []
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Reject uploads whose declared size is over the limit before reading the body."""
+    declared = request.headers.get("content-length", "")
+    if (
+        request.method in ("POST", "PATCH", "PUT")
+        and declared.isdigit()
+        and int(declared) > MAX_UPLOAD_BYTES + UPLOAD_CHUNK_BYTES  # multipart overhead
+    ):
+        return JSONResponse(
+            {"error": UPLOAD_TOO_LARGE_MESSAGE},
+            status_code=413,
+        )
+    return await call_next(request)
 
-    # PDF path — use Tesseract if user toggled OCR on
-    if use_ocr:
-        from ocr import ocr_pdf_with_positions
 
-        text, words = ocr_pdf_with_positions(file_bytes)
-        return text, True, words
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
 
-    doc = fitz.open(stream=file_bytes, filetype="pdf")
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    doc.close()
 
-    return text, False, []
+async def _spool_upload(file: UploadFile) -> tuple[Path, int]:
+    """Stream an upload to a temp file in PDF_STORAGE_DIR.
 
+    The temp file lives next to its final location so it can be moved into
+    place with an atomic os.replace(). It is removed if the upload fails or
+    grows past MAX_UPLOAD_BYTES.
 
-async def _run_analysis(review_id: str, pdf_text: str, pdf_bytes: bytes, user_id: str, ocr_used: bool, ocr_words: list = None):
+    Returns:
+        Tuple of (temp_path, size_in_bytes).
+    """
+    tmp_path = PDF_STORAGE_DIR / f".upload-{uuid.uuid4().hex}.part"
+    size = 0
+    try:
+        with tmp_path.open("wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge(UPLOAD_TOO_LARGE_MESSAGE)
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return tmp_path, size
+
+
+async def _run_analysis(
+    review_id: str,
+    document: ParsedDocument,
+    user_id: str,
+    profile: AnalysisProfile | None = None,
+    parent_review_id: str | None = None,
+):
     """Background task: run the full agent analysis pipeline."""
+    profile = profile or get_profile(None)
     try:
         await asyncio.wait_for(
-            run_contract_analysis(review_id, pdf_text, user_id, ocr_used, pdf_bytes, ocr_words or []),
-            timeout=300.0,
+            run_contract_analysis(review_id, document, user_id, profile, parent_review_id),
+            timeout=profile.analysis_timeout,
         )
     except asyncio.TimeoutError:
-        print(f"Analysis timed out for {review_id} (5-minute cap)")
+        print(
+            f"Analysis timed out for {review_id} "
+            f"({profile.analysis_timeout:.0f}s cap, profile={profile.name})"
+        )
         try:
             convex.mutation("reviews:updateStatus", {"id": review_id, "status": "failed"})
         except Exception:
@@ -85,6 +132,8 @@ async def _run_analysis(review_id: str, pdf_text: str, pdf_bytes: bytes, user_id
             convex.mutation("reviews:updateStatus", {"id": review_id, "status": "failed"})
         except Exception:
             pass
+    finally:
+        document.close()
 
 
 @app.get("/health")
@@ -92,57 +141,233 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics/models")
+async def model_metrics():
+    """Per-model call counts, mean latency, token usage and estimated cost."""
+    return MODEL_STATS.snapshot()
+
+
+@app.get("/metrics/ocr")
+async def ocr_metrics():
+    """OCR engine backend, pages processed, timeouts and pages per second."""
+    return OCR_STATS.snapshot()
+
+
+def _start_analysis(
+    background_tasks: BackgroundTasks,
+    upload_path: Path,
+    filename: str,
+    user_id: str,
+    use_ocr: bool,
+    profile: AnalysisProfile,
+    parent_review_id: str | None = None,
+) -> dict:
+    """Parse a fully received upload, create its review and queue the analysis.
+
+    Shared by /analyze and /uploads/{id}/finalize, which call it through
+    run_in_threadpool: parsing (and OCR) blocks. parent_review_id names the
+    review of an earlier version whose unchanged clause analyses are reused.
+    On success the file is moved from upload_path into PDF_STORAGE_DIR (same
+    filesystem → atomic rename; the open document keeps reading the same
+    inode); otherwise it is left for the caller to delete.
+    """
+    # Parse once: text layer, page geometry, and OCR for pages that need it
+    # (every page when toggled on by the user)
+    document = parse_document(upload_path, filename, use_ocr)
+    ocr_used = document.ocr_used
+    print(
+        f"Extracted {len(document.text)} chars from {document.page_count} pages, "
+        f"ocr_used={ocr_used}, ocr_words={len(document.ocr_words)}"
+    )
+
+    try:
+        # Create review in Convex
+        try:
+            review_id = convex.mutation(
+                "reviews:create",
+                {"userId": user_id, "filename": filename},
+            )
+        except Exception:
+            # Convex not configured — return placeholder
+            document.close()
+            return {
+                "review_id": "demo", "status": "pending", "ocr_used": ocr_used,
+                "profile": profile.name,
+            }
+
+        # Store the file for the viewer
+        os.replace(upload_path, PDF_STORAGE_DIR / f"{review_id}.pdf")
+
+        # Run analysis in background
+        background_tasks.add_task(
+            _run_analysis, review_id, document, user_id, profile, parent_review_id,
+        )
+    except BaseException:
+        # Nothing will run the analysis: release the fitz/mmap handle now
+        document.close()
+        raise
+
+    return {
+        "review_id": review_id, "status": "pending", "ocr_used": ocr_used,
+        "profile": profile.name,
+    }
+
+
 @app.post("/analyze")
 async def analyze_contract(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     user_id: str = Form("dev-user"),
     use_ocr: str = Form("false"),
+    profile: str = Form("balanced"),
+    parent_review_id: str = Form(""),
 ):
-    """Upload a contract (PDF or DOCX) and start AI analysis."""
+    """Upload a contract (PDF or DOCX) and start AI analysis.
+
+    The optional `profile` form field selects the analysis depth:
+    "fast", "balanced" (default) or "thorough". The optional
+    `parent_review_id` marks the upload as a revision of that review: only
+    clauses whose text changed are analyzed again.
+
+    The upload is streamed to disk in UPLOAD_CHUNK_BYTES chunks (never held in
+    memory as a whole) and rejected with 413 past MAX_UPLOAD_BYTES.
+    """
+    tmp_path: Path | None = None
     try:
         filename = file.filename or "document"
         ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
         if ext not in ("pdf", "docx"):
-            from fastapi.responses import JSONResponse
-
             return JSONResponse(
                 {"error": "Unsupported file type. Upload a PDF or Word (.docx) file."},
                 status_code=400,
             )
 
-        file_bytes = await file.read()
-        print(f"Received file: {filename}, size: {len(file_bytes)} bytes")
+        try:
+            analysis_profile = get_profile(profile)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        if parent_review_id and not is_review_id(parent_review_id):
+            return JSONResponse({"error": "Invalid parent_review_id."}, status_code=400)
+
+        try:
+            tmp_path, size = await _spool_upload(file)
+        except UploadTooLarge as e:
+            return JSONResponse({"error": str(e)}, status_code=413)
+        print(f"Received file: {filename}, size: {size} bytes")
 
-        # Extract text (OCR only applies to PDFs when toggled on by user)
         ocr_flag = use_ocr.lower() in ("true", "1", "yes")
-        doc_text, ocr_used, ocr_words = extract_text(file_bytes, filename, ocr_flag)
-        print(f"Extracted {len(doc_text)} chars, ocr_used={ocr_used}, ocr_words={len(ocr_words)}")
+        return await run_in_threadpool(
+            _start_analysis, background_tasks, tmp_path, filename, user_id, ocr_flag,
+            analysis_profile, parent_review_id or None,
+        )
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse({"error": str(e)}, status_code=500)
+    finally:
+        if tmp_path is not None:  # moved into storage on success
+            tmp_path.unlink(missing_ok=True)
 
-        # Create review in Convex
-        try:
-            review_id = convex.mutation(
-                "reviews:create",
-                {"userId": user_id, "filename": filename},
-            )
-        except Exception:
-            # Convex not configured — return placeholder
-            return {"review_id": "demo", "status": "pending", "ocr_used": ocr_used}
 
-        # Store PDF for the viewer
-        pdf_path = PDF_STORAGE_DIR / f"{review_id}.pdf"
-        pdf_path.write_bytes(file_bytes)
+@app.post("/uploads")
+async def create_resumable_upload(
+    filename: str = Form(...),
+    size: int = Form(...),
+    sha256: str = Form(""),
+    user_id: str = Form("dev-user"),
+    use_ocr: str = Form("false"),
+    profile: str = Form("balanced"),
+    parent_review_id: str = Form(""),
+):
+    """Start a resumable upload for a large contract (see uploads.py).
+
+    Send the file with PATCH /uploads/{id} chunks, then POST
+    /uploads/{id}/finalize to start the analysis.
+    """
+    try:
+        get_profile(profile)
+        if parent_review_id and not is_review_id(parent_review_id):
+            raise ValueError("Invalid parent_review_id.")
+        session = create_upload(
+            filename, size, user_id, use_ocr.lower() in ("true", "1", "yes"), profile,
+            sha256, MAX_UPLOAD_BYTES, parent_review_id,
+        )
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except UploadError as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
+    return {
+        "upload_id": session.upload_id, "offset": 0, "size": session.size,
+        "chunk_size": DEFAULT_CHUNK_BYTES,
+    }
+
+
+@app.head("/uploads/{upload_id}")
+async def resumable_upload_offset(upload_id: str):
+    """Report how many bytes of an upload have been received (resume point)."""
+    try:
+        session = get_upload(upload_id)
+    except UploadError as e:
+        return Response(status_code=e.status_code)
+    return Response(
+        status_code=200,
+        headers={
+            "Upload-Offset": str(session.offset),
+            "Upload-Length": str(session.size),
+            "Cache-Control": "no-store",
+        },
+    )
+
 
-        # Run analysis in background
-        background_tasks.add_task(_run_analysis, review_id, doc_text, file_bytes, user_id, ocr_used, ocr_words)
+@app.patch("/uploads/{upload_id}")
+async def append_resumable_upload(upload_id: str, request: Request):
+    """Append one chunk at the Upload-Offset header.
 
-        return {"review_id": review_id, "status": "pending", "ocr_used": ocr_used}
+    An optional Upload-Checksum header ("sha256 <base64 digest>") is checked
+    before the chunk is kept; a mismatch discards it (status 460).
+    """
+    try:
+        session = get_upload(upload_id)
+        offset_header = request.headers.get("upload-offset", "")
+        if not offset_header.isdigit():
+            raise UploadError("Upload-Offset header is required.")
+        checksum_header = request.headers.get("upload-checksum")
+        checksum = parse_checksum(checksum_header) if checksum_header else None
+        offset = await append_chunk(session, int(offset_header), request.stream(), checksum)
+    except UploadError as e:
+        try:
+            current = get_upload(upload_id).offset if e.status_code != 404 else 0
+        except UploadError:  # Finalized or expired meanwhile
+            current = 0
+        return JSONResponse(
+            {"error": str(e), "offset": current},
+            status_code=e.status_code,
+            headers={"Upload-Offset": str(current)},
+        )
+    return Response(status_code=204, headers={"Upload-Offset": str(offset)})
+
+
+@app.post("/uploads/{upload_id}/finalize")
+async def finalize_resumable_upload(upload_id: str, background_tasks: BackgroundTasks):
+    """Verify a completed upload and start its analysis (same response as /analyze)."""
+    part_path: Path | None = None
+    try:
+        session = get_upload(upload_id)
+        part_path = await finalize_upload(session)
+        print(f"Finalized upload {upload_id}: {session.filename}, {session.size} bytes")
+        return await run_in_threadpool(
+            _start_analysis, background_tasks, part_path, session.filename, session.user_id,
+            session.use_ocr, get_profile(session.profile), session.parent_review_id or None,
+        )
+    except UploadError as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
     except Exception as e:
         import traceback
         traceback.print_exc()
-        from fastapi.responses import JSONResponse
-
         return JSONResponse({"error": str(e)}, status_code=500)
+    finally:
+        if part_path is not None:  # moved into storage on success
+            part_path.unlink(missing_ok=True)
 
 
 @app.get("/pdf/{review_id}")
@@ -151,8 +376,8 @@ async def get_pdf(review_id: str):
     pdf_path = PDF_STORAGE_DIR / f"{review_id}.pdf"
     if not pdf_path.exists():
         return Response(content=b"PDF not found", status_code=404)
-    return Response(
-        content=pdf_path.read_bytes(),
+    return FileResponse(
+        pdf_path,
         media_type="application/pdf",
         headers={"Content-Disposition": "inline; filename=contract.pdf"},
     )
@@ -0,0 +1,189 @@
+"""Model routing for Vultr inference calls.
+
+Picks a model per LLM call from the task, the clause's importance weight
+(clause_keywords.clause_importance_weight), the clause length and the
+contract type. Low-stakes clauses go to a cheap/fast model; critical ones to K2
+(kimi-k2-instruct). Callers escalate to the strong tier when the fast
+model's answer fails validation (see k2_client.routed_completion).
+
+The routing table can be replaced with a JSON file via MODEL_ROUTING_TABLE.
+Per-model latency, token usage and estimated cost are tracked in MODEL_STATS.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent / ".env")
+
+STRONG_TIER = "strong"
+
+# Rules are evaluated top to bottom; the first rule whose conditions all hold
+# wins. Supported conditions: task, min_importance, max_importance,
+# min_chars, max_chars, contract_types. Costs are USD per 1M tokens.
+DEFAULT_ROUTING_TABLE = {
+    "models": {
+        "fast": {
+            "model": os.environ.get("VULTR_FAST_MODEL", "llama-3.3-70b-instruct-fp8"),
+            "input_cost_per_m": 0.20,
+            "output_cost_per_m": 0.20,
+        },
+        STRONG_TIER: {
+            "model": "kimi-k2-instruct",
+            "input_cost_per_m": 0.60,
+            "output_cost_per_m": 2.50,
+        },
+    },
+    "rules": [
+        # Clause analysis: high-impact clause types always get K2
+        {"task": "clause_analysis", "min_importance": 1.2, "tier": STRONG_TIER},
+        # Long clauses carry more nuance than a small model reliably handles
+        {"task": "clause_analysis", "min_chars": 1500, "tier": STRONG_TIER},
+        # Ownership/transaction contracts: anything above baseline weight
+        {
+            "task": "clause_analysis",
+            "min_importance": 1.0,
+            "contract_types": ["Partnership Agreement", "Purchase Agreement"],
+            "tier": STRONG_TIER,
+        },
+        {"task": "clause_analysis", "tier": "fast"},
+        # Full-text clause extraction needs K2; TOC filtering is a cheap pass
+        {"task": "clause_extraction", "tier": STRONG_TIER},
+        {"task": "clause_filter", "tier": "fast"},
+    ],
+    "default_tier": STRONG_TIER,
+}
+
+
+def _load_routing_table() -> dict:
+    path = os.environ.get("MODEL_ROUTING_TABLE", "")
+    if not path:
+        return DEFAULT_ROUTING_TABLE
+    try:
+        table = json.loads(Path(path).read_text())
+        if STRONG_TIER not in table.get("models", {}):
+            raise ValueError(f"routing table must define a '{STRONG_TIER}' tier")
+        print(f"Model routing table loaded from {path}")
+        return table
+    except (OSError, ValueError) as e:
+        print(f"Warning: Failed to load MODEL_ROUTING_TABLE ({e}), using defaults")
+        return DEFAULT_ROUTING_TABLE
+
+
+ROUTING_TABLE = _load_routing_table()
+
+
+def _rule_matches(
+    rule: dict, task: str, importance: float, text_len: int, contract_type: str
+) -> bool:
+    if rule.get("task", task) != task:
+        return False
+    if importance < rule.get("min_importance", float("-inf")):
+        return False
+    if importance > rule.get("max_importance", float("inf")):
+        return False
+    if text_len < rule.get("min_chars", 0):
+        return False
+    if text_len > rule.get("max_chars", float("inf")):
+        return False
+    return not ("contract_types" in rule and contract_type not in rule["contract_types"])
+
+
+def route_model(
+    task: str,
+    importance: float = 1.0,
+    text_len: int = 0,
+    contract_type: str = "",
+) -> tuple[str, str]:
+    """Pick the model tier for an LLM call.
+
+    Args:
+        task: Call site name ("clause_analysis", "clause_extraction", "clause_filter").
+        importance: Clause importance weight (1.0 = baseline).
+        text_len: Length of the clause or document text in characters.
+        contract_type: Classified contract type.
+
+    Returns:
+        Tuple of (tier, model_id).
+    """
+    tier = ROUTING_TABLE.get("default_tier", STRONG_TIER)
+    for rule in ROUTING_TABLE.get("rules", []):
+        if _rule_matches(rule, task, importance, text_len, contract_type):
+            tier = rule["tier"]
+            break
+    models = ROUTING_TABLE["models"]
+    if tier not in models:
+        tier = STRONG_TIER
+    return tier, models[tier]["model"]
+
+
+def strong_model() -> str:
+    """Model id of the strong (escalation) tier."""
+    return ROUTING_TABLE["models"][STRONG_TIER]["model"]
+
+
+class ModelStats:
+    """Per-model call counters: latency, tokens, estimated cost, escalations."""
+
+    def __init__(self):
+        self._models: dict[str, dict] = {}
+
+    def _entry(self, model: str) -> dict:
+        return self._models.setdefault(model, {
+            "calls": 0, "failures": 0, "escalations": 0,
+            "totalLatency": 0.0, "promptTokens": 0, "completionTokens": 0,
+            "costUsd": 0.0,
+        })
+
+    def record_call(self, model: str, latency: float, usage=None) -> None:
+        entry = self._entry(model)
+        entry["calls"] += 1
+        entry["totalLatency"] += latency
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        entry["promptTokens"] += prompt_tokens
+        entry["completionTokens"] += completion_tokens
+        pricing = next(
+            (m for m in ROUTING_TABLE["models"].values() if m["model"] == model), {}
+        )
+        entry["costUsd"] += (
+            prompt_tokens * pricing.get("input_cost_per_m", 0.0)
+            + completion_tokens * pricing.get("output_cost_per_m", 0.0)
+        ) / 1_000_000
+
+    def record_failure(self, model: str, latency: float) -> None:
+        entry = self._entry(model)
+        entry["failures"] += 1
+        entry["totalLatency"] += latency
+
+    def record_escalation(self, model: str) -> None:
+        self._entry(model)["escalations"] += 1
+
+    def snapshot(self) -> dict:
+        """Return per-model stats including mean latency (seconds)."""
+        out = {}
+        for model, entry in self._models.items():
+            attempts = entry["calls"] + entry["failures"]
+            out[model] = {
+                **entry,
+                "meanLatency": round(entry["totalLatency"] / attempts, 3) if attempts else 0.0,
+                "costUsd": round(entry["costUsd"], 6),
+            }
+        return out
+
+    def report(self) -> str:
+        lines = []
+        for model, s in self.snapshot().items():
+            lines.append(
+                f"  {model}: {s['calls']} calls, {s['failures']} failed, "
+                f"{s['escalations']} escalated, mean {s['meanLatency']:.2f}s, "
+                f"${s['costUsd']:.4f}"
+            )
+        return "\n".join(lines) or "  (no model calls yet)"
+
+
+MODEL_STATS = ModelStats()
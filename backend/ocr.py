@@ -1,22 +1,134 @@
 """Tesseract OCR for scanned PDF documents.
 
-Uses PyMuPDF to convert PDF pages to images, then pytesseract
-for local OCR text extraction. No cloud API or credentials required.
+Uses PyMuPDF to render PDF pages, then Tesseract (via the warm engine pool in
+ocr_engine) for local OCR text extraction. No cloud API or credentials
+required.
+
+Pages are rendered straight to 8-bit grayscale samples (no PNG encode/decode)
+and streamed through a bounded pipeline: at most OCR_MAX_IN_FLIGHT rendered
+pages exist at once, so peak memory does not grow with page count.
+
+OCR is adaptive-DPI: every page is first OCR'd at OCR_LOW_DPI, and only pages
+whose mean word confidence falls below OCR_RECHECK_CONFIDENCE (faint faxes,
+small print) are re-rendered and re-OCR'd at OCR_HIGH_DPI. The DPI used and the
+time spent per page are recorded in ocr_engine.OCR_STATS.
+
+page_needs_ocr() decides per page, from text-layer density and image coverage,
+whether a page needs OCR at all (used by parsed_document), so a digital
+contract with a few scanned exhibit or signature pages only pays for OCR on
+those pages.
 """
 
-import concurrent.futures
-import io
+import os
+import time
+from array import array
+from collections.abc import Iterator
 
 import fitz  # pymupdf
-import pytesseract
-from PIL import Image
+
+from ocr_engine import OCR_STATS, get_engine_pool
+from ocr_words import OcrWords
+
+OCR_LOW_DPI = 150  # First pass — enough for clean laser-printed pages
+OCR_HIGH_DPI = 300  # Second pass for low-confidence pages
+OCR_RECHECK_CONFIDENCE = float(os.environ.get("OCR_RECHECK_CONFIDENCE", "70"))
+OCR_MIN_CONFIDENCE = 30  # Per-word cutoff for word boxes
+
+# Per-page text-layer detection (page_needs_ocr)
+OCR_MIN_PAGE_CHARS = 50  # Fewer native characters → page has no usable text layer
+OCR_MIN_IMAGE_COVERAGE = 0.1  # ...and OCR it if at least this much of it is image
+OCR_SCAN_COVERAGE = 0.6  # Page mostly covered by images
+OCR_SCAN_MAX_DENSITY = 0.5  # ...with fewer native chars per 1000 pt² is a scan
 
 
-def _ocr_single_page(page_bytes: bytes) -> str:
-    """OCR a single page image using Tesseract."""
-    image = Image.open(io.BytesIO(page_bytes))
-    text = pytesseract.image_to_string(image, lang="eng")
-    return text.strip()
+def _render_gray(page: fitz.Page, dpi: int) -> fitz.Pixmap:
+    """Rasterize a page to a single-channel grayscale pixmap."""
+    return page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+
+
+def _render_pages(
+    doc: fitz.Document, page_numbers: list[int], dpi: int, meta: list[dict]
+) -> Iterator[fitz.Pixmap]:
+    """Render pages lazily, appending {size, seconds} for each to meta.
+
+    size is (page_w, page_h, img_w, img_h). Rendering happens on the calling
+    thread (fitz documents are not thread-safe) and only as fast as the
+    engine pool drains.
+    """
+    for page_num in page_numbers:
+        start = time.perf_counter()
+        page = doc[page_num]
+        pix = _render_gray(page, dpi)
+        meta.append({
+            "size": (page.rect.width, page.rect.height, pix.width, pix.height),
+            "seconds": time.perf_counter() - start,
+        })
+        yield pix
+
+
+def _ocr_pass(
+    doc: fitz.Document, page_numbers: list[int], mode: str, dpi: int
+) -> list[dict]:
+    """OCR the given pages at one DPI, returning one entry per page."""
+    meta: list[dict] = []
+    results = get_engine_pool().stream(_render_pages(doc, page_numbers, dpi, meta), mode)
+    entries = []
+    for i, (result, confidence, busy) in enumerate(results):
+        entries.append({
+            "page": page_numbers[i],
+            "result": result,
+            "confidence": confidence,
+            "dpi": dpi,
+            "size": meta[i]["size"],
+            "seconds": meta[i]["seconds"] + busy,
+            "passes": 1,
+        })
+    return entries
+
+
+def _ocr_adaptive(doc: fitz.Document, page_numbers: list[int], mode: str) -> list[dict]:
+    """Two-pass OCR: low DPI everywhere, high DPI where confidence is low.
+
+    The high-DPI result replaces the first only if its confidence is at least
+    as good. Pages that timed out are not retried.
+
+    Returns:
+        Per-page entries {page, result, confidence, dpi, size, seconds, passes}
+        in page_numbers order.
+    """
+    start = time.perf_counter()
+    entries = _ocr_pass(doc, page_numbers, mode, OCR_LOW_DPI)
+
+    retry = [
+        i for i, entry in enumerate(entries)
+        if entry["result"] is not None and entry["confidence"] < OCR_RECHECK_CONFIDENCE
+    ]
+    if retry:
+        second = _ocr_pass(doc, [entries[i]["page"] for i in retry], mode, OCR_HIGH_DPI)
+        for i, entry in zip(retry, second):
+            seconds = entries[i]["seconds"] + entry["seconds"]
+            if entry["result"] is not None and entry["confidence"] >= entries[i]["confidence"]:
+                entries[i] = entry
+            entries[i]["seconds"] = seconds
+            entries[i]["passes"] = 2
+
+    report = [
+        {
+            "page": e["page"] + 1,
+            "dpi": e["dpi"],
+            "confidence": round(e["confidence"], 1),
+            "seconds": round(e["seconds"], 3),
+            "passes": e["passes"],
+        }
+        for e in entries
+    ]
+    OCR_STATS.record_document(time.perf_counter() - start)
+    OCR_STATS.record_page_report(report)
+    print(
+        f"OCR: {len(entries)} pages, {len(retry)} re-rendered at {OCR_HIGH_DPI} dpi "
+        f"(confidence < {OCR_RECHECK_CONFIDENCE:.0f})"
+    )
+    return entries
 
 
 def ocr_pdf(pdf_bytes: bytes) -> str:
@@ -29,44 +141,35 @@ def ocr_pdf(pdf_bytes: bytes) -> str:
         Full extracted text with page breaks.
     """
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        entries = _ocr_adaptive(doc, list(range(len(doc))), "text")
+    finally:
+        doc.close()
 
-    # Convert all pages to PNG at 200 DPI
-    page_images = []
-    for page in doc:
-        pix = page.get_pixmap(dpi=200)
-        page_images.append(pix.tobytes("png"))
-    doc.close()
-
-    # Process pages concurrently
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
-        futures = [pool.submit(_ocr_single_page, img) for img in page_images]
-        results = [f.result(timeout=60) for f in futures]
+    return "\n\n".join((entry["result"] or "").strip() for entry in entries)
 
-    return "\n\n".join(results)
 
-
-def _ocr_single_page_with_data(
-    page_bytes: bytes, page_index: int, page_width: float, page_height: float
+def _page_words(
+    data: dict | None, page_index: int, page_width: float, page_height: float,
+    img_width: int, img_height: int,
 ) -> dict:
-    """OCR a single page and return text + word bounding boxes.
+    """Convert one page's Tesseract word data to text + OcrWords.
 
     Coordinates are scaled from image pixels to PDF points.
     """
-    image = Image.open(io.BytesIO(page_bytes))
-    img_width, img_height = image.size
+    if data is None:  # page timed out
+        return {"text": "", "words": OcrWords()}
 
     scale_x = page_width / img_width
     scale_y = page_height / img_height
 
-    data = pytesseract.image_to_data(image, lang="eng", output_type=pytesseract.Output.DICT)
-
-    words = []
     text_parts = []
+    x0s, y0s, x1s, y1s = array("f"), array("f"), array("f"), array("f")
     n = len(data["text"])
     for i in range(n):
         word = data["text"][i].strip()
         conf = int(data["conf"][i]) if data["conf"][i] != "-1" else -1
-        if not word or conf < 30:
+        if not word or conf < OCR_MIN_CONFIDENCE:
             continue
 
         x = data["left"][i]
@@ -74,60 +177,105 @@ def _ocr_single_page_with_data(
         w = data["width"][i]
         h = data["height"][i]
 
-        words.append({
-            "text": word,
-            "x0": x * scale_x,
-            "y0": y * scale_y,
-            "x1": (x + w) * scale_x,
-            "y1": (y + h) * scale_y,
-            "page": page_index,
-        })
+        x0s.append(x * scale_x)
+        y0s.append(y * scale_y)
+        x1s.append((x + w) * scale_x)
+        y1s.append((y + h) * scale_y)
         text_parts.append(word)
 
+    words = OcrWords(
+        text_parts, x0s, y0s, x1s, y1s, array("i", [page_index]) * len(text_parts)
+    )
     return {"text": " ".join(text_parts), "words": words}
 
 
-def ocr_pdf_with_positions(pdf_bytes: bytes) -> tuple[str, list[dict]]:
+def ocr_pdf_with_positions(pdf_bytes: bytes) -> tuple[str, OcrWords]:
     """Extract text and word positions from a scanned PDF.
 
     Args:
         pdf_bytes: Raw PDF file bytes.
 
     Returns:
-        Tuple of (full_text, all_words) where all_words is a flat list of
-        word dicts with {text, x0, y0, x1, y1, page} in PDF point coords.
+        Tuple of (full_text, all_words) where all_words is an OcrWords column
+        store of {text, x0, y0, x1, y1, page} in PDF point coords.
     """
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
 
-    page_infos = []
-    page_images = []
-    for i, page in enumerate(doc):
-        pix = page.get_pixmap(dpi=200)
-        page_images.append(pix.tobytes("png"))
-        page_infos.append({
-            "index": i,
-            "width": page.rect.width,
-            "height": page.rect.height,
-        })
-    doc.close()
+    try:
+        page_texts, words = ocr_document_with_positions(doc)
+    finally:
+        doc.close()
+
+    return "\n\n".join(page_texts), words
+
 
-    all_words = []
+def ocr_document_with_positions(doc: fitz.Document) -> tuple[list[str], OcrWords]:
+    """OCR every page of an open document.
+
+    Returns:
+        Tuple of (page_texts, all_words) — one text per page, and the OcrWords
+        of all pages in PDF point coords.
+    """
+    page_words = []
     page_texts = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
-        futures = [
-            pool.submit(
-                _ocr_single_page_with_data,
-                page_images[info["index"]],
-                info["index"],
-                info["width"],
-                info["height"],
-            )
-            for info in page_infos
-        ]
-        for f in futures:
-            result = f.result(timeout=60)
-            page_texts.append(result["text"])
-            all_words.extend(result["words"])
-
-    full_text = "\n\n".join(page_texts)
-    return full_text, all_words
+    for _, result in ocr_pages_with_positions(doc, list(range(len(doc)))):
+        page_texts.append(result["text"])
+        page_words.append(result["words"])
+    return page_texts, OcrWords.concat(page_words)
+
+
+def ocr_pages_with_positions(
+    doc: fitz.Document, page_numbers: list[int]
+) -> Iterator[tuple[int, dict]]:
+    """OCR the given pages in order, yielding (page_number, {text, words})."""
+    for entry in _ocr_adaptive(doc, page_numbers, "data"):
+        yield entry["page"], _page_words(entry["result"], entry["page"], *entry["size"])
+
+
+def _image_coverage(page: fitz.Page) -> float:
+    """Fraction of the page area covered by placed images (capped at 1)."""
+    area = page.rect.width * page.rect.height
+    if not area:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        rect = fitz.Rect(info["bbox"]) & page.rect
+        if not rect.is_empty:
+            covered += rect.width * rect.height
+    return min(covered / area, 1.0)
+
+
+def page_needs_ocr(page: fitz.Page, native_text: str) -> bool:
+    """Decide whether a page's text must come from OCR.
+
+    A page needs OCR when it has (almost) no text layer but does carry an
+    image, or when it is mostly image with only a sparse text layer (e.g. a
+    scan with a stamped Bates number). Pages with an invisible OCR text layer
+    already have dense native text and are left alone.
+
+    Args:
+        page: The PDF page.
+        native_text: page.get_text() for the page.
+
+    Returns:
+        True if the page should be OCR'd.
+    """
+    chars = len("".join(native_text.split()))
+    coverage = _image_coverage(page)
+    if chars < OCR_MIN_PAGE_CHARS:
+        return coverage >= OCR_MIN_IMAGE_COVERAGE
+    density = chars / (page.rect.width * page.rect.height / 1000)
+    return coverage >= OCR_SCAN_COVERAGE and density < OCR_SCAN_MAX_DENSITY
+
+
+def native_page_words(words: list[tuple], page_num: int) -> OcrWords:
+    """Text-layer words of a page (page.get_text("words")) as OcrWords."""
+    texts = []
+    x0s, y0s, x1s, y1s = array("f"), array("f"), array("f"), array("f")
+    for x0, y0, x1, y1, word, *_ in words:
+        texts.append(word)
+        x0s.append(x0)
+        y0s.append(y0)
+        x1s.append(x1)
+        y1s.append(y1)
+    return OcrWords(texts, x0s, y0s, x1s, y1s, array("i", [page_num]) * len(texts))
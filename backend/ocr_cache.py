@@ -0,0 +1,113 @@
+"""Disk cache of per-page OCR results keyed by rendered-pixel hash.
+
+Scanned contracts repeat pages (standard exhibits, boilerplate terms) and the
+same scan is often re-uploaded with the OCR toggle flipped. Each page's
+engine output (text or word boxes, plus mean confidence) is stored under
+sha256(pixels + dimensions + OCR settings), so a repeated page costs a hash
+instead of a Tesseract run.
+
+Layout (OCR_CACHE_DIR, default backend/ocr_cache/): one JSON file per page at
+<key[:2]>/<key>.json. Reads touch the file's mtime; when the directory grows
+past OCR_CACHE_MAX_MB, the least recently used files are evicted down to
+EVICT_TARGET of the limit. OCR_CACHE_MAX_MB=0 disables the cache.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+CACHE_DIR = Path(os.environ.get("OCR_CACHE_DIR", Path(__file__).parent / "ocr_cache"))
+CACHE_MAX_BYTES = int(float(os.environ.get("OCR_CACHE_MAX_MB", "256")) * 1024 * 1024)
+CACHE_VERSION = 1  # Bump when engine output format changes
+EVICT_TARGET = 0.8  # Evict down to this fraction of the limit
+
+
+def page_key(samples: bytes, width: int, height: int, settings: tuple) -> str:
+    """Hash a rendered page's pixels together with the OCR settings."""
+    h = hashlib.sha256(samples)
+    h.update(repr((CACHE_VERSION, width, height, settings)).encode())
+    return h.hexdigest()
+
+
+class OcrPageCache:
+    """Size-bounded, LRU-by-mtime directory of per-page OCR results."""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._size: int | None = None  # bytes on disk, computed on first write
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> tuple[object, float] | None:
+        """Return the cached (result, confidence) for a page key, or None."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text())
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+        return entry["result"], entry["confidence"]
+
+    def put(self, key: str, result: object, confidence: float) -> None:
+        """Store a page result, evicting least recently used pages if needed."""
+        if not self.enabled:
+            return
+        path = self._path(key)
+        payload = json.dumps({"result": result, "confidence": confidence})
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_text(payload)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"OCR cache write failed: {e}")
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(payload)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        size = sum(s for _, s, _ in entries)
+        target = self.max_bytes * EVICT_TARGET
+        evicted = 0
+        for _, file_size, path in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            size -= file_size
+            evicted += 1
+        self._size = size
+        print(f"OCR cache: evicted {evicted} pages, {size / 1024 / 1024:.1f} MB kept")
+
+
+OCR_CACHE = OcrPageCache()
@@ -0,0 +1,374 @@
+"""Warm Tesseract engine pool for page OCR.
+
+pytesseract starts a new `tesseract` process per call, writes the image to a
+temp file and reloads eng.traineddata every time. This module instead keeps
+one engine per worker process alive for the life of the pool:
+
+- With the optional `tesserocr` package (pip install ".[ocr]"), each worker
+  initializes a PyTessBaseAPI once; pages arrive as raw 8-bit grayscale
+  samples and are recognized in-process with a per-page timeout.
+- Without it, workers fall back to pytesseract (one subprocess per page) but
+  keep the same pool, timeouts and metrics.
+
+Each engine is single-threaded (OMP_THREAD_LIMIT=1) — parallelism comes from
+the pool, which defaults to one worker per available core (OCR_ENGINE_WORKERS).
+Pages already in the disk cache (ocr_cache) are answered without an engine.
+"""
+
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # pymupdf
+
+from ocr_cache import OCR_CACHE, page_key
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS / Windows
+        return os.cpu_count() or 1
+
+
+OCR_LANG = "eng"
+OCR_ENGINE_WORKERS = int(os.environ.get("OCR_ENGINE_WORKERS", "0")) or _available_cores()
+OCR_MAX_IN_FLIGHT = OCR_ENGINE_WORKERS * 2  # Rendered pages queued for or in OCR
+OCR_PAGE_TIMEOUT = float(os.environ.get("OCR_PAGE_TIMEOUT", "60"))  # seconds per page
+OCR_ENGINE_THREADS = "1"  # OMP_THREAD_LIMIT per engine
+
+# Fields returned for mode="data" (same keys as pytesseract.Output.DICT)
+DATA_FIELDS = ("text", "conf", "left", "top", "width", "height")
+
+
+# ── Worker process side ─────────────────────────────────────────────
+
+_api = None  # tesserocr.PyTessBaseAPI, one per worker process
+_backend = "pytesseract"
+
+
+def _init_worker(lang: str, worker_pids) -> None:
+    """Pool initializer: report our PID, pin engine threads and load the model once."""
+    global _api, _backend
+    worker_pids.put(os.getpid())
+    os.environ["OMP_THREAD_LIMIT"] = OCR_ENGINE_THREADS
+    try:
+        from tesserocr import PyTessBaseAPI
+    except ImportError:
+        return
+    _api = PyTessBaseAPI(lang=lang)
+    _backend = "tesserocr"
+
+
+def _recognize_tesserocr(mode: str, samples: bytes, width: int, height: int, stride: int,
+                         timeout: float):
+    from tesserocr import RIL, iterate_level
+
+    _api.SetImageBytes(samples, width, height, 1, stride)
+    if not _api.Recognize(int(timeout * 1000)):
+        raise TimeoutError(f"Tesseract did not finish within {timeout:.0f}s")
+    if mode == "text":
+        return _api.GetUTF8Text(), float(_api.MeanTextConf())
+
+    data = {field: [] for field in DATA_FIELDS}
+    iterator = _api.GetIterator()
+    if iterator is None:
+        return data, 0.0
+    for word in iterate_level(iterator, RIL.WORD):
+        box = word.BoundingBox(RIL.WORD)
+        if box is None:
+            continue
+        x0, y0, x1, y1 = box
+        data["text"].append(word.GetUTF8Text(RIL.WORD) or "")
+        data["conf"].append(int(word.Confidence(RIL.WORD)))
+        data["left"].append(x0)
+        data["top"].append(y0)
+        data["width"].append(x1 - x0)
+        data["height"].append(y1 - y0)
+    return data, mean_confidence(data)
+
+
+def _recognize_pytesseract(mode: str, samples: bytes, width: int, height: int, stride: int,
+                           timeout: float):
+    import pytesseract
+    from PIL import Image
+
+    image = Image.frombuffer("L", (width, height), samples, "raw", "L", stride, 1)
+    image.format = "PPM"  # hand Tesseract an uncompressed PGM, not a PNG
+    try:
+        # One image_to_data call gives both text and confidences
+        data = pytesseract.image_to_data(
+            image, lang=OCR_LANG, output_type=pytesseract.Output.DICT, timeout=timeout
+        )
+    except RuntimeError as e:
+        if "timeout" in str(e).lower():
+            raise TimeoutError(f"Tesseract did not finish within {timeout:.0f}s") from e
+        raise
+    finally:
+        image.close()
+    if mode == "text":
+        return _data_to_text(data), mean_confidence(data)
+    data = {field: data[field] for field in DATA_FIELDS}
+    return data, mean_confidence(data)
+
+
+def _data_to_text(data: dict) -> str:
+    """Rebuild image_to_string-style text: lines per line, blank line per paragraph."""
+    paragraphs: list[list[list[str]]] = []
+    last_par = last_line = None
+    for i, word in enumerate(data["text"]):
+        if not word.strip():
+            continue
+        par = (data["block_num"][i], data["par_num"][i])
+        line = (par, data["line_num"][i])
+        if par != last_par:
+            paragraphs.append([])
+        if line != last_line:
+            paragraphs[-1].append([])
+        paragraphs[-1][-1].append(word.strip())
+        last_par, last_line = par, line
+    return "\n\n".join(
+        "\n".join(" ".join(words) for words in lines) for lines in paragraphs
+    )
+
+
+def mean_confidence(data: dict) -> float:
+    """Mean Tesseract confidence (0-100) over recognized words; 0 if none."""
+    confs = [
+        float(conf) for text, conf in zip(data["text"], data["conf"])
+        if str(text).strip() and float(conf) >= 0
+    ]
+    return sum(confs) / len(confs) if confs else 0.0
+
+
+def _ocr_page(mode: str, samples: bytes, width: int, height: int, stride: int,
+              timeout: float) -> tuple[object, float, float]:
+    """Worker task: OCR one grayscale page.
+
+    Returns:
+        Tuple of (result, mean_confidence, busy_seconds).
+    """
+    start = time.perf_counter()
+    recognize = _recognize_tesserocr if _api is not None else _recognize_pytesseract
+    result, confidence = recognize(mode, samples, width, height, stride, timeout)
+    return result, confidence, time.perf_counter() - start
+
+
+def _worker_backend() -> str:
+    return _backend
+
+
+# ── Parent process side ─────────────────────────────────────────────
+
+
+class OcrStats:
+    """OCR throughput counters: pages, timeouts, engine time, pages/second."""
+
+    def __init__(self):
+        self.backend = "unknown"
+        self.workers = 0
+        self.documents = 0
+        self.pages = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.cache_hits = 0
+        self.engine_seconds = 0.0  # summed per-page time inside the engines
+        self.wall_seconds = 0.0  # summed per-document time, render included
+        self.rerenders = 0  # pages re-OCR'd at a higher DPI
+        self.pages_by_dpi: dict[int, int] = {}  # DPI finally used → page count
+        self.last_document: list[dict] = []  # per-page {page, dpi, confidence, seconds}
+
+    def record_page(self, busy: float) -> None:
+        self.pages += 1
+        self.engine_seconds += busy
+
+    def record_cache_hit(self) -> None:
+        self.cache_hits += 1
+
+    def record_timeout(self) -> None:
+        self.timeouts += 1
+
+    def record_failure(self) -> None:
+        self.failures += 1
+
+    def record_document(self, wall: float) -> None:
+        self.documents += 1
+        self.wall_seconds += wall
+
+    def record_page_report(self, report: list[dict]) -> None:
+        """Record the DPI chosen and time spent for each page of a document."""
+        for entry in report:
+            self.pages_by_dpi[entry["dpi"]] = self.pages_by_dpi.get(entry["dpi"], 0) + 1
+            self.rerenders += entry["passes"] > 1
+        self.last_document = report
+
+    def snapshot(self) -> dict:
+        """Return totals plus mean page latency and pages/second."""
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "documents": self.documents,
+            "pages": self.pages,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "cacheHits": self.cache_hits,
+            "meanPageLatency": round(self.engine_seconds / self.pages, 3) if self.pages else 0.0,
+            "pagesPerSecond": (
+                round(self.pages / self.wall_seconds, 2) if self.wall_seconds else 0.0
+            ),
+            "rerenders": self.rerenders,
+            "pagesByDpi": dict(self.pages_by_dpi),
+            "lastDocument": self.last_document,
+        }
+
+
+OCR_STATS = OcrStats()
+
+
+class OcrEnginePool:
+    """Process pool of warm, single-threaded Tesseract engines."""
+
+    def __init__(self, workers: int = OCR_ENGINE_WORKERS, lang: str = OCR_LANG):
+        self.workers = workers
+        self.broken = False
+        # spawn: forking a threaded server process that holds MuPDF state is unsafe
+        context = multiprocessing.get_context("spawn")
+        # Workers report their PIDs here so a wedged engine can be killed
+        self._worker_pids = context.SimpleQueue()
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(lang, self._worker_pids),
+        )
+        self.backend = self._executor.submit(_worker_backend).result()
+        OCR_STATS.backend = self.backend
+        OCR_STATS.workers = workers
+        print(f"OCR engine pool: {workers} x {self.backend}")
+
+    def _submit(
+        self, mode: str, pix: fitz.Pixmap
+    ) -> tuple[concurrent.futures.Future, str | None]:
+        """Queue a page for OCR, or resolve it from the cache immediately.
+
+        Returns:
+            Tuple of (future, cache_key) — cache_key is None for cache hits
+            and "" when caching is disabled.
+        """
+        samples = pix.samples
+        key = ""
+        if OCR_CACHE.enabled:
+            key = page_key(samples, pix.width, pix.height, (mode, OCR_LANG, self.backend))
+            cached = OCR_CACHE.get(key)
+            if cached is not None:
+                future: concurrent.futures.Future = concurrent.futures.Future()
+                future.set_result((*cached, 0.0))
+                OCR_STATS.record_cache_hit()
+                return future, None
+        future = self._executor.submit(
+            _ocr_page, mode, samples, pix.width, pix.height, pix.stride, OCR_PAGE_TIMEOUT
+        )
+        return future, key
+
+    def _result(
+        self, future: concurrent.futures.Future, cache_key: str | None
+    ) -> tuple[object, float, float]:
+        if cache_key is None:  # served from the cache
+            return future.result()
+        # The engine enforces OCR_PAGE_TIMEOUT; the wait here also covers queueing
+        try:
+            result, confidence, busy = future.result(timeout=OCR_PAGE_TIMEOUT * 3)
+        except (TimeoutError, concurrent.futures.TimeoutError):
+            OCR_STATS.record_timeout()
+            print(f"OCR page timed out after {OCR_PAGE_TIMEOUT:.0f}s, skipping")
+            if not future.done() and not future.cancel():
+                # The engine's own timeout never fired and it still holds a
+                # worker: it is wedged, so replace the pool
+                self.broken = True
+            return None, 0.0, OCR_PAGE_TIMEOUT
+        except BrokenProcessPool:
+            OCR_STATS.record_failure()
+            self.broken = True
+            raise
+        except Exception:
+            OCR_STATS.record_failure()
+            raise
+        OCR_STATS.record_page(busy)
+        if cache_key:
+            OCR_CACHE.put(cache_key, result, confidence)
+        return result, confidence, busy
+
+    def stream(
+        self, pixmaps: Iterable[fitz.Pixmap], mode: str
+    ) -> Iterator[tuple[object, float, float]]:
+        """OCR grayscale pixmaps in order, with at most OCR_MAX_IN_FLIGHT queued.
+
+        The next pixmap is only pulled (rendered) once there is room, so peak
+        memory stays bounded regardless of page count.
+
+        Args:
+            pixmaps: 8-bit grayscale pixmaps, one per page, in page order.
+            mode: "text" for plain text, "data" for word boxes (DATA_FIELDS).
+
+        Yields:
+            (result, mean_confidence, busy_seconds) per page — result is None
+            if that page timed out.
+        """
+        pixmaps = iter(pixmaps)
+        pending: deque[tuple[concurrent.futures.Future, str | None, fitz.Pixmap]] = deque()
+        for pix in pixmaps:
+            while len(pending) >= OCR_MAX_IN_FLIGHT and not self.broken:
+                future, key, _ = pending.popleft()
+                yield self._result(future, key)
+            if self.broken:
+                pixmaps = itertools.chain([pix], pixmaps)
+                break
+            pending.append((*self._submit(mode, pix), pix))
+        while pending and not self.broken:
+            future, key, _ = pending.popleft()
+            yield self._result(future, key)
+        if self.broken:
+            # A page wedged an engine: the pages still queued here go to a
+            # fresh pool (get_engine_pool() shuts this one down)
+            rest = itertools.chain((pix for _, _, pix in pending), pixmaps)
+            yield from get_engine_pool().stream(rest, mode)
+
+    def shutdown(self) -> None:
+        if not self.broken:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            return
+        # A wedged engine never returns on its own: stop the worker processes too
+        if hasattr(self._executor, "kill_workers"):  # Python 3.14+
+            self._executor.kill_workers()
+            return
+        pids = set()
+        while not self._worker_pids.empty():
+            pids.add(self._worker_pids.get())
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except (ProcessLookupError, PermissionError):
+                pass  # already exited
+
+
+_pool: OcrEnginePool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_engine_pool() -> OcrEnginePool:
+    """Return the process-wide engine pool, (re)starting it if needed."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.broken:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = OcrEnginePool()
+        return _pool
@@ -0,0 +1,180 @@
+"""One parse of an uploaded contract, shared by every pipeline stage.
+
+parse_document() opens the upload once and, in a single pass per page, takes
+the page text, page size and word boxes from one PyMuPDF TextPage (stored
+uploads are memory-mapped, and large ones split across worker processes by
+pdf_extract). It builds
+the DocumentTextIndex from those same words, decides per page whether OCR is
+needed (ocr.page_needs_ocr) and OCRs only those pages. The resulting
+ParsedDocument keeps the open fitz document, so later stages reuse its text
+index, line layout (parsed lazily per page), page dimensions and OCR words
+instead of reopening the PDF bytes.
+"""
+
+import bisect
+from pathlib import Path
+
+import fitz  # pymupdf
+
+from ocr import (
+    native_page_words,
+    ocr_document_with_positions,
+    ocr_pages_with_positions,
+)
+from ocr_words import OcrWords
+from pdf_extract import extract_pages, open_mapped
+from pdf_layout import DocumentLayout, DocumentTextIndex
+
+DEFAULT_PAGE_SIZE = (612.0, 792.0)  # US Letter, in PDF points
+OCR_PAGE_SEPARATOR = "\n\n"
+
+
+class ParsedDocument:
+    """Text with per-page character offsets, geometry and OCR words."""
+
+    def __init__(
+        self,
+        page_texts: list[str],
+        page_sizes: list[tuple[float, float]] | None = None,
+        separator: str = "",
+        doc: fitz.Document | None = None,
+        text_index: DocumentTextIndex | None = None,
+        ocr_used: bool = False,
+        ocr_words: OcrWords | None = None,
+    ):
+        self.text = separator.join(page_texts)
+        # page_offsets[i] is the char offset in self.text where page i starts
+        self.page_offsets: list[int] = []
+        offset = 0
+        for page_text in page_texts:
+            self.page_offsets.append(offset)
+            offset += len(page_text) + len(separator)
+        self.page_sizes = page_sizes or []
+        self.doc = doc
+        self.ocr_used = ocr_used
+        self.ocr_words = ocr_words if ocr_words is not None else OcrWords()
+        self._text_index = text_index
+        self._layout: DocumentLayout | None = None
+
+    @property
+    def is_pdf(self) -> bool:
+        return self.doc is not None
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_offsets)
+
+    @property
+    def text_index(self) -> DocumentTextIndex:
+        """Text-layer word index (built during parsing for non-OCR PDFs)."""
+        if self._text_index is None:
+            self._text_index = DocumentTextIndex(self.doc)
+        return self._text_index
+
+    @property
+    def layout(self) -> DocumentLayout:
+        """Per-page line layout, parsed lazily on first use of each page."""
+        if self._layout is None:
+            self._layout = DocumentLayout(self.doc)
+        return self._layout
+
+    def page_size(self, page_num: int) -> tuple[float, float]:
+        """(width, height) of a page in PDF points; Letter if unknown."""
+        if 0 <= page_num < len(self.page_sizes):
+            return self.page_sizes[page_num]
+        return DEFAULT_PAGE_SIZE
+
+    def page_at(self, offset: int) -> int:
+        """0-indexed page containing a character offset of self.text."""
+        return max(bisect.bisect_right(self.page_offsets, offset) - 1, 0)
+
+    def close(self) -> None:
+        if self.doc is not None:
+            self.doc.close()
+            self.doc = None
+
+
+def _parse_pdf(doc: fitz.Document, path: Path | None = None) -> ParsedDocument:
+    """Text layer for every page, OCR only for pages without a usable one.
+
+    With the file's path, large documents are extracted page-parallel
+    (pdf_extract.extract_pages); the merged result is identical.
+    """
+    page_texts: list[str] = []
+    page_sizes: list[tuple[float, float]] = []
+    text_index = DocumentTextIndex()
+    ocr_pages: list[int] = []
+
+    for page_num, (text, words, size, needs_ocr) in enumerate(extract_pages(doc, path)):
+        page_texts.append(text)
+        page_sizes.append(size)
+        text_index.add_page(*size, words)
+        if needs_ocr:
+            ocr_pages.append(page_num)
+
+    if not ocr_pages:
+        return ParsedDocument(page_texts, page_sizes, "", doc, text_index)
+
+    print(f"Hybrid extraction: OCR'ing {len(ocr_pages)}/{len(doc)} pages {ocr_pages}")
+    page_words: list[OcrWords | None] = [None] * len(doc)
+    for page_num, result in ocr_pages_with_positions(doc, ocr_pages):
+        page_texts[page_num] = result["text"] + "\n"
+        page_words[page_num] = result["words"]
+
+    # Native pages join the same word model, straight from the text index
+    for page_num in range(len(doc)):
+        if page_words[page_num] is not None:
+            continue
+        lo = bisect.bisect_left(text_index.word_page, page_num)
+        hi = bisect.bisect_right(text_index.word_page, page_num)
+        page_words[page_num] = native_page_words(
+            [(*text_index.word_bbox[i], text_index.word_text[i]) for i in range(lo, hi)],
+            page_num,
+        )
+
+    return ParsedDocument(
+        page_texts, page_sizes, "", doc, text_index,
+        ocr_used=True, ocr_words=OcrWords.concat(page_words),
+    )
+
+
+def parse_document(source: Path | bytes, filename: str, use_ocr: bool) -> ParsedDocument:
+    """Parse an uploaded PDF or DOCX once for the whole pipeline.
+
+    For PDFs: uses the PyMuPDF text layer and Tesseract OCR only on pages that
+    have none (scanned exhibits, signature pages); use_ocr=True forces OCR on
+    every page. For a fully digital PDF the text is identical to joining
+    page.get_text() of every page.
+    For DOCX: uses docx_extractor (OCR is never needed, no page geometry).
+
+    Args:
+        source: Path of the spooled upload (memory-mapped, so the file is
+            never held in memory as one bytes object), or raw file bytes.
+        filename: Original filename (the extension selects the parser).
+        use_ocr: Force OCR on every PDF page.
+
+    Returns:
+        ParsedDocument. For PDFs it holds the open document — call close()
+        when the analysis is done.
+    """
+    if filename.lower().endswith(".docx"):
+        from docx_extractor import extract_docx_text
+
+        return ParsedDocument([extract_docx_text(source)])
+
+    if isinstance(source, bytes):
+        doc = fitz.open(stream=source, filetype="pdf")
+    else:
+        doc = open_mapped(source)
+    try:
+        if use_ocr:
+            page_texts, words = ocr_document_with_positions(doc)
+            page_sizes = [(page.rect.width, page.rect.height) for page in doc]
+            return ParsedDocument(
+                page_texts, page_sizes, OCR_PAGE_SEPARATOR, doc,
+                ocr_used=True, ocr_words=words,
+            )
+        return _parse_pdf(doc, None if isinstance(source, bytes) else Path(source))
+    except BaseException:
+        doc.close()
+        raise
@@ -0,0 +1,110 @@
+"""Memory-mapped, page-parallel PDF text-layer extraction.
+
+Stored uploads are opened through a read-only mmap (MuPDF reads the mapping
+in place — no bytes copy, and every process shares the OS page cache). For
+large documents, page ranges are split across a persistent pool of worker
+processes; each worker maps and opens the file itself and returns, per page,
+the text, word boxes, page size and whether the page needs OCR. The parent
+joins the results once, in page order, and keeps per-page character offsets
+(see parsed_document.ParsedDocument).
+
+Small documents (under PARALLEL_MIN_PAGES) or single-core hosts extract
+in-process, where the pool's start-up and result transfer would cost more
+than they save.
+"""
+
+import concurrent.futures
+import itertools
+import mmap
+import multiprocessing
+import os
+import threading
+from pathlib import Path
+
+import fitz  # pymupdf
+
+from ocr import page_needs_ocr
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS / Windows
+        return os.cpu_count() or 1
+
+
+EXTRACT_WORKERS = int(os.environ.get("PDF_EXTRACT_WORKERS", "0")) or _available_cores()
+PARALLEL_MIN_PAGES = 48
+RANGES_PER_WORKER = 2  # Smaller ranges balance pages of uneven density
+
+# (text, words, (width, height), needs_ocr) — words as from page.get_text("words")
+PageExtract = tuple[str, list[tuple], tuple[float, float], bool]
+
+
+def open_mapped(path: Path | str) -> fitz.Document:
+    """Open a PDF through a read-only memory map of the file."""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # The document keeps the memoryview (and so the mapping) alive
+    return fitz.open(stream=memoryview(mapped), filetype="pdf")
+
+
+def extract_page(page: fitz.Page) -> PageExtract:
+    """Text, words, size and OCR need of one page, from a single TextPage."""
+    textpage = page.get_textpage(flags=fitz.TEXTFLAGS_TEXT)
+    text = page.get_text(textpage=textpage)
+    words = page.get_text("words", textpage=textpage)
+    return text, words, (page.rect.width, page.rect.height), page_needs_ocr(page, text)
+
+
+def _extract_range(path: str, start: int, stop: int) -> list[PageExtract]:
+    """Worker task: extract pages [start, stop) of the file at path."""
+    doc = open_mapped(path)
+    try:
+        return [extract_page(doc[page_num]) for page_num in range(start, stop)]
+    finally:
+        doc.close()
+
+
+_pool: concurrent.futures.ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a threaded server process that holds MuPDF state is unsafe
+            _pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def extract_pages(doc: fitz.Document, path: Path | str | None = None) -> list[PageExtract]:
+    """Extract every page's text layer, in parallel when it pays off.
+
+    Args:
+        doc: The open document (used directly for in-process extraction).
+        path: The file the document was opened from. Required for parallel
+            extraction, since workers open the file themselves.
+
+    Returns:
+        One PageExtract per page, in page order.
+    """
+    page_count = len(doc)
+    if path is None or EXTRACT_WORKERS < 2 or page_count < PARALLEL_MIN_PAGES:
+        return [extract_page(page) for page in doc]
+
+    n_ranges = min(EXTRACT_WORKERS * RANGES_PER_WORKER, page_count)
+    bounds = [page_count * i // n_ranges for i in range(n_ranges + 1)]
+    pool = _get_pool()
+    futures = [
+        pool.submit(_extract_range, str(path), start, stop)
+        for start, stop in itertools.pairwise(bounds)
+    ]
+    pages: list[PageExtract] = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
@@ -0,0 +1,187 @@
+"""Document-level text indexes and layout cache for locating clauses in a PDF.
+
+DocumentTextIndex is built in a single pass over the document's words
+(page.get_text("words")). It holds one normalized, lowercased text buffer for
+the whole document, a character-offset → word map with page and bbox per
+word, and a first-word index, so finding a clause snippet is a dictionary
+lookup plus a few prefix checks instead of a search_for() on every page.
+
+DocumentLayout caches each page's text lines (bbox + word set), parsed from
+page.get_text("dict") at most once per page, for paragraph expansion and any
+other feature that needs line geometry.
+"""
+
+import bisect
+import re
+
+import fitz  # pymupdf
+
+# get_text("dict") flags without image blocks — we only need text lines
+_DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+_LINE_WORD_RE = re.compile(r"[a-z]{3,}")
+
+
+def line_words(text: str) -> frozenset[str]:
+    """Lowercase 3+ letter words of a line — the unit used for overlap checks."""
+    return frozenset(_LINE_WORD_RE.findall(text.lower()))
+
+
+class DocumentTextIndex:
+    """Whitespace-normalized full-document text with a char → word/bbox map."""
+
+    def __init__(self, doc: fitz.Document | None = None):
+        self.page_count = 0
+        self.page_sizes: list[tuple[float, float]] = []
+        self.word_page: list[int] = []
+        self.word_bbox: list[tuple[float, float, float, float]] = []
+        self.word_line: list[tuple[int, int]] = []  # (block_no, line_no) within its page
+        self.word_start: list[int] = []  # char offset of each word in self.text
+        self._first_word: dict[str, list[int]] = {}
+        self.word_text: list[str] = []  # lowercased word tokens
+        self._offset = 0
+        self._text: str | None = None
+
+        if doc is not None:
+            for page in doc:
+                self.add_page(page.rect.width, page.rect.height, page.get_text("words"))
+
+    def add_page(self, width: float, height: float, words: list[tuple]) -> None:
+        """Append the next page from its page.get_text("words") tuples.
+
+        Lets a caller that already extracted the words (e.g. while parsing the
+        upload) build the index without a second text extraction.
+        """
+        page_num = self.page_count
+        self.page_count += 1
+        self.page_sizes.append((width, height))
+        for x0, y0, x1, y1, word, block_no, line_no, _ in words:
+            token = word.lower()
+            self._first_word.setdefault(token, []).append(len(self.word_start))
+            self.word_page.append(page_num)
+            self.word_bbox.append((x0, y0, x1, y1))
+            self.word_line.append((block_no, line_no))
+            self.word_start.append(self._offset)
+            self.word_text.append(token)
+            self._offset += len(token) + 1
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        """The normalized document text (words joined by single spaces)."""
+        if self._text is None:
+            self._text = " ".join(self.word_text)
+        return self._text
+
+    @staticmethod
+    def normalize(snippet: str) -> str:
+        """Normalize a query the same way the index text is normalized."""
+        return " ".join(snippet.split()).lower()
+
+    def _word_at(self, char_offset: int) -> int:
+        return bisect.bisect_right(self.word_start, char_offset) - 1
+
+    def _page_word_range(self, page_num: int) -> tuple[int, int]:
+        return (
+            bisect.bisect_left(self.word_page, page_num),
+            bisect.bisect_right(self.word_page, page_num),
+        )
+
+    def _find_start_word(self, needle: str, lo: int, hi: int) -> int | None:
+        """First word in [lo, hi) where needle starts, in document order."""
+        candidates = self._first_word.get(needle.split(" ", 1)[0], ())
+        for i in candidates[bisect.bisect_left(candidates, lo):]:
+            if i >= hi:
+                break
+            if self.text.startswith(needle, self.word_start[i]):
+                return i
+
+        # Snippet may start mid-token (e.g. punctuation split differently)
+        n_words = len(self.word_start)
+        begin = self.word_start[lo] if lo < n_words else len(self.text)
+        limit = self.word_start[hi] if hi < n_words else len(self.text)
+        pos = self.text.find(needle, begin, limit + len(needle))
+        if 0 <= pos < limit:
+            return self._word_at(pos)
+        return None
+
+    def find(self, snippet: str, page_num: int | None = None) -> tuple[int, fitz.Rect] | None:
+        """Locate the first occurrence of a snippet in document order.
+
+        Args:
+            snippet: Raw text (any whitespace, any case).
+            page_num: Page the snippet is expected to start on, searched
+                first; falls back to the whole document.
+
+        Returns:
+            Tuple of (page_number, rect of the first matched line), or None.
+        """
+        needle = self.normalize(snippet)
+        if not needle:
+            return None
+
+        start_word = None
+        if page_num is not None:
+            start_word = self._find_start_word(needle, *self._page_word_range(page_num))
+        if start_word is None:
+            start_word = self._find_start_word(needle, 0, len(self.word_start))
+        if start_word is None:
+            return None
+
+        return self.word_page[start_word], self._first_line_rect(start_word, len(needle))
+
+    def _first_line_rect(self, start_word: int, match_len: int) -> fitz.Rect:
+        """Union of the matched words on the match's first line."""
+        match_end = self.word_start[start_word] + match_len
+        page = self.word_page[start_word]
+        line = self.word_line[start_word]
+        x0, y0, x1, y1 = self.word_bbox[start_word]
+        i = start_word + 1
+        while (
+            i < len(self.word_start)
+            and self.word_start[i] < match_end
+            and self.word_page[i] == page
+            and self.word_line[i] == line
+        ):
+            bx0, by0, bx1, by1 = self.word_bbox[i]
+            x0, y0, x1, y1 = min(x0, bx0), min(y0, by0), max(x1, bx1), max(y1, by1)
+            i += 1
+        return fitz.Rect(x0, y0, x1, y1)
+
+
+class PageLayout:
+    """Text lines of one page: parallel tuples of bboxes and word sets."""
+
+    __slots__ = ("bboxes", "words")
+
+    def __init__(self, page: fitz.Page):
+        bboxes = []
+        words = []
+        for block in page.get_text("dict", flags=_DICT_FLAGS).get("blocks", []):
+            if block.get("type") != 0:  # text blocks only
+                continue
+            for line in block.get("lines", []):
+                bboxes.append(tuple(line["bbox"]))
+                text = " ".join(span["text"] for span in line.get("spans", []))
+                words.append(line_words(text))
+        self.bboxes: tuple[tuple[float, float, float, float], ...] = tuple(bboxes)
+        self.words: tuple[frozenset[str], ...] = tuple(words)
+
+    def __len__(self) -> int:
+        return len(self.bboxes)
+
+
+class DocumentLayout:
+    """Lazily parsed, per-page line layout shared across pipeline stages."""
+
+    def __init__(self, doc: fitz.Document):
+        self.doc = doc
+        self._pages: dict[int, PageLayout] = {}
+
+    def page(self, page_num: int) -> PageLayout:
+        """Return the cached layout for a page, parsing it on first use."""
+        layout = self._pages.get(page_num)
+        if layout is None:
+            layout = PageLayout(self.doc[page_num])
+            self._pages[page_num] = layout
+        return layout
@@ -0,0 +1,181 @@
+"""Vectorized risk scoring for many reviews at once.
+
+score_portfolio() takes analyzed clauses in columnar form (one entry per
+clause: review, riskLevel, riskCategory, clauseType) and computes the
+compute_risk_breakdown() result of every review with NumPy group sums, in
+one pass over the columns. tools.compute_risk_breakdown() is the
+single-review case of the same computation.
+
+Results are identical to the per-review loop, not just close: every sum
+is accumulated with np.bincount, which adds in input order, over the
+clauses in the order the loop visited them (clause order per category;
+category order, then clause order, for the overall score).
+
+Usage (re-score a stored portfolio, e.g. clauses/documents.jsonl from
+`npx convex export`):
+    python portfolio_scoring.py clauses.jsonl                 # JSON lines to stdout
+    python portfolio_scoring.py clauses.jsonl -o scores.jsonl
+"""
+
+import argparse
+import json
+import sys
+from collections.abc import Hashable, Iterable, Sequence
+from pathlib import Path
+
+import numpy as np
+
+from clause_keywords import clause_importance_weight
+
+# Score range per risk level; an unknown level scores as "medium"
+RISK_RANGES = {"high": (70, 95), "medium": (35, 65), "low": (5, 30)}
+DEFAULT_RISK_RANGE = RISK_RANGES["medium"]
+# Always reported, in this order; other categories follow in order of appearance
+BASE_CATEGORIES = ("financial", "compliance", "operational", "reputational")
+EMPTY_CATEGORY_SCORE = 25
+EMPTY_REVIEW_SCORE = 50
+MAX_IMPORTANCE = 1.5  # Importance weight that reaches the top of the range
+
+
+def _factorize(values: Iterable[Hashable]) -> tuple[list, np.ndarray]:
+    """Distinct values in order of first appearance, and each value's code."""
+    index: dict = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int64)
+    return list(index), codes
+
+
+def score_portfolio(
+    review_ids: Sequence[Hashable],
+    risk_levels: Sequence[str],
+    risk_categories: Sequence[str],
+    clause_types: Sequence[str],
+    reviews: Iterable[Hashable] | None = None,
+) -> dict[Hashable, dict]:
+    """Risk breakdown of every review, from clause columns.
+
+    Args:
+        review_ids: The review of each clause.
+        risk_levels: riskLevel of each clause ('high'|'medium'|'low').
+        risk_categories: riskCategory of each clause.
+        clause_types: clauseType of each clause.
+        reviews: Reviews to score, in output order (default: those in
+            review_ids, in order of appearance). A review without clauses
+            gets the empty breakdown.
+
+    Returns:
+        Review id -> the dict compute_risk_breakdown() returns for that
+        review's clauses.
+    """
+    ids, review = _factorize(review_ids)
+    if reviews is not None:
+        reviews = list(reviews)
+        position = {review_id: i for i, review_id in enumerate(reviews)}
+        review = np.array([position[review_id] for review_id in ids], dtype=np.int64)[review]
+        ids = reviews
+    n_reviews = len(ids)
+    n = len(review)
+
+    # Per-clause score and weight
+    levels, level_code = _factorize(risk_levels)
+    ranges = np.array([RISK_RANGES.get(level, DEFAULT_RISK_RANGE) for level in levels],
+                      dtype=np.float64).reshape(-1, 2)
+    low, high = ranges[level_code, 0], ranges[level_code, 1]
+    types, type_code = _factorize(clause_types)
+    weight = np.array([clause_importance_weight(t.lower()) for t in types],
+                      dtype=np.float64)[type_code]
+    score = low + (high - low) * np.minimum(weight / MAX_IMPORTANCE, 1.0)
+    weighted = score * weight
+
+    # Categories: the base ones first, then the others per review in order
+    # of first appearance (the loop's dict insertion order)
+    categories, category_code = _factorize([*BASE_CATEGORIES, *risk_categories])
+    category_code = category_code[len(BASE_CATEGORIES):]
+    n_categories = len(categories)
+    pairs, first_index, pair_code = np.unique(
+        review * n_categories + category_code, return_index=True, return_inverse=True,
+    )
+    pair_review, pair_category = np.divmod(pairs, n_categories)
+    pair_rank = np.where(pair_category < len(BASE_CATEGORIES), pair_category,
+                         len(BASE_CATEGORIES) + first_index)
+
+    n_pairs = len(pairs)
+    pair_count = np.bincount(pair_code, minlength=n_pairs)
+    pair_weight = np.bincount(pair_code, weights=weight, minlength=n_pairs)
+    pair_weighted = np.bincount(pair_code, weights=weighted, minlength=n_pairs)
+    pair_average = pair_weighted / np.where(pair_weight > 0, pair_weight, 1.0)
+
+    # Overall: sums over the clauses ordered by (review, category rank)
+    order = np.argsort(
+        review * (n + len(BASE_CATEGORIES)) + pair_rank[pair_code], kind="stable",
+    )
+    total_weight = np.bincount(review[order], weights=weight[order], minlength=n_reviews)
+    total_weighted = np.bincount(review[order], weights=weighted[order], minlength=n_reviews)
+    clause_count = np.bincount(review, minlength=n_reviews)
+
+    risks = [{f"{c}Risk": EMPTY_CATEGORY_SCORE for c in BASE_CATEGORIES} for _ in ids]
+    distributions = [dict.fromkeys(BASE_CATEGORIES, 0) for _ in ids]
+    for p in np.lexsort((pair_rank, pair_review)).tolist():
+        category = categories[pair_category[p]]
+        risks[pair_review[p]][f"{category}Risk"] = int(pair_average[p])
+        distributions[pair_review[p]][category] = int(pair_count[p])
+
+    results = {}
+    for i, review_id in enumerate(ids):
+        results[review_id] = {
+            **risks[i],
+            "riskScore": (
+                int(total_weighted[i] / total_weight[i]) if total_weight[i] > 0
+                else EMPTY_REVIEW_SCORE
+            ),
+            "distribution": distributions[i],
+            "totalClauses": int(clause_count[i]),
+        }
+    return results
+
+
+def score_clause_records(
+    records: Iterable[dict], review_key: str = "reviewId",
+) -> dict[Hashable, dict]:
+    """score_portfolio() over clause dicts (as saved to Convex) of many reviews.
+
+    Missing fields default as in compute_risk_breakdown(): riskLevel
+    'medium', riskCategory 'operational', clauseType ''.
+    """
+    review_ids, levels, categories, types = [], [], [], []
+    for record in records:
+        review_ids.append(record[review_key])
+        levels.append(record.get("riskLevel", "medium"))
+        categories.append(record.get("riskCategory", "operational"))
+        types.append(record.get("clauseType", ""))
+    return score_portfolio(review_ids, levels, categories, types)
+
+
+def _read_records(path: Path) -> Iterable[dict]:
+    with path.open() as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-score stored reviews from a clauses JSONL export.",
+    )
+    parser.add_argument("clauses", type=Path, help="JSONL file, one clause per line")
+    parser.add_argument("-o", "--output", type=Path, help="write JSON lines here (default: stdout)")
+    parser.add_argument("--review-key", default="reviewId", help="field holding the review id")
+    args = parser.parse_args()
+
+    results = score_clause_records(_read_records(args.clauses), args.review_key)
+    out = args.output.open("w") if args.output else sys.stdout
+    try:
+        for review_id, result in results.items():
+            out.write(json.dumps({args.review_key: review_id, **result}) + "\n")
+    finally:
+        if args.output:
+            out.close()
+    print(f"Scored {len(results)} reviews", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Analysis profiles — per-request pipeline stage selection and budgets.
+
+A profile decides which stages of run_contract_analysis() execute and how
+much concurrency and time each stage gets:
+
+  - fast:      no RAG, no sub-clause splitting, local summary (no agent)
+  - balanced:  the default pipeline (RAG + K2 per clause, sub-clauses, agent)
+  - thorough:  RAG, hedged K2 calls, longer agent research with Exa
+
+Batch and back-office jobs can use "fast" while interactive users get depth.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class AnalysisProfile:
+    name: str
+    use_rag: bool  # Vultr RAG lookup before each K2 clause call
+    split_subclauses: bool  # Expand 3.1 / (a) / (i) into separate entries
+    use_agent_summary: bool  # Dedalus agent (then K2) summary; False = local only
+    use_exa_research: bool  # Register the Exa MCP server with the summary agent
+    clause_concurrency: int  # Max concurrent K2+RAG calls
+    clause_timeout: float  # Per-clause cap (seconds)
+    summary_timeout: float  # Dedalus agent cap (seconds)
+    agent_max_steps: int
+    analysis_timeout: float  # Whole-pipeline cap (seconds)
+    hedge_after: float | None = None  # Fire a duplicate K2 call after N seconds
+
+
+PROFILES: dict[str, AnalysisProfile] = {
+    "fast": AnalysisProfile(
+        name="fast",
+        use_rag=False,
+        split_subclauses=False,
+        use_agent_summary=False,
+        use_exa_research=False,
+        clause_concurrency=10,
+        clause_timeout=45.0,
+        summary_timeout=0.0,
+        agent_max_steps=0,
+        analysis_timeout=120.0,
+    ),
+    "balanced": AnalysisProfile(
+        name="balanced",
+        use_rag=True,
+        split_subclauses=True,
+        use_agent_summary=True,
+        use_exa_research=True,
+        clause_concurrency=6,
+        clause_timeout=120.0,
+        summary_timeout=60.0,
+        agent_max_steps=5,
+        analysis_timeout=300.0,
+    ),
+    "thorough": AnalysisProfile(
+        name="thorough",
+        use_rag=True,
+        split_subclauses=True,
+        use_agent_summary=True,
+        use_exa_research=True,
+        clause_concurrency=4,
+        clause_timeout=180.0,
+        summary_timeout=120.0,
+        agent_max_steps=8,
+        analysis_timeout=600.0,
+        hedge_after=20.0,
+    ),
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile(name: str | None) -> AnalysisProfile:
+    """Look up an analysis profile by name (case-insensitive).
+
+    Args:
+        name: Profile name ("fast", "balanced", "thorough"). Empty or None
+            selects the default profile.
+
+    Returns:
+        The matching AnalysisProfile.
+
+    Raises:
+        ValueError: If the name does not match a known profile.
+    """
+    key = (name or DEFAULT_PROFILE).strip().lower()
+    if key not in PROFILES:
+        raise ValueError(
+            f"Unknown analysis profile '{name}'. Choose one of: {', '.join(PROFILES)}"
+        )
+    return PROFILES[key]
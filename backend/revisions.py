@@ -0,0 +1,263 @@
+"""Incremental re-analysis of revised contract versions.
+
+Every finished analysis leaves a snapshot next to the stored upload
+(pdf_storage/<review_id>.analysis.json): each clause's heading, text and
+analysis, plus the summary. When a revised version (v2, v3, ... of the same
+agreement) is uploaded with a parent review id, align_clauses() pairs its
+clauses with the parent's:
+
+  unchanged  same text (whitespace-normalized), wherever the clause moved
+             or however it was renumbered: the parent's analysis is reused,
+             unless it failed (a timeout or K2 fallback)
+  changed    same heading, or similar enough text (difflib ratio), but the
+             text was edited: analyzed again
+  new        no counterpart in the parent: analyzed
+
+Reuse needs identical text on purpose: a one-word redline ("shall" ->
+"shall not") is what negotiations are about, and scores as almost
+identical. It also needs the same contract type and analysis profile, which
+shape every clause analysis (see reusable_analyses()).
+"""
+
+import difflib
+import json
+import os
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+from clause import Clause
+
+SNAPSHOT_DIR = Path(__file__).parent / "pdf_storage"
+SNAPSHOT_VERSION = 2
+# Revised clauses under the same heading pair up from this similarity;
+# clauses whose heading also changed need CHANGED_SIMILARITY
+SAME_HEADING_SIMILARITY = float(os.environ.get("REVISION_SAME_HEADING_SIMILARITY", "0.5"))
+CHANGED_SIMILARITY = float(os.environ.get("REVISION_CHANGED_SIMILARITY", "0.8"))
+# Clause result fields reused from the parent (text, heading and position
+# come from the new version)
+ANALYSIS_FIELDS = (
+    "riskLevel", "riskCategory", "explanation", "concern", "suggestion", "k2Reasoning",
+)
+SUMMARY_FIELDS = (
+    "summary", "riskScore", "financialRisk", "complianceRisk", "operationalRisk",
+    "reputationalRisk", "actionItems", "keyDates",
+)
+MAX_LISTED_CHANGES = 20  # Headings listed per kind of change in the summary prompt
+
+_REVIEW_ID = re.compile(r"[A-Za-z0-9_-]{1,128}")
+# Leading numbering of a heading: "5.", "5.1", "(a)", "B.", "Section 5", "ARTICLE V"
+_HEADING_NUMBER = re.compile(
+    r"^(?:(?:section|article)\s+[\divxlc]+[.:)]?"
+    r"|\d+(?:\.\d+)*[.)]?|\([a-z\d]+\)|[a-z\d][.)])\s*",
+    re.IGNORECASE,
+)
+
+
+class ClauseMatch(NamedTuple):
+    """How a clause of the new version relates to the parent version."""
+
+    status: str  # "unchanged" | "changed" | "new"
+    parent_index: int | None  # Index into the parent snapshot's clauses
+    similarity: float
+
+
+def is_review_id(value: str) -> bool:
+    """Whether value can be a review id (safe to use in a file name)."""
+    return bool(_REVIEW_ID.fullmatch(value))
+
+
+def snapshot_path(review_id: str) -> Path:
+    return SNAPSHOT_DIR / f"{review_id}.analysis.json"
+
+
+def save_snapshot(
+    review_id: str,
+    user_id: str,
+    contract_type: str,
+    profile: str,
+    clauses: list[Clause],
+    clause_results: list[dict],
+    result: dict,
+) -> None:
+    """Store an analysis for later incremental re-analysis.
+
+    Args:
+        review_id: The review.
+        user_id: Its owner (only the owner can use it as a parent).
+        contract_type: The classified contract type.
+        profile: Name of the analysis profile used.
+        clauses: The analyzed clauses.
+        clause_results: Their results, in the same order (a result with
+            "failed" set is kept for alignment but never reused).
+        result: The assembled analysis result (summary fields).
+    """
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "reviewId": review_id,
+        "userId": user_id,
+        "contractType": contract_type,
+        "profile": profile,
+        "clauses": [
+            {
+                "heading": clause.heading,
+                "text": clause.text,
+                "analysis": {field: res.get(field) for field in ANALYSIS_FIELDS},
+                "failed": bool(res.get("failed")),
+            }
+            for clause, res in zip(clauses, clause_results)
+        ],
+        "summary": {field: result.get(field) for field in SUMMARY_FIELDS},
+    }
+    path = snapshot_path(review_id)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(snapshot))
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(review_id: str, user_id: str) -> dict | None:
+    """The stored analysis of review_id, or None if missing or not user_id's."""
+    if not is_review_id(review_id):
+        return None
+    try:
+        snapshot = json.loads(snapshot_path(review_id).read_text())
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("userId") != user_id:
+        return None
+    return snapshot
+
+
+def _normalized(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _heading_key(heading: str) -> str:
+    """Heading without its numbering, so renumbered sections still pair up."""
+    return _normalized(_HEADING_NUMBER.sub("", heading.strip())).lower().rstrip(":.")
+
+
+def _best_similar(
+    text: str, candidates: list[int], parent_texts: list[str], threshold: float,
+) -> tuple[int | None, float]:
+    """Most similar candidate parent clause with a ratio >= threshold."""
+    best, best_ratio = None, threshold
+    matcher = difflib.SequenceMatcher(None, autojunk=False)
+    matcher.set_seq2(text)
+    for j in candidates:
+        matcher.set_seq1(parent_texts[j])
+        if (matcher.real_quick_ratio() >= best_ratio
+                and matcher.quick_ratio() >= best_ratio):
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = j, ratio
+    return best, best_ratio if best is not None else 0.0
+
+
+def align_clauses(clauses: list[Clause], parent_clauses: list[dict]) -> list[ClauseMatch]:
+    """Pair the clauses of a revised version with the parent version's.
+
+    Each parent clause pairs with at most one new clause: identical text
+    first (preferring the same heading), then, for the rest, the most
+    similar parent clause under the same heading, then the most similar
+    remaining one overall.
+
+    Args:
+        clauses: Clauses of the new version.
+        parent_clauses: The parent snapshot's "clauses".
+
+    Returns:
+        A ClauseMatch per clause, in order.
+    """
+    texts = [_normalized(clause.text) for clause in clauses]
+    keys = [_heading_key(clause.heading) for clause in clauses]
+    parent_texts = [_normalized(p["text"]) for p in parent_clauses]
+    parent_keys = [_heading_key(p["heading"]) for p in parent_clauses]
+    matches: list[ClauseMatch | None] = [None] * len(clauses)
+    free = set(range(len(parent_clauses)))
+
+    by_text: dict[str, list[int]] = {}
+    for j, text in enumerate(parent_texts):
+        by_text.setdefault(text, []).append(j)
+    for i, text in enumerate(texts):
+        candidates = [j for j in by_text.get(text, ()) if j in free]
+        if candidates:
+            same_heading = [j for j in candidates if parent_keys[j] == keys[i]]
+            j = (same_heading or candidates)[0]
+            matches[i] = ClauseMatch("unchanged", j, 1.0)
+            free.discard(j)
+
+    for i, text in enumerate(texts):
+        if matches[i] is not None:
+            continue
+        same_heading = [j for j in sorted(free) if parent_keys[j] == keys[i]]
+        j, ratio = _best_similar(text, same_heading, parent_texts, SAME_HEADING_SIMILARITY)
+        if j is None:
+            j, ratio = _best_similar(text, sorted(free), parent_texts, CHANGED_SIMILARITY)
+        if j is None:
+            matches[i] = ClauseMatch("new", None, 0.0)
+        else:
+            matches[i] = ClauseMatch("changed", j, ratio)
+            free.discard(j)
+    return matches
+
+
+def reusable_analyses(
+    matches: list[ClauseMatch], parent: dict, contract_type: str, profile: str,
+) -> list[dict | None]:
+    """The parent analysis each clause can reuse, or None to analyze it.
+
+    Only unchanged clauses whose parent analysis did not fail reuse it, and
+    none do when the contract type or analysis profile differs from the
+    parent's: both go into every clause prompt and pick its model and RAG.
+    """
+    if parent.get("contractType") != contract_type or parent.get("profile") != profile:
+        return [None] * len(matches)
+    return [
+        parent["clauses"][m.parent_index]["analysis"]
+        if m.status == "unchanged" and not parent["clauses"][m.parent_index]["failed"]
+        else None
+        for m in matches
+    ]
+
+
+def removed_clauses(matches: list[ClauseMatch], parent_clauses: list[dict]) -> list[dict]:
+    """Parent clauses with no counterpart in the new version."""
+    paired = {m.parent_index for m in matches if m.parent_index is not None}
+    return [p for j, p in enumerate(parent_clauses) if j not in paired]
+
+
+def describe_changes(
+    clauses: list[Clause], matches: list[ClauseMatch], parent: dict,
+) -> str:
+    """Summary-prompt section: what changed since the parent version."""
+    def listed(headings: list[str]) -> str:
+        more = len(headings) - MAX_LISTED_CHANGES
+        shown = "; ".join(h[:80] for h in headings[:MAX_LISTED_CHANGES])
+        return f"{shown}; and {more} more" if more > 0 else shown
+
+    changed = [c.heading for c, m in zip(clauses, matches) if m.status == "changed"]
+    new = [c.heading for c, m in zip(clauses, matches) if m.status == "new"]
+    removed = [p["heading"] for p in removed_clauses(matches, parent["clauses"])]
+    unchanged = sum(m.status == "unchanged" for m in matches)
+
+    lines = [
+        (
+            f"This is a revised version of a previously analyzed contract: "
+            f"{unchanged} clauses unchanged, {len(changed)} changed, {len(new)} new, "
+            f"{len(removed)} removed."
+        ),
+    ]
+    if changed:
+        lines.append(f"Changed: {listed(changed)}")
+    if new:
+        lines.append(f"New: {listed(new)}")
+    if removed:
+        lines.append(f"Removed: {listed(removed)}")
+    previous = parent.get("summary") or {}
+    if previous.get("summary"):
+        lines.append(
+            f"Previous version summary (risk score {previous.get('riskScore')}): "
+            f"{previous['summary']}"
+        )
+    return "\n".join(lines)
@@ -3,12 +3,21 @@
 Covers the 41 CUAD clause types with standard language, risk indicators,
 and enforceability notes. No external datasets required.
 
+Seeding is incremental: the collection's current items are listed and
+content-hashed, so re-runs (from any machine or fresh container) only upload
+new or changed items and delete removed ones and duplicates.
+
 Usage:
-    python seed_vultr_rag.py
+    python seed_vultr_rag.py [--concurrency N] [--force] [--keep-removed]
 """
 
+import argparse
+import asyncio
+import hashlib
+import json
 import os
 import sys
+import time
 
 import httpx
 from dotenv import load_dotenv
@@ -22,6 +31,10 @@ HEADERS = {
     "Authorization": f"Bearer {VULTR_API_KEY}",
     "Content-Type": "application/json",
 }
+LIST_PAGE_SIZE = 100
+DEFAULT_CONCURRENCY = 8
+MAX_RETRIES = 4
+RETRY_BACKOFF = 0.5  # seconds, doubled per attempt
 
 # Curated legal reference data covering major clause types
 LEGAL_REFERENCES = [
@@ -475,43 +488,209 @@ LEGAL_REFERENCES = [
 ]
 
 
-def upload_to_vultr(items: list[dict]) -> None:
-    """Upload reference items to Vultr vector store."""
-    if not VULTR_API_KEY or not COLLECTION_ID:
-        print("ERROR: Set VULTR_INFERENCE_API_KEY and VULTR_LEGAL_COLLECTION_ID in .env")
-        sys.exit(1)
+def _item_hash(item: dict) -> str:
+    """Content hash of a reference item (content + description)."""
+    payload = json.dumps(item, sort_keys=True).encode()
+    return hashlib.sha256(payload).hexdigest()
 
-    print(f"Uploading {len(items)} items to Vultr vector store...")
-    success = 0
-    errors = 0
 
-    with httpx.Client(timeout=60) as client:
-        for i, item in enumerate(items):
-            try:
-                response = client.post(
-                    f"{VULTR_BASE}/vector_store/{COLLECTION_ID}/items",
-                    headers=HEADERS,
-                    json=item,
-                )
+async def _request_with_retries(
+    client: httpx.AsyncClient, method: str, url: str, **kwargs
+) -> httpx.Response:
+    """Send a request, retrying transport errors, 429s and 5xx with backoff."""
+    for attempt in range(MAX_RETRIES):
+        try:
+            response = await client.request(method, url, headers=HEADERS, **kwargs)
+            if response.status_code != 429 and response.status_code < 500:
                 response.raise_for_status()
-                success += 1
+                return response
+            if attempt == MAX_RETRIES - 1:
+                response.raise_for_status()
+        except httpx.TransportError:
+            if attempt == MAX_RETRIES - 1:
+                raise
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+    raise RuntimeError("unreachable")
+
+
+async def _list_remote_items(client: httpx.AsyncClient, base: str) -> list[dict]:
+    """All items of the collection ({id, content, description}), across pages."""
+    items: list[dict] = []
+    params = {"per_page": LIST_PAGE_SIZE}
+    while True:
+        response = await _request_with_retries(client, "GET", base, params=params)
+        data = response.json()
+        items.extend(data.get("items", []))
+        cursor = ((data.get("meta") or {}).get("links") or {}).get("next")
+        if not cursor:
+            return items
+        params = {"per_page": LIST_PAGE_SIZE, "cursor": cursor}
+
+
+async def _remote_manifest(
+    client: httpx.AsyncClient, base: str, sem: asyncio.Semaphore,
+) -> dict[str, list[dict]]:
+    """Remote items by content hash ({hash: [{id, description}, ...]}).
+
+    Built from the collection itself, so it is right after a fresh deploy and
+    sees items uploaded by earlier runs anywhere. Items listed without their
+    content are fetched one by one.
+    """
+    listed = await _list_remote_items(client, base)
+
+    async def with_content(entry: dict) -> dict:
+        if "content" in entry:
+            return entry
+        async with sem:
+            response = await _request_with_retries(client, "GET", f"{base}/{entry['id']}")
+        return {**entry, **response.json()}
+
+    manifest: dict[str, list[dict]] = {}
+    for entry in await asyncio.gather(*[with_content(e) for e in listed]):
+        h = _item_hash({"content": entry.get("content", ""),
+                        "description": entry.get("description", "")})
+        manifest.setdefault(h, []).append(
+            {"id": entry["id"], "description": entry.get("description", "")}
+        )
+    return manifest
+
+
+async def _sync_items(items: list[dict], concurrency: int, force: bool, prune: bool) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    base = f"{VULTR_BASE}/vector_store/{COLLECTION_ID}/items"
+    current = {_item_hash(item): item for item in items}
+    stats = {"uploaded": 0, "deleted": 0, "failed": 0, "unchanged": 0}
+
+    async def upload(client: httpx.AsyncClient, item: dict) -> None:
+        async with sem:
+            try:
+                await _request_with_retries(client, "POST", base, json=item)
+            except httpx.HTTPError as e:
+                print(f"  Warning: Failed to upload '{item['description']}': {e}")
+                stats["failed"] += 1
+                return
+        stats["uploaded"] += 1
+
+    async def delete(client: httpx.AsyncClient, entry: dict) -> bool:
+        async with sem:
+            try:
+                await _request_with_retries(client, "DELETE", f"{base}/{entry['id']}")
             except httpx.HTTPStatusError as e:
-                print(f"  Warning: Failed to upload '{item['description']}': {e.response.status_code} {e.response.text[:200]}")
-                errors += 1
+                if e.response.status_code != 404:
+                    print(f"  Warning: Failed to delete '{entry.get('description')}': {e}")
+                    stats["failed"] += 1
+                    return False
+            except httpx.HTTPError as e:
+                print(f"  Warning: Failed to delete '{entry.get('description')}': {e}")
+                stats["failed"] += 1
+                return False
+        stats["deleted"] += 1
+        return True
+
+    async with httpx.AsyncClient(timeout=60) as client:
+        try:
+            remote = await _remote_manifest(client, base, sem)
+        except httpx.HTTPError as e:
+            # Uploading without knowing what is there would duplicate items
+            print(f"  Error: Could not list the collection's items: {e}")
+            stats["failed"] += 1
+            return stats
+
+        to_delete = []
+        for h, entries in remote.items():
+            if (force and h in current) or (prune and h not in current):
+                to_delete.extend(entries)
+            elif h in current:
+                to_delete.extend(entries[1:])  # Duplicates of an item already present
+        to_upload = [item for h, item in current.items() if force or h not in remote]
+        stats["unchanged"] = len(current) - len(to_upload)
+        print(
+            f"  {len(to_upload)} new/changed, {stats['unchanged']} unchanged, "
+            f"{len(to_delete)} to delete"
+        )
+
+        # With --force, the old copies go before the re-upload; if any of
+        # them cannot be deleted, skip the upload rather than duplicate
+        deleted = await asyncio.gather(*[delete(client, entry) for entry in to_delete])
+        if force and not all(deleted):
+            print("  Not re-uploading: some existing items could not be deleted")
+            return stats
+        await asyncio.gather(*[upload(client, item) for item in to_upload])
+
+    return stats
+
+
+def upload_to_vultr(
+    items: list[dict],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    force: bool = False,
+    prune: bool = True,
+) -> dict:
+    """Sync reference items to the Vultr vector store.
 
-            if (i + 1) % 10 == 0 or i + 1 == len(items):
-                print(f"  Progress: {i + 1}/{len(items)} ({success} ok, {errors} failed)")
+    The collection is listed and hashed first: only items whose content hash
+    is not there are uploaded, remote duplicates are deleted, and remote items
+    that are no longer in `items` are deleted (unless prune=False). Requests
+    run concurrently with bounded parallelism and retries, so re-running on
+    every deploy is cheap and idempotent.
 
-    print(f"\nUpload complete: {success} succeeded, {errors} failed")
+    Args:
+        items: Reference items with 'content' and 'description'.
+        concurrency: Max in-flight requests.
+        force: Delete the remote copies of every item in `items` and upload
+            them again; the re-upload is skipped if any delete fails. Remote
+            items not in `items` are still only deleted when prune is set.
+        prune: Delete remote items that were removed from `items` (False for
+            --keep-removed).
+
+    Returns:
+        Dict with uploaded, deleted, failed and unchanged counts.
+    """
+    if not VULTR_API_KEY or not COLLECTION_ID:
+        print("ERROR: Set VULTR_INFERENCE_API_KEY and VULTR_LEGAL_COLLECTION_ID in .env")
+        sys.exit(1)
+
+    print(f"Syncing {len(items)} items to Vultr vector store (concurrency {concurrency})...")
+    t0 = time.time()
+    stats = asyncio.run(_sync_items(items, concurrency, force, prune))
+    elapsed = time.time() - t0
+
+    requests_done = stats["uploaded"] + stats["deleted"]
+    rate = requests_done / elapsed if elapsed > 0 else 0.0
+    print(
+        f"\nSync complete in {elapsed:.1f}s: {stats['uploaded']} uploaded, "
+        f"{stats['deleted']} deleted, {stats['unchanged']} unchanged, "
+        f"{stats['failed']} failed ({rate:.1f} items/s)"
+    )
+    return stats
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Seed the Vultr legal knowledge base.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument(
+        "--force", action="store_true", help="delete and re-upload every current item",
+    )
+    parser.add_argument(
+        "--keep-removed", action="store_true",
+        help="don't delete remote items that were removed from LEGAL_REFERENCES",
+    )
+    args = parser.parse_args()
+
     print("=== ContractPilot: Seeding Vultr Legal Knowledge Base ===\n")
     print(f"Collection: {COLLECTION_ID}")
-    print(f"Items to upload: {len(LEGAL_REFERENCES)}\n")
+    print(f"Reference items: {len(LEGAL_REFERENCES)}\n")
 
-    upload_to_vultr(LEGAL_REFERENCES)
+    stats = upload_to_vultr(
+        LEGAL_REFERENCES,
+        concurrency=args.concurrency,
+        force=args.force,
+        prune=not args.keep_removed,
+    )
 
+    if stats["failed"]:
+        print("\n=== Done with errors — re-run to retry failed items. ===")
+        sys.exit(1)
     print("\n=== Done! Legal knowledge base is ready. ===")
 
 
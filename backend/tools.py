@@ -8,98 +8,43 @@ import base64
 import json
 import re
 
-import fitz
-
-from k2_client import analyze_clause_risk
+import numpy as np
+
+from clause import Clause
+from clause_keywords import CONTRACT_TYPE_KEYWORDS, RISK_CATEGORY_RULES, keyword_hits
+from clause_lexer import Section, lex_sections, lex_subclauses
+from k2_client import analyze_clause_risk, routed_completion, strip_code_fences
+from key_dates import extract_key_dates
+from keyword_set import KeywordHits
 from ocr import ocr_pdf
+from parsed_document import ParsedDocument
+from pdf_layout import PageLayout, line_words
+from portfolio_scoring import score_portfolio
 from vultr_rag import query_legal_knowledge
 
 
-def extract_clauses(contract_text: str) -> list[dict]:
+def extract_clauses(contract_text: str) -> list[Clause]:
     """Extract individual clauses from a contract's full text.
 
     Splits the contract into logical sections based on numbered headings,
-    section markers, or paragraph structure.
+    section markers, or paragraph structure (see clause_lexer).
 
     Args:
         contract_text: The full contract text.
 
     Returns:
-        List of dicts with 'text' and 'heading' for each clause.
+        List of Clause spans of contract_text, one per section.
     """
-    clauses = []
-    # Split on common section patterns:
-    #   "1.1", "2.14" (decimal numbering — common in legal docs)
-    #   "1.", "2)" (single-level numbering)
-    #   "Section 1", "ARTICLE I"
-    #   "ALL CAPS HEADING:"
-    pattern = (
-        r"(?:^|\n)"
-        r"(?="
-        r"\d+\.\d+(?:\.\d+)*[\.\)]*\s"   # 1.1, 2.14, 1.2.3 (decimal)
-        r"|\d+[\.\)]\s"                    # 1., 2) (single-level)
-        r"|[A-Z][\.\)]\s"                  # A., B) (lettered sections)
-        r"|\([A-Z]\)\s"                    # (A), (B)
-        r"|Section\s+\d"                    # Section 1
-        r"|SECTION\s+\d"                    # SECTION 1
-        r"|ARTICLE\s+[IVX\d]"              # ARTICLE I, ARTICLE 1
-        r"|Article\s+[IVX\d]"              # Article I, Article 1
-        r"|SCHEDULE\s+[A-Z\d]"             # SCHEDULE A, SCHEDULE 1
-        r"|Exhibit\s+[A-Z\d]"              # Exhibit A, Exhibit 1
-        r"|RECITALS?"                       # RECITAL or RECITALS
-        r"|WITNESSETH"                      # WITNESSETH
-        r"|[A-Z][A-Z\s]{3,}:"              # ALL CAPS HEADING:
-        r"|[A-Z][A-Z\s]{3,}\.(?=\s)"       # ALL CAPS HEADING. (followed by space)
-        r")"
-    )
-    sections = re.split(pattern, contract_text)
-
-    for section in sections:
-        section = section.strip()
-        if len(section) < 50:
-            continue
-
-        # Extract heading from first line; if it's just a number (e.g. "1.2"),
-        # combine with the next line to form a descriptive heading
-        lines = section.split("\n", 2)
-        heading = lines[0].strip()[:100]
-        if re.match(r"^\d+[\.\d]*[\.\)]*$", heading) and len(lines) > 1:
-            next_line = lines[1].strip()[:80]
-            heading = f"{heading} {next_line}"[:100]
-        text = section[:3000]  # Cap clause length
-
-        clauses.append({"heading": heading, "text": text})
-
-    # If no sections found, try splitting on lines that look like headings
-    if not clauses:
-        heading_pattern = re.compile(
-            r"(?:^|\n)([A-Z][A-Za-z\s]{2,60}(?:[:.])\s*\n)"
-        )
-        heading_sections = heading_pattern.split(contract_text)
-        if len(heading_sections) > 2:
-            for j in range(1, len(heading_sections) - 1, 2):
-                heading = heading_sections[j].strip().rstrip(":.")
-                body = heading_sections[j + 1].strip() if j + 1 < len(heading_sections) else ""
-                if len(body) < 50:
-                    continue
-                clauses.append({"heading": heading[:100], "text": body[:3000]})
-
-    # Final fallback: split by double newlines
-    if not clauses:
-        paragraphs = contract_text.split("\n\n")
-        for i, para in enumerate(paragraphs):
-            para = para.strip()
-            if len(para) < 50:
-                continue
-            clauses.append({"heading": f"Section {i + 1}", "text": para[:3000]})
-
-    return clauses
+    return [
+        Clause(section.heading, contract_text, section.start, section.end)
+        for section in lex_sections(contract_text)
+    ]
 
 
 MAX_CLAUSES = 60  # Hard cap on total clauses (including sub-clauses)
 
 
-def _cap_clauses(clauses: list[dict], limit: int = MAX_CLAUSES) -> list[dict]:
+def _cap_clauses(clauses: list[Clause], limit: int = MAX_CLAUSES) -> list[Clause]:
     """Cap clause list to limit, prioritizing top-level clauses over sub-clauses.
 
     Ensures broad document coverage by keeping all top-level clauses first,
@@ -108,90 +53,88 @@ def _cap_clauses(clauses: list[dict], limit: int = MAX_CLAUSES) -> list[dict]:
     if len(clauses) <= limit:
         return clauses
 
-    top_level = [c for c in clauses if not c.get("parentHeading")]
-    sub_clauses = [c for c in clauses if c.get("parentHeading")]
-
-    if len(top_level) >= limit:
-        return top_level[:limit]
+    top_level = sum(1 for c in clauses if not c.parent_heading)
+    if top_level >= limit:
+        return [c for c in clauses if not c.parent_heading][:limit]
 
-    remaining = limit - len(top_level)
-    kept_subs = sub_clauses[:remaining]
+    # Single pass in original order: every top-level clause, and sub-clauses
+    # until the remaining slots are used up
+    sub_slots = limit - top_level
+    kept = []
+    for c in clauses:
+        if c.parent_heading:
+            if not sub_slots:
+                continue
+            sub_slots -= 1
+        kept.append(c)
+    return kept
 
-    # Rebuild in original order
-    kept_set = set(id(c) for c in top_level) | set(id(c) for c in kept_subs)
-    return [c for c in clauses if id(c) in kept_set]
 
+def _section_clauses(source: str, section: Section, clause: Clause | None = None) -> list[Clause]:
+    """Clauses of a lexed section: itself, or its preamble and sub-clauses."""
+    if section.subclauses is None:
+        if clause is None:
+            clause = Clause(section.heading, source, section.start, section.end)
+        return [clause]
 
-_SUB_CLAUSE_PATTERN = re.compile(
-    r"(?:^|\n)\s*(?:"
-    r"\d+\.\d+[\.\)]*\s"           # 3.1, 3.1., 3.1)
-    r"|\([a-z]\)\s"                 # (a), (b)
-    r"|\([ivxlc]+\)\s"             # (i), (ii), (iv)
-    r"|\([A-Z]\)\s"                 # (A), (B)
-    r"|[a-z][\.\)]\s"              # a., b)
-    r"|\d+\.\d+\.\d+[\.\)]*\s"    # 3.1.1, 3.1.1.
-    r")",
-    re.MULTILINE,
-)
+    clauses = []
+    if section.preamble is not None:
+        clauses.append(Clause(section.heading, source, *section.preamble))
+    for sub in section.subclauses:
+        clauses.append(
+            Clause(sub.heading, source, sub.start, sub.end, section.heading, sub.index)
+        )
+    return clauses
 
 
-def split_into_subclauses(clauses: list[dict]) -> list[dict]:
+def split_into_subclauses(clauses: list[Clause]) -> list[Clause]:
     """Split clauses that contain sub-parts into individual sub-clause entries.
 
     Detects sub-clause patterns like 3.1, 3.2, (a), (b), (i), (ii) within
     each clause's text. Clauses with detected sub-parts are expanded into
-    separate entries with a parentHeading field.
+    separate entries with a parent_heading.
 
     Args:
-        clauses: List of clause dicts with 'heading' and 'text'.
+        clauses: Clauses to split.
 
     Returns:
-        Expanded list where multi-part clauses are split into sub-entries.
+        Expanded list where multi-part clauses are split into sub-clauses
+        (spans of the same source buffer).
     """
     result = []
     for clause in clauses:
-        text = clause["text"]
-        heading = clause["heading"]
-
-        matches = list(_SUB_CLAUSE_PATTERN.finditer(text))
-
-        # If fewer than 2 sub-parts found, keep clause as-is
-        if len(matches) < 2:
-            result.append(clause)
-            continue
-
-        # Keep preamble text (before first sub-clause) as standalone entry
-        preamble_end = matches[0].start()
-        preamble = text[:preamble_end].strip()
-        if len(preamble) > 30:
-            result.append({
-                "heading": heading,
-                "text": preamble[:3000],
-            })
-
-        # Split into individual sub-clauses
-        for i, match in enumerate(matches):
-            start = match.start()
-            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
-            sub_text = text[start:end].strip()
+        section = lex_subclauses(clause.source, clause.heading, clause.start, clause.end)
+        result.extend(_section_clauses(clause.source, section, clause))
+    return result
 
-            if len(sub_text) < 20:
-                continue
 
-            sub_lines = sub_text.split("\n", 1)
-            sub_heading = sub_lines[0].strip()[:100]
+def _lexed_clauses(contract_text: str, split_subclauses: bool) -> list[Clause]:
+    """extract_clauses(), optionally split_into_subclauses(), from one lexer pass."""
+    sections = lex_sections(contract_text)
+    print(f"  Regex extracted {len(sections)} top-level sections")
+    if not split_subclauses:
+        return [
+            Clause(section.heading, contract_text, section.start, section.end)
+            for section in sections
+        ]
+    return [
+        clause
+        for section in sections
+        for clause in _section_clauses(contract_text, section)
+    ]
 
-            result.append({
-                "heading": sub_heading,
-                "text": sub_text[:3000],
-                "parentHeading": heading,
-                "subClauseIndex": i,
-            })
 
-    return result
+def _try_parse_json(content: str):
+    """Parse JSON from an LLM response, returning None if it is malformed."""
+    try:
+        return json.loads(strip_code_fences(content))
+    except json.JSONDecodeError:
+        return None
 
 
-async def extract_clauses_k2(contract_text: str) -> list[dict]:
+async def extract_clauses_k2(
+    contract_text: str, split_subclauses: bool = True
+) -> list[Clause]:
     """Extract clauses using full-text regex + K2 intelligent filtering.
 
     For short documents (< 6000 chars): sends full text to K2 directly,
@@ -201,12 +144,15 @@ async def extract_clauses_k2(contract_text: str) -> list[dict]:
 
     Args:
         contract_text: The full contract text.
+        split_subclauses: Expand multi-part clauses into sub-clause entries.
+            Disabled by the "fast" analysis profile.
 
     Returns:
-        List of dicts with 'text' and 'heading' for each clause.
-        Sub-clause entries also have 'parentHeading' and 'subClauseIndex'.
+        List of Clause. Regex-extracted clauses are spans of contract_text;
+        sub-clauses also have parent_heading and sub_index.
     """
-    from k2_client import k2
+    def _expand(clauses: list[Clause]) -> list[Clause]:
+        return split_into_subclauses(clauses) if split_subclauses else clauses
 
     # ── Short documents: K2 single-pass (existing proven approach) ────
     if len(contract_text) <= 6000:
@@ -227,55 +173,45 @@ async def extract_clauses_k2(contract_text: str) -> list[dict]:
         )
 
         try:
-            response = await k2.chat.completions.create(
-                model="kimi-k2-instruct",
+            content = await routed_completion(
+                "clause_extraction",
                 messages=[
                     {"role": "system", "content": "Extract contract clauses. Return JSON only."},
                     {"role": "user", "content": prompt},
                 ],
                 max_tokens=2048,
+                validate=lambda c: isinstance(_try_parse_json(c), list),
+                text_len=len(contract_text),
             )
-            content = response.choices[0].message.content or "[]"
-
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-
-            clauses = json.loads(content.strip())
+            clauses = json.loads(strip_code_fences(content or "[]"))
 
             if isinstance(clauses, list) and len(clauses) > 0:
                 validated = []
                 for c in clauses:
                     if isinstance(c, dict) and "text" in c:
-                        validated.append({
-                            "heading": c.get("heading", "Clause")[:100],
-                            "text": c["text"][:3000],
-                        })
+                        validated.append(Clause.detached(
+                            c.get("heading", "Clause")[:100], c["text"][:3000]
+                        ))
                 if validated:
-                    return _cap_clauses(split_into_subclauses(validated))
+                    return _cap_clauses(_expand(validated))
         except Exception as e:
             print(f"  K2 clause extraction failed: {e}, falling back to regex")
 
-        return _cap_clauses(split_into_subclauses(extract_clauses(contract_text)))
+        return _cap_clauses(_lexed_clauses(contract_text, split_subclauses))
 
     # ── Large documents: hybrid regex-first + K2 filtering ────────────
     print(f"  Large document ({len(contract_text)} chars), using hybrid extraction")
 
-    # Step A: Full-text regex extraction (instant, no limits)
-    raw_clauses = extract_clauses(contract_text)
-    print(f"  Regex extracted {len(raw_clauses)} top-level sections")
-
-    # Step B: Split into sub-clauses
-    expanded = split_into_subclauses(raw_clauses)
+    # Steps A + B: Full-text lexing into sections and sub-clauses (one pass)
+    expanded = _lexed_clauses(contract_text, split_subclauses)
     print(f"  After sub-clause split: {len(expanded)} total entries")
 
     # Step C: Build compact TOC for K2 filtering
     toc_lines = []
     for i, c in enumerate(expanded):
-        prefix = f"  (sub of: {c['parentHeading'][:40]})" if c.get("parentHeading") else ""
-        preview = c["text"][:150].replace("\n", " ")
-        toc_lines.append(f"{i}: {c['heading'][:60]}{prefix} | {preview}")
+        prefix = f"  (sub of: {c.parent_heading[:40]})" if c.parent_heading else ""
+        preview = c.excerpt(150).replace("\n", " ")
+        toc_lines.append(f"{i}: {c.heading[:60]}{prefix} | {preview}")
 
     toc = "\n".join(toc_lines)
 
@@ -292,22 +228,17 @@ async def extract_clauses_k2(contract_text: str) -> list[dict]:
     )
 
     try:
-        response = await k2.chat.completions.create(
-            model="kimi-k2-instruct",
+        content = await routed_completion(
+            "clause_filter",
             messages=[
                 {"role": "system", "content": "Filter contract sections. Return JSON only."},
                 {"role": "user", "content": filter_prompt},
             ],
             max_tokens=512,
+            validate=lambda c: isinstance((_try_parse_json(c) or {}).get("keep"), list),
+            text_len=len(toc),
         )
-        content = response.choices[0].message.content or "{}"
-
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0]
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0]
-
-        filter_result = json.loads(content.strip())
+        filter_result = json.loads(strip_code_fences(content or "{}"))
         keep_indices = set(filter_result.get("keep", range(len(expanded))))
 
         filtered = [expanded[i] for i in range(len(expanded)) if i in keep_indices]
@@ -321,75 +252,29 @@ async def extract_clauses_k2(contract_text: str) -> list[dict]:
     return _cap_clauses(expanded)
 
 
-def classify_contract(contract_text: str) -> str:
+def classify_contract(contract_text: str, hits: KeywordHits | None = None) -> str:
     """Classify the type of contract based on weighted keyword scoring.
 
     Uses occurrence counts of keyword groups with distinctive keywords weighted
     higher to avoid false matches from incidental mentions.
 
     Args:
-        contract_text: The full contract text.
+        contract_text: The full contract text (all of it is scanned).
+        hits: keyword_hits(contract_text), if already computed.
 
     Returns:
         Contract type string (e.g., "NDA", "Employment Agreement", "Lease").
     """
-    text_lower = contract_text[:5000].lower()
-
-    # (contract_type, [(keyword, weight), ...])
-    contract_types = [
-        ("NDA", [
-            ("non-disclosure", 3), ("nda", 3), ("confidential information", 2),
-            ("disclosing party", 2), ("receiving party", 2),
-        ]),
-        ("Employment Agreement", [
-            ("employment agreement", 3), ("at-will", 3), ("employee", 1),
-            ("employer", 1), ("probationary", 2), ("severance", 2),
-            ("job title", 2), ("base salary", 2),
-        ]),
-        ("Lease Agreement", [
-            ("lease agreement", 3), ("landlord", 2), ("tenant", 2),
-            ("premises", 1), ("rent", 1), ("security deposit", 2),
-            ("leasehold", 3), ("sublease", 2),
-        ]),
-        ("Freelance/Contractor Agreement", [
-            ("independent contractor", 3), ("freelance", 3),
-            ("scope of work", 2), ("deliverables", 1), ("1099", 3),
-        ]),
-        ("Consulting Agreement", [
-            ("consulting agreement", 3), ("consultant", 2),
-            ("consulting services", 3), ("engagement", 1), ("retainer", 2),
-        ]),
-        ("SaaS/Software License", [
-            ("software license", 3), ("saas", 3), ("subscription", 2),
-            ("end user", 2), ("uptime", 2), ("service level agreement", 3),
-            ("api", 1), ("cloud", 1),
-        ]),
-        ("Service Agreement", [
-            ("service agreement", 3), ("services", 1), ("service level", 2),
-            ("service provider", 2), ("statement of work", 2),
-        ]),
-        ("Purchase Agreement", [
-            ("purchase agreement", 3), ("buyer", 2), ("seller", 2),
-            ("sale", 1), ("purchase price", 2), ("bill of sale", 3),
-        ]),
-        ("Partnership Agreement", [
-            ("partnership agreement", 3), ("partner", 1),
-            ("joint venture", 3), ("profit sharing", 2),
-            ("capital contribution", 2),
-        ]),
-        ("License Agreement", [
-            ("license agreement", 3), ("licensor", 2), ("licensee", 2),
-            ("royalt", 2), ("sublicense", 2), ("licensed rights", 2),
-        ]),
-    ]
+    if hits is None:
+        hits = keyword_hits(contract_text)
 
     best_type = "General Contract"
     best_score = 0
 
-    for contract_type, keywords in contract_types:
+    for contract_type, keywords in CONTRACT_TYPE_KEYWORDS:
         score = 0
         for keyword, weight in keywords:
-            count = text_lower.count(keyword)
+            count = hits.count(keyword)
             if count > 0:
                 score += weight * min(count, 3)  # cap at 3 occurrences
         if score > best_score:
@@ -399,7 +284,12 @@ def classify_contract(contract_text: str) -> str:
     return best_type
 
 
-def categorize_risk(clause_text: str, clause_type: str) -> dict:
+def categorize_risk(
+    clause_text: str,
+    clause_type: str,
+    text_hits: KeywordHits | None = None,
+    type_hits: KeywordHits | None = None,
+) -> dict:
     """Assign risk category per the MetricStream framework.
 
     Categories:
@@ -411,29 +301,19 @@ def categorize_risk(clause_text: str, clause_type: str) -> dict:
     Args:
         clause_text: The clause text.
         clause_type: The type of clause.
+        text_hits: keyword_hits(clause_text), if already computed.
+        type_hits: keyword_hits(clause_type), if already computed.
 
     Returns:
         Dict with category and rationale.
     """
-    ct = clause_type.lower()
-    text = clause_text.lower()
-
-    if any(term in ct for term in ["liability", "payment", "penalty", "damages", "fee", "cost"]):
-        return {"category": "financial", "rationale": "Direct monetary impact"}
-    elif any(term in text for term in ["liquidated damages", "cap on liability", "indemnif"]):
-        return {"category": "financial", "rationale": "Financial exposure clause"}
-    elif any(term in ct for term in ["non-compete", "compliance", "privacy", "data", "regulatory"]):
-        return {"category": "compliance", "rationale": "Regulatory or legal compliance risk"}
-    elif any(term in ct for term in ["exclusivity", "assignment", "ip", "termination", "non-solicit"]):
-        return {"category": "operational", "rationale": "Restricts operational freedom"}
-    elif any(term in ct for term in ["confidential", "non-disparage", "publicity"]):
-        return {"category": "reputational", "rationale": "Reputation or brand risk"}
-    elif any(term in text for term in ["penalt", "fine", "fee", "cost", "payment"]):
-        return {"category": "financial", "rationale": "Contains financial terms"}
-    elif any(term in text for term in ["shall not", "restricted", "prohibited", "exclusive"]):
-        return {"category": "operational", "rationale": "Contains operational restrictions"}
-    else:
-        return {"category": "operational", "rationale": "General operational clause"}
+    hits = {"type": type_hits, "text": text_hits}
+    for where, terms, category, rationale in RISK_CATEGORY_RULES:
+        if hits[where] is None:
+            hits[where] = keyword_hits(clause_type if where == "type" else clause_text)
+        if hits[where].any(terms):
+            return {"category": category, "rationale": rationale}
+    return {"category": "operational", "rationale": "General operational clause"}
 
 
 def compute_risk_breakdown(clause_results_json: str) -> str:
@@ -456,71 +336,13 @@ def compute_risk_breakdown(clause_results_json: str) -> str:
     except (json.JSONDecodeError, TypeError):
         return json.dumps({"error": "Invalid JSON input"})
 
-    # Clause importance weights — high-impact clause types contribute more
-    clause_importance = {
-        "indemnification": 1.5, "indemnity": 1.5,
-        "limitation of liability": 1.5, "liability": 1.4,
-        "termination": 1.3, "non-compete": 1.3, "non compete": 1.3,
-        "penalty": 1.4, "liquidated damages": 1.4, "damages": 1.3,
-        "payment": 1.2, "compensation": 1.2,
-        "intellectual property": 1.2, "ip assignment": 1.2,
-        "confidentiality": 1.1, "non-disclosure": 1.1,
-        "warranty": 1.1, "representations": 1.0,
-        "force majeure": 0.9, "assignment": 0.9,
-        "governing law": 0.8, "jurisdiction": 0.8,
-        "notices": 0.7, "miscellaneous": 0.6, "definitions": 0.5,
-    }
-
-    # Risk score ranges (instead of flat values)
-    risk_ranges = {"high": (70, 95), "medium": (35, 65), "low": (5, 30)}
-
-    categories: dict[str, list[tuple[float, float]]] = {
-        "financial": [], "compliance": [],
-        "operational": [], "reputational": [],
-    }
-
-    for c in clauses:
-        cat = c.get("riskCategory", "operational")
-        level = c.get("riskLevel", "medium")
-        clause_type = c.get("clauseType", "").lower()
-
-        # Determine importance weight for this clause type
-        importance = 1.0
-        for key, weight in clause_importance.items():
-            if key in clause_type:
-                importance = weight
-                break
-
-        # Compute score within the risk range, scaled by importance
-        low, high = risk_ranges.get(level, (35, 65))
-        importance_factor = min(importance / 1.5, 1.0)  # normalize to 0-1
-        score = low + (high - low) * importance_factor
-
-        if cat in categories:
-            categories[cat].append((score, importance))
-        else:
-            categories.setdefault(cat, []).append((score, importance))
-
-    result = {}
-    all_weighted_scores = []
-    all_weights = []
-    for cat, entries in categories.items():
-        if entries:
-            total_weight = sum(w for _, w in entries)
-            weighted_avg = sum(s * w for s, w in entries) / total_weight
-            result[f"{cat}Risk"] = int(weighted_avg)
-            all_weighted_scores.extend(s * w for s, w in entries)
-            all_weights.extend(w for _, w in entries)
-        else:
-            result[f"{cat}Risk"] = 25
-
-    total_weight = sum(all_weights)
-    result["riskScore"] = int(sum(all_weighted_scores) / total_weight) if total_weight > 0 else 50
-    result["distribution"] = {
-        cat: len(entries) for cat, entries in categories.items()
-    }
-    result["totalClauses"] = len(clauses)
-
+    result = score_portfolio(
+        [0] * len(clauses),
+        [c.get("riskLevel", "medium") for c in clauses],
+        [c.get("riskCategory", "operational") for c in clauses],
+        [c.get("clauseType", "") for c in clauses],
+        reviews=[0],
+    )[0]
     return json.dumps(result)
 
 
@@ -528,7 +350,8 @@ def find_key_dates(contract_text: str) -> str:
     """Extract dates, deadlines, and time-sensitive terms from contract text.
 
     Searches for date patterns (MM/DD/YYYY, Month DD YYYY, etc.), renewal
-    windows, termination notice periods, and milestone deadlines.
+    windows, termination notice periods ("30 days' written notice"), and
+    relative deadlines ("within 90 days after the Effective Date").
 
     Args:
         contract_text: The full contract text to search for dates.
@@ -536,56 +359,7 @@ def find_key_dates(contract_text: str) -> str:
     Returns:
         JSON array of date objects with date, label, and type fields.
     """
-    dates = []
-    text = contract_text[:10000]  # cap for performance
-
-    # Date patterns: "January 1, 2025", "01/01/2025", "2025-01-01"
-    date_pattern = re.compile(
-        r"(?:(?:January|February|March|April|May|June|July|August|September|"
-        r"October|November|December)\s+\d{1,2},?\s+\d{4})"
-        r"|(?:\d{1,2}/\d{1,2}/\d{2,4})"
-        r"|(?:\d{4}-\d{2}-\d{2})"
-    )
-
-    # Find dates with surrounding context
-    for match in date_pattern.finditer(text):
-        date_str = match.group()
-        start = max(0, match.start() - 100)
-        end = min(len(text), match.end() + 100)
-        context = text[start:end].replace("\n", " ").strip()
-
-        # Classify the date type
-        ctx_lower = context.lower()
-        if any(w in ctx_lower for w in ["terminat", "expir", "end date"]):
-            dtype = "termination"
-        elif any(w in ctx_lower for w in ["renew", "extend", "auto-renew"]):
-            dtype = "renewal"
-        elif any(w in ctx_lower for w in ["deadline", "due", "by", "no later than"]):
-            dtype = "deadline"
-        elif any(w in ctx_lower for w in ["effective", "commence", "start"]):
-            dtype = "milestone"
-        else:
-            dtype = "milestone"
-
-        # Extract a label from context
-        label_start = max(0, match.start() - 60)
-        label_text = text[label_start:match.end()].replace("\n", " ").strip()
-        # Take the sentence fragment containing the date
-        sentences = re.split(r"[.;]", label_text)
-        label = sentences[-1].strip() if sentences else label_text
-        label = label[:120]
-
-        dates.append({"date": date_str, "label": label, "type": dtype})
-
-    # Deduplicate by date string
-    seen = set()
-    unique = []
-    for d in dates:
-        if d["date"] not in seen:
-            seen.add(d["date"])
-            unique.append(d)
-
-    return json.dumps(unique[:15])  # cap at 15 dates
+    return json.dumps([key_date.to_dict() for key_date in extract_key_dates(contract_text)])
 
 
 def format_review_report(
@@ -638,44 +412,32 @@ def ocr_document(pdf_base64: str) -> str:
     return ocr_pdf(pdf_bytes)
 
 
-def _expand_to_paragraph(page, start_rect, clause_text: str) -> list[dict]:
+def _expand_to_paragraph(
+    layout: PageLayout, start_rect, clause_words: frozenset[str]
+) -> list[dict]:
     """Expand a single-line rect to cover the full clause paragraph.
 
-    Uses page.get_text("dict") to find consecutive lines that overlap
-    with the clause text, starting from the line containing start_rect.
+    Uses the page's cached line layout to find consecutive lines that
+    overlap with the clause text, starting from the line containing start_rect.
 
     Args:
-        page: PyMuPDF page object.
+        layout: Cached line layout of the page (DocumentLayout.page()).
         start_rect: The fitz.Rect of the first matched snippet.
-        clause_text: Full clause text to match against.
+        clause_words: line_words() of the clause's first 500 characters.
 
     Returns:
         List of rect dicts [{x0, y0, x1, y1}] covering the paragraph.
     """
-    # Get all text blocks/lines on the page
-    page_dict = page.get_text("dict")
-    all_lines = []
-    for block in page_dict.get("blocks", []):
-        if block.get("type") != 0:  # text blocks only
-            continue
-        for line in block.get("lines", []):
-            bbox = line["bbox"]
-            line_text = " ".join(span["text"] for span in line.get("spans", []))
-            all_lines.append({"bbox": bbox, "text": line_text})
-
-    if not all_lines:
+    if not len(layout):
         return [{"x0": start_rect.x0, "y0": start_rect.y0,
                  "x1": start_rect.x1, "y1": start_rect.y1}]
 
-    # Build a set of words from the clause text for overlap checking
-    clause_words = set(re.findall(r"[a-zA-Z]{3,}", clause_text.lower()[:500]))
-
     # Find the starting line (the one containing start_rect's y-center)
     start_y = (start_rect.y0 + start_rect.y1) / 2
     start_idx = 0
     min_dist = float("inf")
-    for i, line in enumerate(all_lines):
-        line_y = (line["bbox"][1] + line["bbox"][3]) / 2
+    for i, bbox in enumerate(layout.bboxes):
+        line_y = (bbox[1] + bbox[3]) / 2
         dist = abs(line_y - start_y)
         if dist < min_dist:
             min_dist = dist
@@ -683,48 +445,45 @@ def _expand_to_paragraph(page, start_rect, clause_text: str) -> list[dict]:
 
     # Collect consecutive lines that overlap with clause words
     rects = []
-    for i in range(start_idx, min(start_idx + 30, len(all_lines))):
-        line = all_lines[i]
-        line_words = set(re.findall(r"[a-zA-Z]{3,}", line["text"].lower()))
-        overlap = len(line_words & clause_words)
-
-        if i == start_idx:
-            # Always include the start line
-            rects.append({
-                "x0": line["bbox"][0], "y0": line["bbox"][1],
-                "x1": line["bbox"][2], "y1": line["bbox"][3],
-            })
-        elif overlap >= 2 or (overlap >= 1 and len(line_words) <= 3):
-            rects.append({
-                "x0": line["bbox"][0], "y0": line["bbox"][1],
-                "x1": line["bbox"][2], "y1": line["bbox"][3],
-            })
+    for i in range(start_idx, min(start_idx + 30, len(layout))):
+        bbox = layout.bboxes[i]
+        words = layout.words[i]
+        overlap = len(words & clause_words)
+
+        # Always include the start line
+        if i == start_idx or overlap >= 2 or (overlap >= 1 and len(words) <= 3):
+            rects.append({"x0": bbox[0], "y0": bbox[1], "x1": bbox[2], "y1": bbox[3]})
         else:
             break  # No more overlap, stop expanding
 
-    return rects if rects else [{"x0": start_rect.x0, "y0": start_rect.y0,
-                                  "x1": start_rect.x1, "y1": start_rect.y1}]
+    return rects
 
 
-def extract_clause_positions(pdf_bytes: bytes, clauses: list[dict]) -> list[dict]:
+def extract_clause_positions(document: ParsedDocument, clauses: list[Clause]) -> list[dict]:
     """Find the page and bounding boxes for each clause in the PDF.
 
-    Uses PyMuPDF text search to locate each clause's opening text,
-    then expands to cover the full paragraph.
+    Looks up each clause's opening text in the document's DocumentTextIndex
+    (built while parsing the upload), then expands to cover the full
+    paragraph using the per-page DocumentLayout cache. Clauses that are spans
+    of the document text are looked up on the page their offset falls on
+    first, so repeated wording (a table of contents, boilerplate) does not
+    pull them to an earlier page.
 
     Args:
-        pdf_bytes: Raw PDF file bytes.
-        clauses: List of clause dicts with 'text' and 'heading' keys.
+        document: The parsed PDF (see parsed_document.parse_document()).
+        clauses: Clauses to locate.
 
     Returns:
         List of position dicts (same order as input clauses), each with:
         pageNumber (0-indexed), rects ([{x0,y0,x1,y1}]), pageWidth, pageHeight.
     """
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    text_index = document.text_index
+    layout = document.layout
     positions = []
 
     for clause in clauses:
-        raw = clause["text"].strip()
+        raw = clause.text.strip()
+        page_hint = document.page_at(clause.start) if clause.in_document(document.text) else None
         found = False
 
         # Try progressively shorter snippets
@@ -733,21 +492,21 @@ def extract_clause_positions(pdf_bytes: bytes, clauses: list[dict]) -> list[dict
             if len(snippet) < 10:
                 continue
 
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                rects = page.search_for(snippet)
-                if rects:
-                    # Expand from the first match to cover the full paragraph
-                    expanded_rects = _expand_to_paragraph(page, rects[0], raw)
-                    positions.append({
-                        "pageNumber": page_num,
-                        "rects": expanded_rects,
-                        "pageWidth": page.rect.width,
-                        "pageHeight": page.rect.height,
-                    })
-                    found = True
-                    break
-            if found:
+            hit = text_index.find(snippet, page_hint)
+            if hit:
+                page_num, first_rect = hit
+                page_width, page_height = document.page_size(page_num)
+                # Expand from the first match to cover the full paragraph
+                expanded_rects = _expand_to_paragraph(
+                    layout.page(page_num), first_rect, line_words(raw[:500])
+                )
+                positions.append({
+                    "pageNumber": page_num,
+                    "rects": expanded_rects,
+                    "pageWidth": page_width,
+                    "pageHeight": page_height,
+                })
+                found = True
                 break
 
         if not found:
@@ -759,38 +518,131 @@ def extract_clause_positions(pdf_bytes: bytes, clauses: list[dict]) -> list[dict
                 "pageHeight": 792,
             })
 
-    doc.close()
     return positions
 
 
+OCR_PREFIX_LEN = 4  # Clause words match OCR words on their first 4 characters
+OCR_MATCH_WINDOW = 8  # Number of leading clause words matched per clause
+OCR_MIN_SCORE = 3
+OCR_STRONG_SCORE = 6  # Forward matches this good win over an earlier better one
+
+
+def _build_ocr_prefix_index(words_lower: list[str]) -> dict[str, list[int]]:
+    """Map every 1..OCR_PREFIX_LEN character prefix to OCR word positions.
+
+    A clause word tw matches OCR word w iff w.startswith(tw[:4]), so the
+    positions matching tw are exactly index[tw[:4]]. Lists are ascending.
+    """
+    index: dict[str, list[int]] = {}
+    for i, word in enumerate(words_lower):
+        for k in range(1, min(OCR_PREFIX_LEN, len(word)) + 1):
+            index.setdefault(word[:k], []).append(i)
+    return index
+
+
+def _best_ocr_window(
+    target: list[str],
+    words_lower: list[str],
+    prefix_index: dict[str, list[int]],
+    cursor: int,
+) -> tuple[int, int]:
+    """Find the OCR window that best matches the target clause words.
+
+    Candidate window starts come from the target words' prefix postings
+    (exhaustive for every key length, see _build_ocr_prefix_index): a window
+    scoring >= OCR_MIN_SCORE hits at least one of any len(target) -
+    (OCR_MIN_SCORE - 1) keys, so only the rarest that many are expanded.
+    Each candidate is then scored exactly like the old sliding window.
+    Windows at or after `cursor` (the previous clause's match) win ties and
+    any strong match, keeping matches monotonic in document order.
+
+    Returns:
+        Tuple of (best_idx, best_score); best_idx is -1 when nothing matched.
+    """
+    keys = [tw[:OCR_PREFIX_LEN] for tw in target]
+    last_start = len(words_lower) - len(target)
+
+    anchors = sorted(range(len(keys)), key=lambda j: len(prefix_index.get(keys[j], ())))
+    anchors = anchors[:len(anchors) - (OCR_MIN_SCORE - 1)]
+
+    candidates = set()
+    for j in anchors:
+        for pos in prefix_index.get(keys[j], ()):
+            if 0 <= pos - j <= last_start:
+                candidates.add(pos - j)
+
+    best = (-1, 0)
+    best_forward = (-1, 0)
+    for i in sorted(candidates):
+        score = 0
+        for j, key in enumerate(keys):
+            if words_lower[i + j].startswith(key):
+                score += 1
+        if score > best[1]:
+            best = (i, score)
+        if i >= cursor and score > best_forward[1]:
+            best_forward = (i, score)
+
+    if best_forward[0] >= 0 and (
+        best_forward[1] == best[1] or best_forward[1] >= OCR_STRONG_SCORE
+    ):
+        return best_forward
+    return best
+
+
+OCR_LINE_GAP = 8  # Max y-center jump (points) between words on the same line
+OCR_COLLECT_WORDS = 40  # Words highlighted from the match point
+
+
+def _ocr_line_rects(
+    x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray
+) -> list[dict]:
+    """Group consecutive words into lines and union each line's bboxes.
+
+    A new line starts wherever the y-center moves by OCR_LINE_GAP or more
+    from the previous word.
+    """
+    y_center = (y0 + y1) / 2
+    breaks = np.flatnonzero(np.abs(np.diff(y_center)) >= OCR_LINE_GAP) + 1
+    starts = np.concatenate(([0], breaks))
+    return [
+        {"x0": float(a), "y0": float(b), "x1": float(c), "y1": float(d)}
+        for a, b, c, d in zip(
+            np.minimum.reduceat(x0, starts), np.minimum.reduceat(y0, starts),
+            np.maximum.reduceat(x1, starts), np.maximum.reduceat(y1, starts),
+        )
+    ]
+
+
 def match_clauses_to_ocr_boxes(
-    clauses: list[dict],
-    ocr_words: list[dict],
-    pdf_bytes: bytes,
+    clauses: list[Clause],
+    document: ParsedDocument,
 ) -> list[dict]:
     """Match clause text to OCR word bounding boxes for scanned PDFs.
 
-    Uses fuzzy sliding-window matching to find clause positions from
-    OCR word data, then groups words into line-level highlight rects.
+    Uses fuzzy window matching over a word-prefix index to find clause
+    positions from OCR word data, then groups words into line-level
+    highlight rects. Clauses are expected in document order; matches prefer
+    windows after the previous clause's match.
 
     Args:
-        clauses: List of clause dicts with 'text' and 'heading'.
-        ocr_words: Flat list of word dicts from ocr_pdf_with_positions().
-        pdf_bytes: Raw PDF bytes (used to get page dimensions).
+        clauses: Clauses to locate.
+        document: The parsed PDF; its ocr_words (OcrWords column store) are
+            matched and its page sizes reported.
 
     Returns:
         List of position dicts matching extract_clause_positions() format.
     """
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    page_dims = {}
-    for i in range(len(doc)):
-        page_dims[i] = {"width": doc[i].rect.width, "height": doc[i].rect.height}
-    doc.close()
+    ocr_words = document.ocr_words
+    words_lower = ocr_words.lower_texts()
+    x0s, y0s, x1s, y1s, pages = ocr_words.columns()
+    prefix_index = _build_ocr_prefix_index(words_lower)
+    cursor = 0
 
     positions = []
 
     for clause in clauses:
-        raw = clause["text"].strip()
+        raw = clause.text.strip()
         clause_words_lower = re.findall(r"[a-z0-9]+", raw[:200].lower())
         if len(clause_words_lower) < 3:
             positions.append({
@@ -799,72 +651,36 @@ def match_clauses_to_ocr_boxes(
             })
             continue
 
-        # Sliding window: match first 8 words of clause against OCR words
-        target = clause_words_lower[:8]
-        best_idx = -1
-        best_score = 0
-
-        for i in range(len(ocr_words) - len(target)):
-            score = 0
-            for j, tw in enumerate(target):
-                if i + j < len(ocr_words) and ocr_words[i + j]["text"].lower().startswith(tw[:4]):
-                    score += 1
-            if score > best_score:
-                best_score = score
-                best_idx = i
-
-        if best_score < 3 or best_idx < 0:
+        # Match the first 8 words of the clause against OCR words
+        target = clause_words_lower[:OCR_MATCH_WINDOW]
+        best_idx, best_score = _best_ocr_window(target, words_lower, prefix_index, cursor)
+
+        if best_score < OCR_MIN_SCORE or best_idx < 0:
             positions.append({
                 "pageNumber": 0, "rects": [],
                 "pageWidth": 612, "pageHeight": 792,
             })
             continue
 
+        cursor = best_idx
         # Collect words from match point (~40 words on same page)
-        page_num = ocr_words[best_idx]["page"]
-        matched_words = []
-        for k in range(best_idx, min(best_idx + 40, len(ocr_words))):
-            w = ocr_words[k]
-            if w["page"] != page_num:
-                break
-            matched_words.append(w)
-
-        if not matched_words:
-            dims = page_dims.get(page_num, {"width": 612, "height": 792})
-            positions.append({
-                "pageNumber": page_num, "rects": [],
-                "pageWidth": dims["width"], "pageHeight": dims["height"],
-            })
-            continue
+        page_num = int(pages[best_idx])
+        end = min(best_idx + OCR_COLLECT_WORDS, len(ocr_words))
+        off_page = np.flatnonzero(pages[best_idx:end] != page_num)
+        if off_page.size:
+            end = best_idx + int(off_page[0])
 
         # Group words into line-level rects (merge words with similar y)
-        lines = []
-        current_line = [matched_words[0]]
-        for w in matched_words[1:]:
-            prev_y = (current_line[-1]["y0"] + current_line[-1]["y1"]) / 2
-            curr_y = (w["y0"] + w["y1"]) / 2
-            if abs(curr_y - prev_y) < 8:
-                current_line.append(w)
-            else:
-                lines.append(current_line)
-                current_line = [w]
-        lines.append(current_line)
-
-        rects = []
-        for line_words in lines:
-            rects.append({
-                "x0": min(w["x0"] for w in line_words),
-                "y0": min(w["y0"] for w in line_words),
-                "x1": max(w["x1"] for w in line_words),
-                "y1": max(w["y1"] for w in line_words),
-            })
+        rects = _ocr_line_rects(
+            x0s[best_idx:end], y0s[best_idx:end], x1s[best_idx:end], y1s[best_idx:end]
+        )
 
-        dims = page_dims.get(page_num, {"width": 612, "height": 792})
+        page_width, page_height = document.page_size(page_num)
         positions.append({
             "pageNumber": page_num,
             "rects": rects,
-            "pageWidth": dims["width"],
-            "pageHeight": dims["height"],
+            "pageWidth": page_width,
+            "pageHeight": page_height,
         })
 
     return positions
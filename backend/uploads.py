@@ -0,0 +1,255 @@
+"""Resumable chunked uploads backed by local disk.
+
+Large scanned contracts (100–300 MB) are uploaded in chunks that can be
+retried or resumed after a dropped connection instead of restarting a single
+multipart POST:
+
+  POST   /uploads                 create → {upload_id, offset, chunk_size}
+  HEAD   /uploads/{id}            current Upload-Offset (resume point)
+  PATCH  /uploads/{id}            append a chunk at Upload-Offset, verified
+                                  against Upload-Checksum ("sha256 <base64>")
+  POST   /uploads/{id}/finalize   check size (and whole-file sha256 if given),
+                                  then start analysis like /analyze
+
+The routes live in main.py; this module owns the on-disk state. Each upload is
+<UPLOAD_DIR>/<id>.json (metadata) plus <id>.part (bytes received so far). The
+offset is the .part file's size — a chunk that fails its checksum or is cut
+off mid-transfer is truncated away, so the offset only ever covers verified
+bytes. Uploads untouched for UPLOAD_EXPIRY_SECONDS are swept on create.
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+UPLOAD_DIR = Path(__file__).parent / "pdf_storage" / ".uploads"
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024  # Suggested to clients
+UPLOAD_EXPIRY_SECONDS = 24 * 3600
+SUPPORTED_EXTENSIONS = ("pdf", "docx")
+
+_locks: dict[str, asyncio.Lock] = {}
+
+
+class UploadError(Exception):
+    """An upload request that cannot be applied; carries the HTTP status."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class UploadSession:
+    """Metadata of one resumable upload (persisted as <id>.json)."""
+
+    upload_id: str
+    filename: str
+    size: int
+    user_id: str
+    use_ocr: bool
+    profile: str
+    sha256: str = ""  # Optional whole-file hex digest, checked on finalize
+    created: float = 0.0
+    parent_review_id: str = ""  # Earlier version to re-analyze incrementally against
+
+    @property
+    def part_path(self) -> Path:
+        return UPLOAD_DIR / f"{self.upload_id}.part"
+
+    @property
+    def meta_path(self) -> Path:
+        return UPLOAD_DIR / f"{self.upload_id}.json"
+
+    @property
+    def offset(self) -> int:
+        """Bytes received and verified so far."""
+        try:
+            return self.part_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+
+def _sweep_expired() -> None:
+    cutoff = time.time() - UPLOAD_EXPIRY_SECONDS
+    for path in UPLOAD_DIR.glob("*.*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                _locks.pop(path.stem, None)
+        except OSError:
+            continue
+
+
+def create_upload(
+    filename: str,
+    size: int,
+    user_id: str,
+    use_ocr: bool,
+    profile: str,
+    sha256: str = "",
+    max_bytes: int = 0,
+    parent_review_id: str = "",
+) -> UploadSession:
+    """Register a new upload and create its empty .part file.
+
+    Args:
+        filename: Original filename (must be .pdf or .docx).
+        size: Total file size in bytes, declared up front.
+        user_id: Owner of the review that finalize will create.
+        use_ocr: Force OCR on every page (as in /analyze).
+        profile: Analysis profile name (as in /analyze).
+        sha256: Optional hex digest of the whole file.
+        max_bytes: Largest accepted size (0 = no limit).
+        parent_review_id: Review of an earlier version (as in /analyze).
+
+    Returns:
+        The new UploadSession.
+    """
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise UploadError("Unsupported file type. Upload a PDF or Word (.docx) file.")
+    if size <= 0:
+        raise UploadError("Upload size must be positive.")
+    if max_bytes and size > max_bytes:
+        raise UploadError(
+            f"File exceeds the {max_bytes / 1024 / 1024:g} MB upload limit.", 413
+        )
+    sha256 = sha256.strip().lower()
+    if sha256 and (len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256)):
+        raise UploadError("sha256 must be a 64-character hex digest.")
+
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    _sweep_expired()
+    session = UploadSession(
+        upload_id=uuid.uuid4().hex, filename=filename, size=size, user_id=user_id,
+        use_ocr=use_ocr, profile=profile, sha256=sha256, created=time.time(),
+        parent_review_id=parent_review_id,
+    )
+    session.part_path.touch()
+    session.meta_path.write_text(json.dumps(asdict(session)))
+    return session
+
+
+def get_upload(upload_id: str) -> UploadSession:
+    """Load an upload's metadata, or raise UploadError(404)."""
+    if not upload_id.isalnum():
+        raise UploadError("Upload not found.", 404)
+    try:
+        data = json.loads((UPLOAD_DIR / f"{upload_id}.json").read_text())
+    except (OSError, ValueError):
+        raise UploadError("Upload not found.", 404)
+    return UploadSession(**data)
+
+
+def parse_checksum(header: str) -> bytes:
+    """Parse an Upload-Checksum header ("sha256 <base64 digest>")."""
+    algorithm, _, encoded = header.strip().partition(" ")
+    if algorithm.lower() != "sha256":
+        raise UploadError("Upload-Checksum must use sha256.")
+    try:
+        digest = base64.b64decode(encoded.strip(), validate=True)
+    except (binascii.Error, ValueError):
+        raise UploadError("Upload-Checksum digest is not valid base64.")
+    if len(digest) != hashlib.sha256().digest_size:
+        raise UploadError("Upload-Checksum digest has the wrong length.")
+    return digest
+
+
+async def append_chunk(
+    session: UploadSession,
+    offset: int,
+    chunks: AsyncIterator[bytes],
+    checksum: bytes | None = None,
+) -> int:
+    """Append one chunk at offset, verifying its checksum before keeping it.
+
+    Args:
+        session: The upload.
+        offset: Client's Upload-Offset; must equal the current offset.
+        chunks: The request body stream.
+        checksum: Expected sha256 digest of the chunk (parse_checksum()).
+
+    Returns:
+        The new offset.
+    """
+    lock = _locks.setdefault(session.upload_id, asyncio.Lock())
+    if lock.locked():
+        raise UploadError("Another request for this upload is in progress.", 409)
+    async with lock:
+        if not session.meta_path.exists():  # Finalized or expired meanwhile
+            raise UploadError("Upload not found.", 404)
+        current = session.offset
+        if offset != current:
+            raise UploadError(f"Upload-Offset {offset} does not match {current}.", 409)
+
+        digest = hashlib.sha256()
+        written = 0
+        try:
+            with session.part_path.open("r+b") as out:
+                out.seek(current)
+                async for data in chunks:
+                    written += len(data)
+                    if written > MAX_CHUNK_BYTES:
+                        raise UploadError(
+                            f"Chunks are limited to {MAX_CHUNK_BYTES // (1024 * 1024)} MB.", 413
+                        )
+                    if current + written > session.size:
+                        raise UploadError("Chunk runs past the declared upload size.", 413)
+                    digest.update(data)
+                    out.write(data)
+                if checksum is not None and digest.digest() != checksum:
+                    raise UploadError("Chunk checksum mismatch.", 460)
+        except BaseException:
+            # Keep only verified bytes — the client resumes from `current`
+            os.truncate(session.part_path, current)
+            raise
+        os.utime(session.meta_path)
+        return current + written
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while block := f.read(DEFAULT_CHUNK_BYTES):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def finalize_upload(session: UploadSession) -> Path:
+    """Check that the upload is complete and intact; return its .part path.
+
+    Holds the upload's lock, so no chunk can be appended meanwhile (and
+    finalize is rejected with 409 while one is in progress). The metadata
+    file is removed; the caller takes ownership of the .part file (moves it
+    into storage or deletes it).
+    """
+    lock = _locks.setdefault(session.upload_id, asyncio.Lock())
+    if lock.locked():
+        raise UploadError("A chunk for this upload is in progress.", 409)
+    async with lock:
+        if not session.meta_path.exists():  # Finalized or expired meanwhile
+            raise UploadError("Upload not found.", 404)
+        if session.offset != session.size:
+            raise UploadError(
+                f"Upload incomplete: {session.offset} of {session.size} bytes received.", 409
+            )
+        # Up to MAX_UPLOAD_BYTES of hashing: keep it off the event loop
+        intact = not session.sha256 or (
+            await asyncio.to_thread(_file_sha256, session.part_path) == session.sha256
+        )
+        if not intact:
+            session.part_path.unlink(missing_ok=True)
+        session.meta_path.unlink(missing_ok=True)
+    _locks.pop(session.upload_id, None)
+    if not intact:
+        raise UploadError("File checksum mismatch; upload discarded.", 460)
+    return session.part_path
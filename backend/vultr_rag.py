@@ -2,19 +2,27 @@
 
 Queries the Vultr vector store seeded with curated legal reference data.
 Uses kimi-k2-instruct model for RAG queries.
+
+Set LEGAL_RAG_BACKEND=local to use the offline index in local_index.py
+instead. The local index is also used when Vultr is not configured or the
+remote query fails.
 """
 
+import asyncio
 import os
 from pathlib import Path
 
 import httpx
 from dotenv import load_dotenv
 
+from local_index import query_local_knowledge
+
 load_dotenv(Path(__file__).parent / ".env")
 
 VULTR_BASE = "https://api.vultrinference.com/v1"
 VULTR_API_KEY = os.environ.get("VULTR_INFERENCE_API_KEY", "")
 COLLECTION_ID = os.environ.get("VULTR_LEGAL_COLLECTION_ID", "")
+RAG_BACKEND = os.environ.get("LEGAL_RAG_BACKEND", "vultr").lower()  # "vultr" | "local"
 HEADERS = {
     "Authorization": f"Bearer {VULTR_API_KEY}",
     "Content-Type": "application/json",
@@ -34,8 +42,10 @@ async def query_legal_knowledge(
     Returns:
         Legal context string from the knowledge base.
     """
-    if not VULTR_API_KEY or not COLLECTION_ID:
-        return "Legal knowledge base not configured."
+    if RAG_BACKEND == "local" or not VULTR_API_KEY or not COLLECTION_ID:
+        return await asyncio.to_thread(
+            query_local_knowledge, clause_text, clause_type, contract_type,
+        )
 
     query = (
         f"For a {clause_type} clause in a {contract_type}, find:\n"
@@ -64,4 +74,7 @@ async def query_legal_knowledge(
             data = response.json()
             return data["choices"][0]["message"]["content"]
         except (httpx.HTTPError, KeyError) as e:
-            return f"RAG query failed: {e}"
+            print(f"  Vultr RAG failed ({e}), using local index")
+            return await asyncio.to_thread(
+                query_local_knowledge, clause_text, clause_type, contract_type,
+            )
@@ -45,6 +45,8 @@ export async function POST(request: NextRequest) {
 
     // Forward to Python backend
     const useOcr = formData.get("use_ocr");
+    const profile = formData.get("profile");
+    const parentReviewId = formData.get("parent_review_id");
 
     const backendForm = new FormData();
     backendForm.append("file", file);
@@ -52,6 +54,12 @@ export async function POST(request: NextRequest) {
     if (useOcr) {
       backendForm.append("use_ocr", useOcr.toString());
     }
+    if (profile) {
+      backendForm.append("profile", profile.toString());
+    }
+    if (parentReviewId) {
+      backendForm.append("parent_review_id", parentReviewId.toString());
+    }
 
     const controller = new AbortController();
     const timeout = setTimeout(() => controller.abort(), 30_000);